@@ -0,0 +1,59 @@
+"""Import-time budget check for the agent's CLI startup path.
+
+Runs `python -X importtime -c "import <module>"` in a fresh interpreter from the
+project root, reports the cumulative import cost and fails (exit 1) if it is over
+budget or if a heavy SDK leaked onto the startup path.
+
+    python bench/importtime.py                    # main, default budget
+    python bench/importtime.py --budget-ms 150 --module rpa.form_parser_gemini
+"""
+import argparse, os, re, subprocess, sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Must never be imported just to start the CLI / import the parser module
+HEAVY = ('google.generativeai', 'bs4', 'lxml', 'playwright', 'requests')
+_LINE = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)')
+
+
+def measure(module):
+    """Return ({module: cumulative_us}, top-level cumulative_us) for importing `module`."""
+    r = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                       cwd=ROOT, capture_output=True, text=True)
+    if r.returncode != 0:
+        raise SystemExit(f'import {module} failed:\n{r.stderr[-2000:]}')
+    cum = {}
+    for line in r.stderr.splitlines():
+        m = _LINE.match(line)
+        if m:
+            cum[m.group(4)] = int(m.group(2))
+    return cum, cum.get(module, 0)
+
+
+def main():
+    p = argparse.ArgumentParser(description='Check CLI import time against a budget')
+    p.add_argument('--module', default='main')
+    p.add_argument('--budget-ms', type=float, default=250.0)
+    p.add_argument('--runs', type=int, default=5, help='Take the best of N fresh interpreters')
+    a = p.parse_args()
+
+    best = None; leaked = set()
+    for _ in range(max(1, a.runs)):
+        cum, total = measure(a.module)
+        leaked |= {h for h in HEAVY if h in cum}
+        best = total if best is None else min(best, total)
+    ms = best / 1000.0
+    print(f'import {a.module}: {ms:.1f} ms (budget {a.budget_ms:.0f} ms, best of {a.runs})')
+    ok = True
+    if leaked:
+        print('❌ heavy modules on the startup path: ' + ', '.join(sorted(leaked)))
+        ok = False
+    if ms > a.budget_ms:
+        print('❌ over budget')
+        ok = False
+    if ok:
+        print('✅ within budget')
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
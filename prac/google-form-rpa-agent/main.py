@@ -1,30 +1,92 @@
-import argparse, json, asyncio
+import argparse, json, asyncio, os, sys, atexit
 from dotenv import load_dotenv
-from rpa.form_parser_gemini import build_config_from_gemini
-from rpa.browser_filler import prefill_form
 from rpa.types import FormConfig
+# rpa.form_parser_gemini / rpa.browser_filler pull in requests, bs4, Gemini and
+# Playwright; they are imported inside main() only on the paths that use them.
 
 def parse_args():
     p=argparse.ArgumentParser(description='Google Form RPA Agent (Gemini 2.5-flash + Playwright, no submit)')
-    p.add_argument('--form', required=True)
+    p.add_argument('--form', help='Google Form URL (optional with --from-config)')
+    p.add_argument('--from-config', default=None, help='Skip fetch + Gemini and prefill straight from this saved config (implies --fill)')
+    p.add_argument('--link', action='store_true', help='Print a prefilled viewform link instead of opening a browser')
+    p.add_argument('--manifest', default=None, help='JSON/JSONL list of {form, basic, out, config, timeout_s}; runs every form in one shared Chromium')
+    p.add_argument('--parallel', type=int, default=4, help='Manifest mode: forms processed concurrently')
+    p.add_argument('--form-timeout', type=float, default=120, help='Manifest mode: per-form timeout in seconds')
+    p.add_argument('--rpm', type=int, default=60, help='Manifest mode: Gemini requests per minute (token bucket)')
+    p.add_argument('--report', default='multi_form_report.json', help='Manifest mode: aggregate results report')
+    p.add_argument('--remap', action='store_true', help='Reuse the saved --out config and send only new/changed fields to the mapper')
     p.add_argument('--basic', default='basic_info.json')
     p.add_argument('--out', default='config.json')
     p.add_argument('--fill', action='store_true')
     p.add_argument('--headless', action='store_true')
     p.add_argument('--keep-open', action='store_true')
     p.add_argument('--fast', action='store_true', help='Block heavy resources to speed up page load')
+    p.add_argument('--batch', action='store_true', help='Apply all fields in one in-page call; per-locator fill only for misses')
+    p.add_argument('--cache-dir', default=None, help='Serve static form assets (JS/CSS/fonts) from an on-disk cache in this dir')
+    p.add_argument('--har', default=None, help='Replay all traffic from this HAR file (fully offline form load)')
+    p.add_argument('--record-har', action='store_true', help='With --har: record traffic into the HAR instead of replaying it')
     p.add_argument('--timeout-ms', type=int, default=5000, help='Default Playwright action timeout in ms (faster if lower)')
+    p.add_argument('--trace', default=None, help='Write per-step spans as Chrome trace-event JSON (open in Perfetto)')
+    p.add_argument('--trace-failures', default=None, help='Keep a Playwright trace zip in this dir for failed fills only')
     return p.parse_args()
 
+def _fill(fc, a):
+    if a.link:
+        from rpa.prefill_link import prefill_url
+        print('🔗', prefill_url(fc.model_dump()))
+        return
+    from rpa.browser_filler import prefill_form
+    asyncio.run(prefill_form(fc.model_dump(), headless=a.headless, keep_open=a.keep_open, fast=a.fast, default_timeout_ms=a.timeout_ms, batch=a.batch,
+                             cache_dir=a.cache_dir, har=a.har, har_mode='record' if a.record_har else 'replay',
+                             trace_dir=a.trace_failures))
+
 def main():
     load_dotenv()
     a=parse_args()
+    if a.trace:
+        from rpa.tracing import enable, save
+        enable(a.trace)
+        # Saved on every exit path, including sys.exit in manifest mode
+        atexit.register(lambda: print('🧵 Trace written to', save()))
+    if a.manifest:
+        from rpa.multi_form import load_manifest, run_manifest
+        from rpa.gemini_client import MappingClient
+        rep=asyncio.run(run_manifest(load_manifest(a.manifest), parallel=a.parallel, timeout_s=a.form_timeout,
+                                     client=MappingClient(rpm=a.rpm, concurrency=a.parallel),
+                                     headless=a.headless, fast=a.fast, batch=a.batch, cache_dir=a.cache_dir,
+                                     default_timeout_ms=a.timeout_ms, trace_dir=a.trace_failures))
+        open(a.report,'w',encoding='utf-8').write(json.dumps(rep, indent=2))
+        print(f"📊 {rep['ok']}/{rep['total']} forms prefilled in {rep['wall_ms']} ms → {a.report}")
+        sys.exit(0 if rep['failed']==0 else 1)
+    if a.from_config:
+        # Fast path: no fetch, no LLM, no rewrite of the config
+        fc=FormConfig.model_validate(json.load(open(a.from_config,'r',encoding='utf-8')))
+        if a.form: fc.form_url=a.form
+        _fill(fc, a)
+        return
+    if not a.form:
+        sys.exit('error: --form is required unless --from-config is given')
     basic=json.load(open(a.basic,'r',encoding='utf-8'))
-    cfg=build_config_from_gemini(a.form, basic, 'prompts/mapping_prompt.md')
-    fc=FormConfig.model_validate(cfg)
+    prompt='prompts/mapping_prompt.md'
+    if a.remap and os.path.exists(a.out):
+        from rpa.form_parser_gemini import build_config_incremental
+        saved=json.load(open(a.out,'r',encoding='utf-8'))
+        map_fn=lambda: build_config_incremental(a.form, basic, saved, prompt)
+    else:
+        from rpa.form_parser_gemini import build_config_from_gemini
+        map_fn=lambda: build_config_from_gemini(a.form, basic, prompt)
+    if a.fill and not a.link:
+        # Launch Chromium and open the form while fetch + mapping are still running
+        from rpa.pipeline import run_pipeline
+        asyncio.run(run_pipeline(a.form, map_fn, out=a.out, headless=a.headless, keep_open=a.keep_open, fast=a.fast,
+                                 default_timeout_ms=a.timeout_ms, batch=a.batch, cache_dir=a.cache_dir,
+                                 har=a.har, har_mode='record' if a.record_har else 'replay',
+                                 trace_dir=a.trace_failures))
+        return
+    fc=FormConfig.model_validate(map_fn())
     open(a.out,'w',encoding='utf-8').write(json.dumps(fc.model_dump(), indent=2))
     print('📝 Wrote', a.out)
-    if a.fill:
-        asyncio.run(prefill_form(fc.model_dump(), headless=a.headless, keep_open=a.keep_open, fast=a.fast, default_timeout_ms=a.timeout_ms))
+    if a.link:
+        _fill(fc, a)
 if __name__=='__main__':
     main()
@@ -0,0 +1,58 @@
+"""Resolve choice/checkbox options inside the question that owns them, with role locators.
+
+A page-wide `get_by_role('radio', name=...)` hits the wrong question when two
+questions share an option label ("Yes"). The resolver uses the page-wide match
+only when it is unique; otherwise it scopes the lookup to the question's container
+(a radiogroup/group/list named by the title, or the listitem holding the title
+heading) and refuses rather than tick an option of another question.
+
+Built on `get_by_role` only: `page.accessibility.snapshot()` is deprecated, and
+`locator.aria_snapshot()` needs a newer Playwright than the one pinned here.
+"""
+import re
+
+# Named containers that carry the question title (aria-labelledby) in Google Forms
+_QUESTION_ROLES = ('radiogroup', 'group', 'list', 'listitem', 'region')
+
+
+def _exact(s):
+    """Case-insensitive whole-name match; a trailing required marker (*) is optional."""
+    s = re.sub(r'\s+', ' ', str(s or '')).strip().rstrip(' *')
+    return re.compile(r'^\s*' + r'\s+'.join(map(re.escape, s.split(' '))) + r'(\s*\*)?\s*$', re.I)
+
+
+class ChoiceResolver:
+    def __init__(self, pg):
+        self.pg = pg
+        self._scopes = {}   # question -> container locator (or None), looked up once per page
+
+    async def _unique(self, loc):
+        return loc if await loc.count() == 1 else None
+
+    async def _question(self, question):
+        """The one container of `question`: named by its title (exact, then contains), else the listitem with that heading."""
+        if question not in self._scopes:
+            pg, scope = self.pg, None
+            for name in (_exact(question), question):
+                for role in _QUESTION_ROLES:
+                    scope = await self._unique(pg.get_by_role(role, name=name))
+                    if scope is not None:
+                        break
+                if scope is not None:
+                    break
+            if scope is None:
+                scope = await self._unique(pg.get_by_role('listitem').filter(
+                    has=pg.get_by_role('heading', name=_exact(question))))
+            self._scopes[question] = scope
+        return self._scopes[question]
+
+    async def locator(self, role, question, option):
+        """Locator of the one `role` option named `option` in `question`, or None if missing or ambiguous."""
+        name = _exact(option)
+        hit = await self._unique(self.pg.get_by_role(role, name=name))
+        if hit is not None or not question:
+            return hit
+        scope = await self._question(question)
+        if scope is None:
+            return None
+        return await self._unique(scope.get_by_role(role, name=name))
@@ -0,0 +1,102 @@
+import os, json, hashlib
+from urllib.parse import urlsplit
+
+# Hosts that serve Google Forms' static bundles (JS/CSS/fonts/icons)
+FORM_ASSET_HOSTS = (
+    'www.gstatic.com', 'ssl.gstatic.com', 'fonts.gstatic.com',
+    'fonts.googleapis.com', 'docs.google.com',
+)
+CACHEABLE_TYPES = ('script', 'stylesheet', 'font', 'image')
+# Response headers worth replaying; length/encoding no longer match the decoded body
+_KEEP_HEADERS = ('content-type', 'access-control-allow-origin', 'timing-allow-origin')
+
+
+class AssetCache:
+    """On-disk cache for static resources of known form hosts, served via context.route.
+
+    Only GET requests for `resource_types` on `hosts` are cached; everything else
+    falls through to the next route handler (or the network). Documents and XHRs
+    are never cached, so form HTML and submissions always stay live.
+    """
+
+    def __init__(self, root='.cache/assets', hosts=FORM_ASSET_HOSTS, resource_types=CACHEABLE_TYPES):
+        self.root = root
+        self.hosts = set(hosts)
+        self.resource_types = set(resource_types)
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(root, exist_ok=True)
+
+    def _paths(self, url):
+        k = hashlib.sha256(url.encode('utf-8')).hexdigest()
+        d = os.path.join(self.root, k[:2])
+        return os.path.join(d, k + '.body'), os.path.join(d, k + '.json')
+
+    def cacheable(self, req):
+        return (req.method == 'GET' and req.resource_type in self.resource_types
+                and urlsplit(req.url).hostname in self.hosts)
+
+    def get(self, url):
+        body, meta = self._paths(url)
+        if not (os.path.exists(body) and os.path.exists(meta)):
+            return None
+        try:
+            return json.load(open(meta, 'r', encoding='utf-8')), body
+        except Exception:
+            return None
+
+    def put(self, url, status, headers, body):
+        bpath, mpath = self._paths(url)
+        os.makedirs(os.path.dirname(bpath), exist_ok=True)
+        hdrs = {k: v for k, v in headers.items() if k.lower() in _KEEP_HEADERS}
+        # Write-then-rename so concurrent contexts never read a partial file
+        for path, data, mode in ((bpath, body, 'wb'), (mpath, json.dumps({'url': url, 'status': status, 'headers': hdrs}), 'w')):
+            tmp = f'{path}.{os.getpid()}.tmp'
+            with open(tmp, mode) as fh:
+                fh.write(data)
+            os.replace(tmp, path)
+
+    async def handle(self, route):
+        req = route.request
+        if not self.cacheable(req):
+            await route.fallback()
+            return
+        hit = self.get(req.url)
+        if hit:
+            meta, body = hit
+            self.hits += 1
+            await route.fulfill(status=meta.get('status', 200), headers=meta.get('headers') or {}, path=body)
+            return
+        try:
+            resp = await route.fetch()
+            body = await resp.body()
+        except Exception:
+            await route.fallback()
+            return
+        self.misses += 1
+        if resp.status == 200:
+            try:
+                self.put(req.url, resp.status, resp.headers, body)
+            except OSError:
+                pass
+        await route.fulfill(response=resp, body=body)
+
+    async def install(self, context):
+        await context.route('**/*', self.handle)
+
+
+async def install_har(context, har_path, mode='replay'):
+    """Record (`mode='record'`) or replay (`mode='replay'`) all traffic via a HAR file.
+
+    Replay aborts anything missing from the HAR, so runs load entirely from disk.
+    A recorded HAR is written when the context closes.
+    """
+    if mode == 'record':
+        os.makedirs(os.path.dirname(os.path.abspath(har_path)), exist_ok=True)
+        await context.route_from_har(har_path, update=True, update_content='embed', update_mode='minimal')
+    elif mode == 'replay':
+        if not os.path.exists(har_path):
+            raise FileNotFoundError(f'HAR not found: {har_path} (record it first with --record-har)')
+        await context.route_from_har(har_path, not_found='abort')
+    else:
+        raise ValueError(f'Unknown HAR mode: {mode}')
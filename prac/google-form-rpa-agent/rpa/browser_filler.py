@@ -1,80 +1,364 @@
-import re
+import re, time
 from playwright.async_api import async_playwright
+from rpa.asset_cache import AssetCache, install_har
+from rpa.a11y_resolver import ChoiceResolver
+from rpa.tracing import span, pw_trace_start, pw_trace_stop
 
-async def prefill_form(config, headless=False, keep_open=True, fast=False, default_timeout_ms=10000):
-    async with async_playwright() as p:
-        b = await p.chromium.launch(headless=headless)
-        c = await b.new_context()
-
-        # Optional fast mode: block heavy resources to speed up navigation
-        if fast:
-            async def _block(route):
-                req = route.request
-                rt = req.resource_type
-                if rt in ("image","media","font"):
-                    await route.abort()
-                else:
-                    await route.continue_()
-            await c.route("**/*", _block)
-
-        pg = await c.new_page()
-        pg.set_default_timeout(default_timeout_ms)
-        await pg.goto(config['form_url'], wait_until='domcontentloaded')
-        for f in config.get('fields',[]):
-            t=f.get('type'); eid=f.get('entry_id'); lbl=f.get('question_label'); val=f.get('value')
-            if t in ('text','paragraph') and eid:
-                # Prefer visible editable inputs or textarea, avoid hidden/sentinel
-                sel=f'input[name="entry.{eid}"]:not([type="hidden"]), textarea[name="entry.{eid}"]'
-                loc = pg.locator(sel)
-                if await loc.count()>0:
-                    try:
-                        await loc.first.fill(str(val))
-                    except Exception:
-                        pass
-            elif t=='date' and eid:
-                m=re.match(r"(\d{4})-(\d{2})-(\d{2})$", str(val))
-                if m:
-                    y,mo,d=m.groups()
-                    for suf,v in (('_year',y),('_month',str(int(mo))),('_day',str(int(d)))):
-                        sel=f'[name="entry.{eid}{suf}"]';
-                        if await pg.locator(sel).count()>0: await pg.fill(sel, v)
-            elif t=='time' and eid:
-                m=re.match(r"(\d{2}):(\d{2})$", str(val))
-                if m:
-                    hh,mm=m.groups()
-                    for suf,v in (('_hour',str(int(hh))),('_minute',f"{int(mm):02d}")):
-                        sel=f'[name="entry.{eid}{suf}"]';
-                        if await pg.locator(sel).count()>0: await pg.fill(sel, v)
-            elif t=='dropdown' and eid:
-                sel=f'select[name="entry.{eid}"]'
-                if await pg.locator(sel).count()>0:
-                    await pg.select_option(sel, label=str(val))
-            elif t=='choice':
-                r = pg.get_by_role('radio', name=re.compile(rf'^{re.escape(str(val))}$', re.I))
-                if await r.count()>0:
-                    try:
-                        await r.first.scroll_into_view_if_needed()
-                        await r.first.check()
-                    except Exception:
-                        pass
-            elif t=='checkbox':
-                vals=val if isinstance(val, list) else [str(val)]
-                for o in vals:
-                    cb = pg.get_by_role('checkbox', name=re.compile(rf'^{re.escape(o)}$', re.I))
-                    if await cb.count()>0:
-                        try:
-                            await cb.first.scroll_into_view_if_needed()
-                            await cb.first.check()
-                        except Exception:
-                            pass
-        print('✅ Prefill done.' + (' Browser left open. (No submit).' if keep_open else ''))
-        if keep_open:
+async def _block_heavy(route):
+    # Fast mode: drop images/media/fonts, let everything else through
+    if route.request.resource_type in ("image","media","font"):
+        await route.abort()
+    else:
+        await route.fallback()
+
+async def prepare_context(c, fast=False, cache=None, har=None, har_mode='replay'):
+    """Install per-context routing on a fresh browser context.
+
+    Handlers run last-registered first, so the order is: fast-mode blocking,
+    then the on-disk asset cache, then HAR record/replay, then the network.
+    """
+    if har:
+        await install_har(c, har, mode=har_mode)
+    if cache is not None:
+        await cache.install(c)
+    if fast:
+        await c.route("**/*", _block_heavy)
+
+# Applies a whole FormConfig in one round-trip. Fields are addressed by their
+# entry.<id> names; choice/checkbox options are looked up inside the question
+# container that owns entry.<id>. Returns one {ok, reason} per input spec.
+_BATCH_FILL_JS = r"""
+(specs) => {
+  const norm = (s) => (s || '').replace(/\s+/g, ' ').trim().toLowerCase();
+  const q = (n) => CSS.escape(n);
+  const editable = (n) => document.querySelector(
+    `input[name="${q(n)}"]:not([type="hidden"]), textarea[name="${q(n)}"]`);
+  const setValue = (el, v) => {
+    const proto = el instanceof HTMLTextAreaElement ? HTMLTextAreaElement.prototype : HTMLInputElement.prototype;
+    Object.getOwnPropertyDescriptor(proto, 'value').set.call(el, v);
+    el.dispatchEvent(new Event('input', {bubbles: true}));
+    el.dispatchEvent(new Event('change', {bubbles: true}));
+    return el.value === v;
+  };
+  const container = (eid) => {
+    const any = document.querySelector(`[name="${q('entry.' + eid)}"], [name="${q('entry.' + eid + '_sentinel')}"]`);
+    return any ? (any.closest('[role="listitem"]') || any.parentElement) : null;
+  };
+  const optionName = (el) => el.getAttribute('data-value') || el.getAttribute('aria-label') ||
+    (el.labels && el.labels[0] ? el.labels[0].textContent : '') || el.value || '';
+  const findOption = (root, role, label) => {
+    for (const el of root.querySelectorAll(`input[type="${role}"], [role="${role}"]`)) {
+      if (norm(optionName(el)) === norm(label)) return el;
+    }
+    return null;
+  };
+  const checked = (el) => el.tagName === 'INPUT' ? el.checked : el.getAttribute('aria-checked') === 'true';
+  const tick = (el) => { if (!checked(el)) el.click(); return checked(el); };
+
+  return specs.map((s) => {
+    try {
+      if (s.kind === 'text') {
+        const el = editable('entry.' + s.eid);
+        if (!el) return {ok: false, reason: 'not_found'};
+        return setValue(el, s.value) ? {ok: true} : {ok: false, reason: 'rejected'};
+      }
+      if (s.kind === 'parts') {
+        for (const [suf, v] of s.parts) {
+          const el = editable('entry.' + s.eid + suf);
+          if (!el) return {ok: false, reason: 'not_found:' + suf};
+          if (!setValue(el, v)) return {ok: false, reason: 'rejected:' + suf};
+        }
+        return {ok: true};
+      }
+      if (s.kind === 'select') {
+        const el = document.querySelector(`select[name="${q('entry.' + s.eid)}"]`);
+        if (!el) return {ok: false, reason: 'not_found'};
+        const opt = Array.from(el.options).find((o) => o.label === s.value || o.textContent.trim() === s.value);
+        if (!opt) return {ok: false, reason: 'no_option'};
+        el.value = opt.value;
+        el.dispatchEvent(new Event('input', {bubbles: true}));
+        el.dispatchEvent(new Event('change', {bubbles: true}));
+        return {ok: true};
+      }
+      if (s.kind === 'radio' || s.kind === 'checkbox') {
+        const root = container(s.eid);
+        if (!root) return {ok: false, reason: 'not_found'};
+        for (const v of s.values) {
+          const el = findOption(root, s.kind, v);
+          if (!el) return {ok: false, reason: 'no_option:' + v};
+          if (!tick(el)) return {ok: false, reason: 'not_checked:' + v};
+        }
+        return {ok: true};
+      }
+      return {ok: false, reason: 'unsupported'};
+    } catch (e) {
+      return {ok: false, reason: String(e)};
+    }
+  });
+}
+"""
+
+def _batch_spec(f):
+    """Translate a field into the in-page spec, or None if the batch cannot address it."""
+    t=f.get('type'); eid=f.get('entry_id'); val=f.get('value')
+    if not eid:
+        return None
+    if t in ('text','paragraph'):
+        return {'kind':'text','eid':eid,'value':str(val)}
+    if t=='date':
+        m=re.match(r"(\d{4})-(\d{2})-(\d{2})$", str(val))
+        if not m: return None
+        y,mo,d=m.groups()
+        return {'kind':'parts','eid':eid,'parts':[['_year',y],['_month',str(int(mo))],['_day',str(int(d))]]}
+    if t=='time':
+        m=re.match(r"(\d{2}):(\d{2})$", str(val))
+        if not m: return None
+        hh,mm=m.groups()
+        return {'kind':'parts','eid':eid,'parts':[['_hour',str(int(hh))],['_minute',f"{int(mm):02d}"]]}
+    if t=='dropdown':
+        return {'kind':'select','eid':eid,'value':str(val)}
+    if t=='choice':
+        return {'kind':'radio','eid':eid,'values':[str(val)]}
+    if t=='checkbox':
+        return {'kind':'checkbox','eid':eid,'values':[str(v) for v in (val if isinstance(val, list) else [val])]}
+    return None
+
+async def _fill_one(pg, f, resolver=None):
+    """Per-locator fill of a single field. Returns True if something was set.
+
+    With a ChoiceResolver, choice/checkbox options are resolved within their own
+    question, so an option label shared by two questions ticks the right one.
+    """
+    t=f.get('type'); eid=f.get('entry_id'); lbl=f.get('question_label'); val=f.get('value')
+    if t in ('text','paragraph') and eid:
+        # Prefer visible editable inputs or textarea, avoid hidden/sentinel
+        sel=f'input[name="entry.{eid}"]:not([type="hidden"]), textarea[name="entry.{eid}"]'
+        loc = pg.locator(sel)
+        if await loc.count()>0:
             try:
-                while True:
-                    await pg.wait_for_timeout(60000)
-            except KeyboardInterrupt:
+                await loc.first.fill(str(val))
+                return True
+            except Exception:
                 pass
+    elif t=='date' and eid:
+        m=re.match(r"(\d{4})-(\d{2})-(\d{2})$", str(val))
+        if m:
+            y,mo,d=m.groups(); done=False
+            for suf,v in (('_year',y),('_month',str(int(mo))),('_day',str(int(d)))):
+                sel=f'[name="entry.{eid}{suf}"]';
+                if await pg.locator(sel).count()>0: await pg.fill(sel, v); done=True
+            return done
+    elif t=='time' and eid:
+        m=re.match(r"(\d{2}):(\d{2})$", str(val))
+        if m:
+            hh,mm=m.groups(); done=False
+            for suf,v in (('_hour',str(int(hh))),('_minute',f"{int(mm):02d}")):
+                sel=f'[name="entry.{eid}{suf}"]';
+                if await pg.locator(sel).count()>0: await pg.fill(sel, v); done=True
+            return done
+    elif t=='dropdown' and eid:
+        sel=f'select[name="entry.{eid}"]'
+        if await pg.locator(sel).count()>0:
+            await pg.select_option(sel, label=str(val))
+            return True
+    elif t in ('choice','checkbox') and resolver is not None:
+        vals=[str(val)] if t=='choice' else (val if isinstance(val, list) else [str(val)])
+        done=True
+        for o in vals:
+            loc=await resolver.locator('radio' if t=='choice' else 'checkbox', lbl, o)
+            ok=False
+            if loc is not None:
+                try:
+                    await loc.check()
+                    ok=True
+                except Exception:
+                    pass
+            done = done and ok
+        return done
+    elif t=='choice':
+        r = pg.get_by_role('radio', name=re.compile(rf'^{re.escape(str(val))}$', re.I))
+        if await r.count()>0:
+            try:
+                await r.first.scroll_into_view_if_needed()
+                await r.first.check()
+                return True
             except Exception:
-                # If page or browser closed externally, exit gracefully
                 pass
-        await c.close(); await b.close()
+    elif t=='checkbox':
+        vals=val if isinstance(val, list) else [str(val)]
+        done=True
+        for o in vals:
+            cb = pg.get_by_role('checkbox', name=re.compile(rf'^{re.escape(o)}$', re.I))
+            ok=False
+            if await cb.count()>0:
+                try:
+                    await cb.first.scroll_into_view_if_needed()
+                    await cb.first.check()
+                    ok=True
+                except Exception:
+                    pass
+            done = done and ok
+        return done
+    return False
+
+async def fill_fields(pg, config, batch=False):
+    """Fill every field of `config` on `pg`.
+
+    With `batch=True` the whole config is applied in one `page.evaluate`; only the
+    fields the batch could not set go through the per-locator path.
+    Returns per-field outcomes: {'entry_id','type','ok','via','reason'}.
+    """
+    fields = config.get('fields',[])
+    outcomes = [None]*len(fields)
+    if batch:
+        idx=[]; specs=[]
+        for i,f in enumerate(fields):
+            s=_batch_spec(f)
+            if s is not None:
+                idx.append(i); specs.append(s)
+        with span('batch', fields=len(specs)):
+            res = await pg.evaluate(_BATCH_FILL_JS, specs) if specs else []
+        for i,r in zip(idx, res):
+            if r.get('ok'):
+                outcomes[i]={'entry_id':fields[i].get('entry_id'),'type':fields[i].get('type'),'ok':True,'via':'batch','reason':''}
+            else:
+                outcomes[i]={'reason':r.get('reason','')}
+    resolver=None
+    if any(f.get('type') in ('choice','checkbox') and not (outcomes[i] and outcomes[i].get('ok')) for i,f in enumerate(fields)):
+        # Scopes remaining choice/checkbox options to their question (containers cached per page)
+        resolver = ChoiceResolver(pg)
+    for i,f in enumerate(fields):
+        if outcomes[i] and outcomes[i].get('ok'):
+            continue
+        reason=(outcomes[i] or {}).get('reason','')
+        with span('field', entry_id=f.get('entry_id'), type=f.get('type')) as sp:
+            ok=await _fill_one(pg, f, resolver)
+            sp['ok']=ok
+        outcomes[i]={'entry_id':f.get('entry_id'),'type':f.get('type'),'ok':ok,'via':'locator','reason':'' if ok else (reason or 'not_found')}
+    return outcomes
+
+_NEXT_BUTTON = re.compile(r'^\s*(next|weiter|suivant|siguiente|avanti|próximo|volgende)\s*$', re.I)
+
+def group_sections(fields):
+    """[(section, [fields])] in section order; fields without a section belong to the first page."""
+    groups = {}
+    for f in fields:
+        groups.setdefault(f.get('section') or 0, []).append(f)
+    return sorted(groups.items())
+
+async def _next_section(pg, upcoming):
+    """Click "Next" and wait until a field of the upcoming section is in the DOM."""
+    btn = pg.get_by_role('button', name=_NEXT_BUTTON)
+    if await btn.count() == 0:
+        return False
+    await btn.first.click()
+    names = [f'[name="entry.{f["entry_id"]}"], [name="entry.{f["entry_id"]}_year"], [name="entry.{f["entry_id"]}_hour"]'
+             for f in upcoming if f.get('entry_id')]
+    if names:
+        await pg.wait_for_selector(', '.join(names), state='attached')
+    else:
+        await pg.wait_for_load_state('domcontentloaded')
+    return True
+
+async def fill_form_sections(pg, config, batch=False):
+    """Fill a (possibly multi-section) form in one pass: fill a section, press Next, repeat.
+
+    Returns (outcomes in config order, per-section report [{section, fields, ok, fill_ms, nav_ms}]).
+    Never submits: the last section is filled and left as is.
+    """
+    fields = config.get('fields', [])
+    groups = group_sections(fields)
+    by_field = {}
+    report = []
+    for k, (sec, group) in enumerate(groups):
+        t = time.perf_counter()
+        with span('section', section=sec, fields=len(group)):
+            outs = await fill_fields(pg, {'fields': group}, batch=batch)
+        rep = {'section': sec, 'fields': len(group), 'ok': sum(1 for o in outs if o['ok']),
+               'fill_ms': round((time.perf_counter()-t)*1000, 1), 'nav_ms': None}
+        for f, o in zip(group, outs):
+            by_field[id(f)] = o
+        report.append(rep)
+        if k + 1 < len(groups):
+            t = time.perf_counter()
+            with span('next', section=sec) as sp:
+                try:
+                    moved = await _next_section(pg, groups[k+1][1])
+                except Exception:
+                    moved = False
+                sp['moved'] = moved
+            rep['nav_ms'] = round((time.perf_counter()-t)*1000, 1)
+            if not moved:
+                # Usually a required field in this section was left empty
+                for sec2, rest in groups[k+1:]:
+                    for f in rest:
+                        by_field[id(f)] = {'entry_id': f.get('entry_id'), 'type': f.get('type'), 'ok': False,
+                                           'via': 'locator', 'reason': 'section_unreachable'}
+                    report.append({'section': sec2, 'fields': len(rest), 'ok': 0, 'fill_ms': None, 'nav_ms': None})
+                break
+    return [by_field[id(f)] for f in fields], report
+
+def print_section_report(report):
+    if len(report) > 1:
+        for r in report:
+            print(f"   § section {r['section']}: {r['ok']}/{r['fields']} fields"
+                  f" | fill {r['fill_ms']} ms | next {r['nav_ms']} ms")
+
+async def prefill_page(pg, config, default_timeout_ms=10000, batch=False):
+    """Navigate an already-open page to the form and fill every section (no submit). Returns field outcomes."""
+    pg.set_default_timeout(default_timeout_ms)
+    with span('goto', url=config['form_url']):
+        await pg.goto(config['form_url'], wait_until='domcontentloaded')
+    with span('fill'):
+        outcomes, report = await fill_form_sections(pg, config, batch=batch)
+    print_section_report(report)
+    return outcomes
+
+async def hold_open(pg):
+    """Keep the page open until the user closes it or hits Ctrl+C."""
+    try:
+        while True:
+            await pg.wait_for_timeout(60000)
+    except KeyboardInterrupt:
+        pass
+    except Exception:
+        # If page or browser closed externally, exit gracefully
+        pass
+
+async def prefill_form(config, headless=False, keep_open=True, fast=False, default_timeout_ms=10000, batch=False,
+                       cache_dir=None, har=None, har_mode='replay', trace_dir=None):
+    """With `trace_dir`, a Playwright trace is kept there if any field fails (or the fill raises)."""
+    async with async_playwright() as p:
+        b = c = None
+        try:
+            with span('launch'):
+                b = await p.chromium.launch(headless=headless)
+                c = await b.new_context()
+
+                # Optional fast mode (block heavy resources), asset cache and HAR record/replay
+                cache = AssetCache(cache_dir) if cache_dir else None
+                await prepare_context(c, fast=fast, cache=cache, har=har, har_mode=har_mode)
+                await pw_trace_start(c, trace_dir)
+
+            pg = await c.new_page()
+            outcomes = None
+            try:
+                outcomes = await prefill_page(pg, config, default_timeout_ms=default_timeout_ms, batch=batch)
+            finally:
+                path = await pw_trace_stop(c, trace_dir, outcomes is None or not all(o['ok'] for o in outcomes))
+                if path:
+                    print(f'🧵 Playwright trace saved: {path}')
+            n_ok = sum(1 for o in outcomes if o['ok'])
+            if cache is not None:
+                print(f'🗄️  Asset cache: {cache.hits} hits, {cache.misses} misses')
+            print(f'✅ Prefill done ({n_ok}/{len(outcomes)} fields set).' + (' Browser left open. (No submit).' if keep_open else ''))
+            if keep_open:
+                await hold_open(pg)
+        finally:
+            # Also on a failed launch, navigation or fill, so batch runs do not leak Chromium
+            for x in (c, b):
+                if x is not None:
+                    try:
+                        await x.close()
+                    except Exception:
+                        pass
@@ -0,0 +1,192 @@
+import os, time, asyncio
+from contextlib import asynccontextmanager
+from playwright.async_api import async_playwright
+from rpa.browser_filler import prepare_context, prefill_page
+from rpa.asset_cache import AssetCache
+from rpa.tracing import span, pw_trace_start, pw_trace_stop
+
+try:
+    # psutil is optional; without it the RSS recycling threshold is ignored
+    import psutil
+    HAVE_PSUTIL = True
+except Exception:
+    HAVE_PSUTIL = False
+
+
+def _children_rss_mb():
+    """RSS of every process spawned by this interpreter (driver + Chromium), in MB."""
+    if not HAVE_PSUTIL:
+        return None
+    try:
+        me = psutil.Process(os.getpid())
+        total = 0
+        for ch in me.children(recursive=True):
+            try:
+                total += ch.memory_info().rss
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                pass
+        return total / (1024*1024)
+    except Exception:
+        return None
+
+
+class BrowserPool:
+    """Keeps one Chromium warm and hands out fresh, isolated contexts/pages.
+
+    - `concurrency` bounds how many contexts are open at once.
+    - The browser is recycled after `max_uses` contexts, or once the RSS of the
+      browser processes exceeds `max_rss_mb` (requires psutil). Contexts still
+      running on the old browser finish before it is closed.
+    - With `trace_dir`, each prefill records a Playwright trace, kept only if it fails.
+    """
+
+    def __init__(self, headless=True, concurrency=4, max_uses=50, max_rss_mb=None,
+                 fast=False, default_timeout_ms=10000, batch=False, cache_dir=None, launch_kwargs=None,
+                 trace_dir=None):
+        self.headless = headless
+        self.concurrency = max(1, int(concurrency))
+        self.max_uses = max_uses
+        self.max_rss_mb = max_rss_mb
+        self.fast = fast
+        self.default_timeout_ms = default_timeout_ms
+        self.batch = batch
+        # One cache shared by every context; writes are atomic renames
+        self.cache = AssetCache(cache_dir) if cache_dir else None
+        self.launch_kwargs = launch_kwargs or {}
+        self.trace_dir = trace_dir
+        self._pw = None
+        self._browser = None
+        self._uses = 0
+        self._active = {}   # browser -> open context count
+        self._retired = set()
+        self._sem = asyncio.Semaphore(self.concurrency)
+        self._lock = asyncio.Lock()
+        self.launches = 0
+        if max_rss_mb and not HAVE_PSUTIL:
+            print('⚠️  psutil not installed; max_rss_mb recycling disabled.')
+
+    async def start(self):
+        if self._pw is None:
+            self._pw = await async_playwright().start()
+        if self._browser is None:
+            await self._launch()
+        return self
+
+    async def close(self):
+        for b in set(self._active) | ({self._browser} if self._browser else set()):
+            try:
+                await b.close()
+            except Exception:
+                pass
+        self._active.clear(); self._retired.clear(); self._browser = None
+        if self._pw is not None:
+            await self._pw.stop()
+            self._pw = None
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def _launch(self):
+        with span('launch'):
+            self._browser = await self._pw.chromium.launch(headless=self.headless, **self.launch_kwargs)
+        self._active[self._browser] = 0
+        self._uses = 0
+        self.launches += 1
+
+    def _needs_recycle(self):
+        if self.max_uses and self._uses >= self.max_uses:
+            return True
+        if self.max_rss_mb:
+            rss = _children_rss_mb()
+            if rss is not None and rss > self.max_rss_mb:
+                return True
+        return False
+
+    async def _acquire_browser(self):
+        async with self._lock:
+            if self._pw is None:
+                await self.start()
+            if self._browser is None or not self._browser.is_connected():
+                await self._launch()
+            elif self._needs_recycle():
+                old = self._browser
+                self._retired.add(old)
+                await self._launch()
+                await self._close_if_idle(old)
+            self._uses += 1
+            self._active[self._browser] += 1
+            return self._browser
+
+    async def _close_if_idle(self, b):
+        if b in self._retired and self._active.get(b, 0) == 0:
+            self._retired.discard(b); self._active.pop(b, None)
+            try:
+                await b.close()
+            except Exception:
+                pass
+
+    async def _release(self, b):
+        async with self._lock:
+            if b in self._active:
+                self._active[b] -= 1
+            await self._close_if_idle(b)
+
+    @asynccontextmanager
+    async def context(self, **context_kwargs):
+        """Yield a fresh BrowserContext on the warm browser (bounded by `concurrency`)."""
+        async with self._sem:
+            b = await self._acquire_browser()
+            c = None
+            try:
+                c = await b.new_context(**context_kwargs)
+                await prepare_context(c, fast=self.fast, cache=self.cache)
+                yield c
+            finally:
+                if c is not None:
+                    try:
+                        await c.close()
+                    except Exception:
+                        pass
+                await self._release(b)
+
+    @asynccontextmanager
+    async def page(self, **context_kwargs):
+        """Yield a new page in its own fresh context."""
+        async with self.context(**context_kwargs) as c:
+            pg = await c.new_page()
+            pg.set_default_timeout(self.default_timeout_ms)
+            yield pg
+
+    async def prefill(self, config):
+        """Prefill one config (dict or FormConfig) in a fresh page. Returns a result dict."""
+        cfg = config.model_dump() if hasattr(config, 'model_dump') else config
+        t0 = time.perf_counter()
+        res = {'form_url': cfg.get('form_url'), 'ok': False, 'error': None}
+        try:
+            async with self.page() as pg:
+                await pw_trace_start(pg.context, self.trace_dir)
+                try:
+                    res['fields'] = await prefill_page(pg, cfg, default_timeout_ms=self.default_timeout_ms, batch=self.batch)
+                finally:
+                    fields = res.get('fields')
+                    res['trace'] = await pw_trace_stop(pg.context, self.trace_dir,
+                                                       fields is None or not all(o['ok'] for o in fields))
+            res['ok'] = True
+        except Exception as e:
+            res['error'] = f'{type(e).__name__}: {e}'
+        res['ms'] = round((time.perf_counter()-t0)*1000, 1)
+        return res
+
+    async def prefill_many(self, configs):
+        """Prefill a list of configs concurrently; results are returned in input order."""
+        await self.start()
+        return await asyncio.gather(*(self.prefill(c) for c in configs))
+
+
+async def prefill_many(configs, headless=True, concurrency=4, **pool_kwargs):
+    """One-shot helper: start a pool, prefill every config, shut the pool down."""
+    async with BrowserPool(headless=headless, concurrency=concurrency, **pool_kwargs) as pool:
+        return await pool.prefill_many(configs)
@@ -1,28 +1,121 @@
-import os, json, re, requests
+import os, json, re
 from typing import Any, Dict, List
-from bs4 import BeautifulSoup
-import google.generativeai as genai
-from dotenv import load_dotenv
 
-# Load env early so main and library use same env context
-load_dotenv()
+# Heavy SDKs (requests, BeautifulSoup/lxml, google.generativeai) are imported on
+# the code paths that need them, so importing this module stays cheap.
+MODEL_DEFAULT = 'models/gemini-2.5-flash'
+_genai_mod = None
+_env_loaded = False
 
-# Prefer GEMINI_API_KEY, fall back to GOOGLE_API_KEY. Do not assert here –
-# allow offline fallback if key missing or network blocked.
-api = os.environ.get('GEMINI_API_KEY') or os.environ.get('GOOGLE_API_KEY')
-MODEL = os.environ.get('GEMINI_MODEL', 'models/gemini-2.5-flash')
+def _api_key():
+    # Prefer GEMINI_API_KEY, fall back to GOOGLE_API_KEY. Do not assert here –
+    # allow offline fallback if key missing or network blocked.
+    global _env_loaded
+    if not _env_loaded:
+        from dotenv import load_dotenv
+        load_dotenv(); _env_loaded = True
+    return os.environ.get('GEMINI_API_KEY') or os.environ.get('GOOGLE_API_KEY')
 
-if api:
-    try:
-        genai.configure(api_key=api)
-    except Exception:
-        # Do not block program start; we'll handle at call time
-        pass
+def _model_name():
+    return os.environ.get('GEMINI_MODEL', MODEL_DEFAULT)
+
+def _genai():
+    """Import and configure google.generativeai once, on first use."""
+    global _genai_mod
+    if _genai_mod is None:
+        import google.generativeai as genai
+        api = _api_key()
+        if api:
+            try:
+                genai.configure(api_key=api)
+            except Exception:
+                # Do not block; the call itself will fail and fall back
+                pass
+        _genai_mod = genai
+    return _genai_mod
 
 def fetch_form_html(u):
+    import requests
     r=requests.get(u,timeout=30); r.raise_for_status(); return r.text
 
+def _parse_fb_public_load_data(html):
+    """Fields from the embedded FB_PUBLIC_LOAD_DATA_ blob, with their section index."""
+    fb={}
+    try:
+        m = re.search(r'FB_PUBLIC_LOAD_DATA_\s*=\s*(\[)', html)
+        if m:
+            start = m.end()-1
+            count = 0; end = None
+            for i in range(start, len(html)):
+                ch = html[i]
+                if ch == '[':
+                    count += 1
+                elif ch == ']':
+                    count -= 1
+                    if count == 0:
+                        end = i+1; break
+            if end:
+                jtxt = html[start:end]
+                data = json.loads(jtxt)
+                # Questions array typically at data[1][1]
+                questions = []
+                if isinstance(data, list) and len(data) > 1 and isinstance(data[1], list) and len(data[1]) > 1:
+                    questions = data[1][1] or []
+                section = 0
+                for q in questions:
+                    # Type 8 items are section headers / page breaks
+                    if isinstance(q, list) and len(q) > 3 and q[3] == 8:
+                        section += 1
+                        continue
+                    # q format varies; guard heavily
+                    if not isinstance(q, list) or len(q) < 5:
+                        continue
+                    qid = str(q[0]) if q and isinstance(q[0], (int,str)) else None
+                    label = ''
+                    if len(q) > 1 and isinstance(q[1], str):
+                        label = q[1]
+                    qtype = q[3] if len(q) > 3 else 0
+                    # Map types
+                    tmap = {0:'text',1:'paragraph',2:'choice',3:'checkbox',4:'dropdown',9:'date',10:'time'}
+                    ftype = tmap.get(qtype, 'text')
+                    # entry id lives inside q[4][0][0]
+                    eid = None
+                    try:
+                        if isinstance(q[4], list) and len(q[4])>0 and isinstance(q[4][0], list) and len(q[4][0])>0:
+                            if isinstance(q[4][0][0], (int,str)):
+                                eid = str(q[4][0][0])
+                    except Exception:
+                        eid = None
+                    if not eid:
+                        # skip if we cannot address the input
+                        continue
+                    # Attempt to extract options for selectable types (best-effort)
+                    options = []
+                    if ftype in ('choice','checkbox','dropdown'):
+                        # Some forms store option labels under q[4][0][1] as list of [label, ...]
+                        try:
+                            opts = q[4][0][1] or []
+                            for opt in opts:
+                                if isinstance(opt, list) and opt:
+                                    txt = opt[0]
+                                    if isinstance(txt, str) and txt.strip():
+                                        options.append(txt.strip())
+                        except Exception:
+                            pass
+                    fb[eid] = {
+                        'entry_id': eid,
+                        'type': ftype,
+                        'options': set(options),
+                        'question_label': (label or '')[:200],
+                        'section': section
+                    }
+    except Exception as e:
+        # Silent fallback; return whatever we have (likely empty)
+        print(f"⚠️  Failed to parse FB_PUBLIC_LOAD_DATA_: {e}")
+    return fb
+
 def summarize_form_fields(html):
+    from bs4 import BeautifulSoup
     s=BeautifulSoup(html,'lxml')
     fields={}
     # 1) Try direct DOM inputs first
@@ -56,77 +149,21 @@ def summarize_form_fields(html):
             lab=rep.find_parent().get_text(' ', strip=True)
             fields[eid]['question_label']=lab[:200]
 
+    # 2) FB_PUBLIC_LOAD_DATA_ covers every section (page) of the form, while the
+    # DOM only holds the first one: use it as the fallback and for later sections
+    fb=_parse_fb_public_load_data(html)
     if not fields:
-        # 2) Fallback: parse embedded FB_PUBLIC_LOAD_DATA_ for Google Forms
-        try:
-            m = re.search(r'FB_PUBLIC_LOAD_DATA_\s*=\s*(\[)', html)
-            if m:
-                start = m.end()-1
-                count = 0; end = None
-                for i in range(start, len(html)):
-                    ch = html[i]
-                    if ch == '[':
-                        count += 1
-                    elif ch == ']':
-                        count -= 1
-                        if count == 0:
-                            end = i+1; break
-                if end:
-                    jtxt = html[start:end]
-                    data = json.loads(jtxt)
-                    # Questions array typically at data[1][1]
-                    questions = []
-                    if isinstance(data, list) and len(data) > 1 and isinstance(data[1], list) and len(data[1]) > 1:
-                        questions = data[1][1] or []
-                    for q in questions:
-                        # q format varies; guard heavily
-                        if not isinstance(q, list) or len(q) < 5:
-                            continue
-                        qid = str(q[0]) if q and isinstance(q[0], (int,str)) else None
-                        label = ''
-                        if len(q) > 1 and isinstance(q[1], str):
-                            label = q[1]
-                        qtype = q[3] if len(q) > 3 else 0
-                        # Map types
-                        tmap = {0:'text',1:'paragraph',2:'choice',3:'checkbox',4:'dropdown',9:'date',10:'time'}
-                        ftype = tmap.get(qtype, 'text')
-                        # entry id lives inside q[4][0][0]
-                        eid = None
-                        try:
-                            if isinstance(q[4], list) and len(q[4])>0 and isinstance(q[4][0], list) and len(q[4][0])>0:
-                                if isinstance(q[4][0][0], (int,str)):
-                                    eid = str(q[4][0][0])
-                        except Exception:
-                            eid = None
-                        if not eid:
-                            # skip if we cannot address the input
-                            continue
-                        # Attempt to extract options for selectable types (best-effort)
-                        options = []
-                        if ftype in ('choice','checkbox','dropdown'):
-                            # Some forms store option labels under q[4][0][1] as list of [label, ...]
-                            try:
-                                opts = q[4][0][1] or []
-                                for opt in opts:
-                                    if isinstance(opt, list) and opt:
-                                        txt = opt[0]
-                                        if isinstance(txt, str) and txt.strip():
-                                            options.append(txt.strip())
-                            except Exception:
-                                pass
-                        fields[eid] = {
-                            'entry_id': eid,
-                            'type': ftype,
-                            'options': set(options),
-                            'question_label': (label or '')[:200]
-                        }
-        except Exception as e:
-            # Silent fallback; return whatever we have (likely empty)
-            print(f"⚠️  Failed to parse FB_PUBLIC_LOAD_DATA_: {e}")
+        fields=fb
+    else:
+        for eid,f in fb.items():
+            if eid in fields:
+                fields[eid]['section']=f['section']
+            else:
+                fields[eid]=f
 
     out=[]
     for eid,f in fields.items():
-        out.append({'entry_id':eid,'question_label':f.get('question_label',''),'type':f['type'],'options':sorted(list(f['options']))})
+        out.append({'entry_id':eid,'question_label':f.get('question_label',''),'type':f['type'],'options':sorted(list(f['options'])),'section':f.get('section',0)})
     return out
 
 def _extract_json_text(txt: str) -> str:
@@ -249,11 +286,12 @@ def _fallback_config(url: str, summary: List[Dict[str, Any]], basic: Dict[str, A
             'type': ftype,
             'value': val,
             'option_hints': options or None,
+            'section': f.get('section'),
         })
     return {'form_url': url, 'fields': fields}
 
 
-def call_gemini(url, summary, basic, prompt_path):
+def build_mapping_prompt(url, summary, basic, prompt_path, errors=None):
     base_guidance = (
         open(prompt_path,'r',encoding='utf-8').read()
         if os.path.exists(prompt_path) else ''
@@ -281,37 +319,52 @@ def call_gemini(url, summary, basic, prompt_path):
         "        \"entry_id\": string,\n"
         "        \"question_label\": string,\n"
         "        \"type\": string,\n"
-        "        \"value\": string | [string],\n"
+        "        \"value\": [string],   // exactly one item unless type is 'checkbox'\n"
         "        \"option_hints\": [string] | null\n"
         "    } ]\n"
         "}\n"
         "Do not add explanations. Return JSON only.\n"
     )
-    full_prompt = (
+    prompt = (
         instruction + "\n" + base_guidance + "\n\n" +
         "FORM_URL\n" + url + "\n\n" +
         "FIELD_SPEC (JSON)\n" + json.dumps(field_spec, indent=2) + "\n\n" +
         "BASIC_INFO (JSON)\n" + json.dumps(basic, indent=2)
     )
+    if errors:
+        # Targeted re-ask: tell the model what was wrong with its previous answer
+        prompt += "\n\nPREVIOUS_ERRORS (fix these fields)\n" + json.dumps(errors, indent=2)
+    return prompt
 
-    # If API key is missing, skip online call and use fallback
-    if not api:
-        print('⚠️  GEMINI_API_KEY not set. Using heuristic fallback mapping.')
-        return _fallback_config(url, summary, basic)
+def mapping_schema():
+    """Response schema bound to rpa.types.FieldConfig for Gemini structured output.
 
-    try:
-        model = genai.GenerativeModel(MODEL)
-        resp = model.generate_content([
-            {
-                'role': 'user',
-                'parts': [ {'text': full_prompt} ]
-            }
-        ])
-    except Exception as e:
-        # Network issues, auth issues, etc.
-        print(f"⚠️  Gemini call failed ({type(e).__name__}): {e}. Using fallback mapping.")
-        return _fallback_config(url, summary, basic)
+    Gemini schemas have no unions, so `value` is always a list of strings; it is
+    collapsed back to a single string for non-checkbox fields during validation.
+    """
+    from typing import get_args
+    from rpa.types import FieldType
+    strings = {'type': 'ARRAY', 'items': {'type': 'STRING'}}
+    return {
+        'type': 'OBJECT',
+        'properties': {'fields': {'type': 'ARRAY', 'items': {
+            'type': 'OBJECT',
+            'properties': {
+                'entry_id': {'type': 'STRING'},
+                'question_label': {'type': 'STRING'},
+                'type': {'type': 'STRING', 'enum': list(get_args(FieldType))},
+                'value': strings,
+                'option_hints': dict(strings, nullable=True),
+            },
+            'required': ['entry_id', 'type', 'value'],
+        }}},
+        'required': ['fields'],
+    }
 
+def generation_config():
+    return {'response_mime_type': 'application/json', 'response_schema': mapping_schema()}
+
+def _response_text(resp):
     # Collect text best-effort
     txt = getattr(resp, 'text', None)
     if not txt:
@@ -327,23 +380,139 @@ def call_gemini(url, summary, basic, prompt_path):
             txt = '\n'.join(parts)
         except Exception:
             txt = ''
+    return txt
 
-    # Try to extract and parse JSON
+def parse_response_json(resp):
+    """Return the {'fields': [...]} object from a model response, or None."""
+    txt = _response_text(resp)
     try:
-        jtxt = _extract_json_text(txt)
-        data = json.loads(jtxt)
-        # Validate expected schema: dict with a list 'fields'
+        # Structured output is plain JSON; the extractor still copes with fences/prose
+        data = json.loads(_extract_json_text(txt))
         if isinstance(data, dict) and isinstance(data.get('fields'), list):
             return data
-        else:
-            print("⚠️  Gemini returned unexpected schema (no 'fields' list). Using fallback mapping.")
-            return _fallback_config(url, summary, basic)
-    except Exception as e:
-        # Provide a short preview for debugging, then fallback
+        print("⚠️  Gemini returned unexpected schema (no 'fields' list).")
+    except Exception:
+        # Provide a short preview for debugging
         preview = (txt or '').strip().replace('\n',' ')[:240]
         print(f"⚠️  Gemini returned non-JSON or empty output. Preview: '{preview}'")
+    return None
+
+def _validate_one(raw: Dict[str, Any], spec: Dict[str, Any]):
+    """Validate one mapped field against its FIELD_SPEC entry -> (field, None) or (None, reason)."""
+    from rpa.types import FieldConfig
+    t = spec.get('type','text'); opts = spec.get('options') or []
+    v = raw.get('value')
+    if t == 'checkbox':
+        v = v if isinstance(v, list) else ([v] if v not in (None, '') else [])
+    elif isinstance(v, list):
+        v = v[0] if v else ''
+    if v is None:
+        return None, 'missing value'
+    canon = {str(o).strip().lower(): o for o in opts}
+    if t in ('choice','dropdown') and opts:
+        if str(v).strip().lower() not in canon:
+            return None, f'{v!r} is not one of the options {opts}'
+        v = canon[str(v).strip().lower()]
+    elif t == 'checkbox' and opts:
+        bad = [o for o in v if str(o).strip().lower() not in canon]
+        if bad:
+            return None, f'{bad!r} not among the options {opts}'
+        v = [canon[str(o).strip().lower()] for o in v]
+    elif t == 'date' and not re.match(r"^\d{4}-\d{2}-\d{2}$", str(v)):
+        return None, f'{v!r} is not YYYY-MM-DD'
+    elif t == 'time' and not re.match(r"^\d{2}:\d{2}$", str(v)):
+        return None, f'{v!r} is not HH:MM'
+    try:
+        fc = FieldConfig.model_validate({
+            'entry_id': spec.get('entry_id'),
+            'question_label': spec.get('question_label') or raw.get('question_label') or '',
+            'type': t,
+            'value': v if t == 'checkbox' else str(v),
+            'option_hints': opts or None,
+            'section': spec.get('section'),
+        })
+    except Exception as e:
+        return None, f'schema: {e}'
+    return fc.model_dump(), None
+
+def validate_fields(data: Dict[str, Any], summary: List[Dict[str, Any]]):
+    """Per-field validation. Returns (good {entry_id: field}, bad [(spec, reason)])."""
+    by_id = {}
+    for f in (data or {}).get('fields', []) or []:
+        if isinstance(f, dict) and f.get('entry_id') is not None:
+            by_id.setdefault(str(f['entry_id']), f)
+    good, bad = {}, []
+    for spec in summary:
+        raw = by_id.get(str(spec.get('entry_id')))
+        if raw is None:
+            bad.append((spec, 'missing from response')); continue
+        fld, err = _validate_one(raw, spec)
+        if err:
+            bad.append((spec, err))
+        else:
+            good[spec['entry_id']] = fld
+    return good, bad
+
+def complete_config(url, summary, good, basic):
+    """Assemble the final config in form order; any field still missing gets the heuristic value."""
+    missing = [s for s in summary if s.get('entry_id') not in good]
+    guessed = {f['entry_id']: f for f in _fallback_config(url, missing, basic)['fields']} if missing else {}
+    if missing:
+        print(f"➡️  Heuristic fill for {len(missing)} field(s): " + ', '.join(str(s.get('entry_id')) for s in missing))
+    return {'form_url': url, 'fields': [good.get(s.get('entry_id')) or guessed[s.get('entry_id')] for s in summary]}
+
+def parse_mapping_response(resp, url, summary, basic, reask=None):
+    """Validate a mapping response field by field.
+
+    Invalid or missing fields are re-asked once through `reask(specs, errors)`
+    (which returns a new response or None); anything still invalid is filled
+    heuristically instead of discarding the whole form.
+    """
+    data = parse_response_json(resp)
+    if data is None:
         print('➡️  Falling back to heuristic mapping based on parsed fields.')
         return _fallback_config(url, summary, basic)
+    good, bad = validate_fields(data, summary)
+    if bad and reask is not None:
+        specs = [s for s, _ in bad]
+        print(f"🔁 Re-asking for {len(specs)} invalid field(s).")
+        resp2 = reask(specs, {str(s.get('entry_id')): r for s, r in bad})
+        good2, bad = validate_fields(parse_response_json(resp2) if resp2 is not None else None, specs)
+        good.update(good2)
+    return complete_config(url, summary, good, basic)
+
+def call_gemini(url, summary, basic, prompt_path):
+    full_prompt = build_mapping_prompt(url, summary, basic, prompt_path)
+
+    # If API key is missing, skip online call and use fallback
+    if not _api_key():
+        print('⚠️  GEMINI_API_KEY not set. Using heuristic fallback mapping.')
+        return _fallback_config(url, summary, basic)
+
+    def ask(prompt):
+        return model.generate_content([
+            {
+                'role': 'user',
+                'parts': [ {'text': prompt} ]
+            }
+        ])
+
+    try:
+        model = _genai().GenerativeModel(_model_name(), generation_config=generation_config())
+        resp = ask(full_prompt)
+    except Exception as e:
+        # Network issues, auth issues, etc.
+        print(f"⚠️  Gemini call failed ({type(e).__name__}): {e}. Using fallback mapping.")
+        return _fallback_config(url, summary, basic)
+
+    def reask(specs, errors):
+        try:
+            return ask(build_mapping_prompt(url, specs, basic, prompt_path, errors=errors))
+        except Exception as e:
+            print(f"⚠️  Re-ask failed ({type(e).__name__}): {e}")
+            return None
+
+    return parse_mapping_response(resp, url, summary, basic, reask=reask)
 
 def build_config_from_gemini(url, basic, system_prompt_path='prompts/mapping_prompt.md'):
     html = fetch_form_html(url)
@@ -352,3 +521,43 @@ def build_config_from_gemini(url, basic, system_prompt_path='prompts/mapping_pro
     # Ensure form_url present
     cfg['form_url'] = url
     return cfg
+
+def _same_field(saved: Dict[str, Any], cur: Dict[str, Any]) -> bool:
+    return (
+        saved.get('type') == cur.get('type')
+        and (saved.get('question_label') or '') == (cur.get('question_label') or '')
+        and sorted(saved.get('option_hints') or []) == sorted(cur.get('options') or [])
+    )
+
+def diff_summary(summary: List[Dict[str, Any]], saved: Dict[str, Any]):
+    """Split the current form summary against a saved config.
+
+    Returns (reused, changed): saved fields (by entry_id) whose type, label and
+    options are unchanged, and the summary entries that are new or changed.
+    Saved fields no longer on the form are dropped.
+    """
+    saved_by_id = {f.get('entry_id'): f for f in (saved or {}).get('fields', []) if f.get('entry_id')}
+    reused, changed = {}, []
+    for cur in summary:
+        prev = saved_by_id.get(cur.get('entry_id'))
+        if prev is not None and _same_field(prev, cur):
+            reused[cur['entry_id']] = dict(prev, section=cur.get('section', prev.get('section')))
+        else:
+            changed.append(cur)
+    return reused, changed
+
+def build_config_incremental(url, basic, saved, system_prompt_path='prompts/mapping_prompt.md'):
+    """Re-map only new/changed fields against a saved config, reusing the rest."""
+    html = fetch_form_html(url)
+    summ = summarize_form_fields(html)
+    reused, changed = diff_summary(summ, saved)
+    mapped = {}
+    if changed:
+        cfg = call_gemini(url, changed, basic, system_prompt_path)
+        mapped = {f.get('entry_id'): f for f in cfg.get('fields', []) if isinstance(f, dict)}
+        missing = [c for c in changed if c['entry_id'] not in mapped]
+        if missing:
+            mapped.update({f['entry_id']: f for f in _fallback_config(url, missing, basic)['fields']})
+    print(f'♻️  Re-map: reused {len(reused)} field(s), mapped {len(changed)} new/changed field(s).')
+    fields = [reused.get(s['entry_id']) or mapped[s['entry_id']] for s in summ]
+    return {'form_url': url, 'fields': fields}
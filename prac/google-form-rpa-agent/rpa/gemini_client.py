@@ -0,0 +1,225 @@
+"""Async Gemini mapping client for batch load.
+
+- token-bucket rate limiter (requests/minute with a burst),
+- bounded concurrency,
+- retry with full-jitter exponential backoff on retryable errors only,
+- circuit breaker: while the backend is unhealthy (open), requests go straight to
+  the heuristic mapper; after `reset_timeout_s` one trial call is let through
+  (half-open) and a success closes the breaker again.
+
+`metrics()` returns counters for every state so batch reports can show them.
+"""
+import math, time, random, asyncio
+from rpa.form_parser_gemini import (
+    _api_key, _genai, _model_name, _fallback_config, generation_config,
+    build_mapping_prompt, parse_response_json, validate_fields, complete_config,
+)
+
+# Transient server / quota / transport errors (google.api_core + stdlib names)
+RETRYABLE = {
+    'ResourceExhausted', 'TooManyRequests', 'ServiceUnavailable', 'DeadlineExceeded',
+    'InternalServerError', 'GatewayTimeout', 'BadGateway', 'Aborted', 'Unknown',
+    'TimeoutError', 'ConnectionError', 'ConnectionResetError', 'RetryError',
+}
+
+
+def is_retryable(e):
+    return any(k.__name__ in RETRYABLE for k in type(e).__mro__)
+
+
+def percentile(values, q):
+    """Nearest-rank percentile (None if empty): the ceil(q*n)-th smallest value."""
+    if not values:
+        return None
+    values = sorted(values)
+    # round() first so 0.29 * 100 does not become rank 29.000000000000004 -> 30
+    return values[max(0, math.ceil(round(q * len(values), 9)) - 1)]
+
+
+class TokenBucket:
+    def __init__(self, rate_per_s, capacity):
+        self.rate = float(rate_per_s)
+        self.capacity = float(capacity)
+        self.tokens = float(capacity)
+        self.ts = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        """Take one token, sleeping until one is available. Returns seconds waited."""
+        waited = 0.0
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.ts) * self.rate)
+                self.ts = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+                d = (1 - self.tokens) / self.rate
+                waited += d
+                await asyncio.sleep(d)
+
+
+class CircuitBreaker:
+    CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+
+    def __init__(self, failure_threshold=5, reset_timeout_s=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout_s = reset_timeout_s
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._trial = False
+        self.transitions = {self.CLOSED: 0, self.OPEN: 0, self.HALF_OPEN: 0}
+
+    def _to(self, st):
+        if st != self.state:
+            self.state = st
+            self.transitions[st] += 1
+
+    def allow(self):
+        if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout_s:
+            self._to(self.HALF_OPEN)
+            self._trial = False
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.HALF_OPEN and not self._trial:
+            self._trial = True   # exactly one probe while half-open
+            return True
+        return False
+
+    def abandon(self):
+        """The half-open probe ended without an answer (cancelled): let the next call probe."""
+        self._trial = False
+
+    def success(self):
+        self.failures = 0
+        self._trial = False
+        self._to(self.CLOSED)
+
+    def failure(self):
+        self.failures += 1
+        self._trial = False
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+            self._to(self.OPEN)
+
+
+class MappingClient:
+    def __init__(self, rpm=60, burst=5, concurrency=4, max_retries=4, base_delay_s=0.5,
+                 max_delay_s=8.0, timeout_s=60.0, failure_threshold=5, reset_timeout_s=30.0):
+        self.bucket = TokenBucket(rpm / 60.0, burst)
+        self.sem = asyncio.Semaphore(max(1, concurrency))
+        self.max_retries = max_retries
+        self.base_delay_s = base_delay_s
+        self.max_delay_s = max_delay_s
+        self.timeout_s = timeout_s
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout_s)
+        self.counts = {'requests': 0, 'calls': 0, 'success': 0, 'retries': 0, 'retryable_errors': 0,
+                       'fatal_errors': 0, 'fallback_no_key': 0, 'fallback_breaker_open': 0,
+                       'fallback_error': 0, 'fallback_parse': 0, 'reasks': 0, 'heuristic_fields': 0,
+                       'rate_limited_ms': 0.0, 'in_flight': 0}
+        self.latencies_ms = []
+
+    def metrics(self):
+        lat = self.latencies_ms
+        return dict(self.counts, rate_limited_ms=round(self.counts['rate_limited_ms'], 1),
+                    breaker={'state': self.breaker.state, 'consecutive_failures': self.breaker.failures,
+                             'transitions': dict(self.breaker.transitions)},
+                    latency_ms={'p50': percentile(lat, 0.5), 'p95': percentile(lat, 0.95), 'n': len(lat)})
+
+    def _backoff(self, attempt):
+        # Full jitter: uniform(0, min(cap, base * 2^attempt))
+        return random.uniform(0, min(self.max_delay_s, self.base_delay_s * (2 ** attempt)))
+
+    async def _generate(self, prompt):
+        model = _genai().GenerativeModel(_model_name(), generation_config=generation_config())
+        return await asyncio.wait_for(
+            model.generate_content_async([{'role': 'user', 'parts': [{'text': prompt}]}]),
+            timeout=self.timeout_s)
+
+    async def map(self, url, summary, basic, prompt_path='prompts/mapping_prompt.md'):
+        """Async equivalent of form_parser_gemini.call_gemini."""
+        self.counts['requests'] += 1
+        if not _api_key():
+            self.counts['fallback_no_key'] += 1
+            return _fallback_config(url, summary, basic)
+        if not self.breaker.allow():
+            self.counts['fallback_breaker_open'] += 1
+            return _fallback_config(url, summary, basic)
+        probe = self.breaker.state == CircuitBreaker.HALF_OPEN
+        try:
+            return await self._call(url, summary, basic, prompt_path)
+        except BaseException:
+            # Cancelled (e.g. a per-form wait_for) or crashed before success()/failure():
+            # without this the breaker would stay half-open with its one probe taken
+            if probe:
+                self.breaker.abandon()
+            raise
+
+    async def _call(self, url, summary, basic, prompt_path):
+        prompt = build_mapping_prompt(url, summary, basic, prompt_path)
+        async with self.sem:
+            self.counts['in_flight'] += 1
+            try:
+                for attempt in range(self.max_retries + 1):
+                    self.counts['rate_limited_ms'] += 1000 * await self.bucket.acquire()
+                    t0 = time.perf_counter()
+                    self.counts['calls'] += 1
+                    try:
+                        resp = await self._generate(prompt)
+                    except Exception as e:
+                        if not is_retryable(e):
+                            # Auth / bad request: the backend answered, so it is not a health problem
+                            self.breaker.success()
+                            self.counts['fatal_errors'] += 1
+                            self.counts['fallback_error'] += 1
+                            print(f"⚠️  Gemini call failed ({type(e).__name__}): {e}. Using fallback mapping.")
+                            return _fallback_config(url, summary, basic)
+                        self.counts['retryable_errors'] += 1
+                        if attempt == self.max_retries:
+                            self.breaker.failure()
+                            self.counts['fallback_error'] += 1
+                            print(f"⚠️  Gemini unavailable after {attempt+1} attempts ({type(e).__name__}). Using fallback mapping.")
+                            return _fallback_config(url, summary, basic)
+                        self.counts['retries'] += 1
+                        await asyncio.sleep(self._backoff(attempt))
+                        continue
+                    self.latencies_ms.append(round((time.perf_counter()-t0)*1000, 1))
+                    self.breaker.success()
+                    self.counts['success'] += 1
+                    return await self._finish(resp, url, summary, basic, prompt_path)
+            finally:
+                self.counts['in_flight'] -= 1
+
+    async def _finish(self, resp, url, summary, basic, prompt_path):
+        """Per-field validation with one targeted re-ask; leftovers get heuristic values."""
+        data = parse_response_json(resp)
+        if data is None:
+            self.counts['fallback_parse'] += 1
+            return _fallback_config(url, summary, basic)
+        good, bad = validate_fields(data, summary)
+        if bad:
+            self.counts['reasks'] += 1
+            specs = [sp for sp, _ in bad]
+            errors = {str(sp.get('entry_id')): r for sp, r in bad}
+            try:
+                self.counts['rate_limited_ms'] += 1000 * await self.bucket.acquire()
+                self.counts['calls'] += 1
+                resp2 = await self._generate(build_mapping_prompt(url, specs, basic, prompt_path, errors=errors))
+                good2, bad = validate_fields(parse_response_json(resp2), specs)
+                good.update(good2)
+            except Exception as e:
+                print(f"⚠️  Re-ask failed ({type(e).__name__}): {e}")
+        self.counts['heuristic_fields'] += len(bad)
+        return complete_config(url, summary, good, basic)
+
+
+async def build_config_async(url, basic, client, system_prompt_path='prompts/mapping_prompt.md'):
+    """Async build_config_from_gemini: fetch/parse in a thread, map through `client`."""
+    from rpa.form_parser_gemini import fetch_form_html, summarize_form_fields
+    html = await asyncio.to_thread(fetch_form_html, url)
+    summ = await asyncio.to_thread(summarize_form_fields, html)
+    cfg = await client.map(url, summ, basic, system_prompt_path)
+    cfg['form_url'] = url
+    return cfg
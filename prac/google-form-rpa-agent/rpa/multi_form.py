@@ -0,0 +1,94 @@
+"""Multi-form mode: many forms per process, each in its own context of one shared Chromium.
+
+Manifest is a JSON list (or JSONL) of entries:
+
+    {"form": "<form url>", "basic": "profiles/ada.json" | {...}, "out": "configs/ada.json",
+     "config": "configs/saved.json", "timeout_s": 90}
+
+`basic` is the profile (path or inline object). With `config` the saved FormConfig
+is used as-is and no fetch/LLM happens. `out` and `timeout_s` are optional.
+"""
+import os, json, time, asyncio
+from rpa.types import FormConfig
+from rpa.browser_pool import BrowserPool
+from rpa.gemini_client import MappingClient, build_config_async
+from rpa.tracing import span, set_track
+
+
+def load_manifest(path):
+    txt = open(path, 'r', encoding='utf-8').read()
+    try:
+        data = json.loads(txt)
+    except json.JSONDecodeError:
+        data = [json.loads(l) for l in txt.splitlines() if l.strip()]
+    if isinstance(data, dict):
+        data = data.get('forms', [])
+    if not isinstance(data, list) or not all(isinstance(e, dict) for e in data):
+        raise ValueError('manifest must be a list of objects')
+    return data
+
+
+def _load_obj(v):
+    return json.load(open(v, 'r', encoding='utf-8')) if isinstance(v, str) else (v or {})
+
+
+async def _build_config(e, i, client, prompt_path, out_dir):
+    if e.get('config'):
+        return FormConfig.model_validate(_load_obj(e['config']))
+    cfg = await build_config_async(e['form'], _load_obj(e.get('basic')), client, prompt_path)
+    fc = FormConfig.model_validate(cfg)
+    out = e.get('out') or os.path.join(out_dir, f'config_{i}.json')
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    open(out, 'w', encoding='utf-8').write(json.dumps(fc.model_dump(), indent=2))
+    return fc
+
+
+async def _run_one(pool, client, sem, e, i, timeout_s, prompt_path, out_dir):
+    res = {'index': i, 'form': e.get('form') or e.get('config'), 'ok': False, 'error': None,
+           'map_ms': None, 'fill_ms': None, 'fields_ok': 0, 'fields_total': 0}
+    t0 = time.perf_counter()
+
+    async def job():
+        t = time.perf_counter()
+        with span('map'):
+            fc = await _build_config(e, i, client, prompt_path, out_dir)
+        res['map_ms'] = round((time.perf_counter()-t)*1000, 1)
+        with span('prefill'):
+            r = await pool.prefill(fc)
+        res['fill_ms'] = r['ms']
+        res['fields_total'] = len(r.get('fields') or [])
+        res['fields_ok'] = sum(1 for o in (r.get('fields') or []) if o['ok'])
+        res['ok'] = r['ok']; res['error'] = r['error']
+
+    set_track(i + 1, f'form {i}')
+    async with sem:
+        try:
+            with span('form', cat='form', index=i, form=res['form']):
+                await asyncio.wait_for(job(), timeout=e.get('timeout_s', timeout_s))
+        except asyncio.TimeoutError:
+            res['error'] = f"timeout after {e.get('timeout_s', timeout_s)}s"
+        except Exception as ex:
+            res['error'] = f'{type(ex).__name__}: {ex}'
+    res['ms'] = round((time.perf_counter()-t0)*1000, 1)
+    print(('✅' if res['ok'] else '❌') + f" [{i}] {res['form']} ({res['ms']} ms)" + (f" – {res['error']}" if res['error'] else ''))
+    return res
+
+
+async def run_manifest(entries, parallel=4, timeout_s=120, prompt_path='prompts/mapping_prompt.md',
+                       out_dir='configs', client=None, **pool_kwargs):
+    """Map + prefill every manifest entry with bounded parallelism. Returns the aggregate report."""
+    t0 = time.perf_counter()
+    sem = asyncio.Semaphore(max(1, parallel))
+    client = client or MappingClient(concurrency=parallel)
+    async with BrowserPool(concurrency=parallel, **pool_kwargs) as pool:
+        results = await asyncio.gather(*(
+            _run_one(pool, client, sem, e, i, timeout_s, prompt_path, out_dir) for i, e in enumerate(entries)))
+        launches = pool.launches
+    ok = sum(1 for r in results if r['ok'])
+    return {
+        'total': len(results), 'ok': ok, 'failed': len(results) - ok,
+        'wall_ms': round((time.perf_counter()-t0)*1000, 1),
+        'browser_launches': launches,
+        'mapping': client.metrics(),
+        'results': results,
+    }
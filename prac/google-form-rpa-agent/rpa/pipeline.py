@@ -0,0 +1,106 @@
+"""Overlapped agent pipeline: launch Chromium and open the form while the fetch + LLM mapping run.
+
+The sequential flow pays  map + launch/navigate + fill.  Here the browser phase
+runs concurrently with the mapping phase, so end-to-end is roughly
+max(map, launch/navigate) + fill; the difference is reported as time saved.
+"""
+import json, time, asyncio
+from playwright.async_api import async_playwright
+from rpa.types import FormConfig
+from rpa.asset_cache import AssetCache
+from rpa.browser_filler import prepare_context, fill_form_sections, print_section_report, hold_open
+from rpa.tracing import span, pw_trace_start, pw_trace_stop
+
+
+def _ms(t):
+    return round((time.perf_counter()-t)*1000, 1)
+
+
+async def run_pipeline(form_url, map_fn, out='config.json', headless=False, keep_open=True, fast=False,
+                       default_timeout_ms=10000, batch=False, cache_dir=None, har=None, har_mode='replay',
+                       trace_dir=None):
+    """`map_fn()` is the blocking fetch+mapping step returning a config dict; it runs in a thread.
+
+    Returns timings {'map_ms','browser_ms','fill_ms','total_ms','saved_ms'} and field outcomes.
+    With `trace_dir`, a Playwright trace is kept there if the fill fails or leaves a field unset.
+    """
+    t0 = time.perf_counter()
+    timings = {}
+
+    async def mapping():
+        t = time.perf_counter()
+        with span('map'):
+            cfg = await asyncio.to_thread(map_fn)
+            fc = FormConfig.model_validate(cfg)
+        open(out, 'w', encoding='utf-8').write(json.dumps(fc.model_dump(), indent=2))
+        print('📝 Wrote', out)
+        timings['map_ms'] = _ms(t)
+        return fc
+
+    async with async_playwright() as p:
+        b = c = None
+
+        async def browser():
+            nonlocal b, c
+            t = time.perf_counter()
+            with span('launch'):
+                b = await p.chromium.launch(headless=headless)
+                c = await b.new_context()
+                await prepare_context(c, fast=fast, cache=AssetCache(cache_dir) if cache_dir else None,
+                                      har=har, har_mode=har_mode)
+                await pw_trace_start(c, trace_dir)
+                pg = await c.new_page()
+                pg.set_default_timeout(default_timeout_ms)
+            with span('goto', url=form_url):
+                await pg.goto(form_url, wait_until='domcontentloaded')
+            timings['browser_ms'] = _ms(t)
+            return pg
+
+        map_task = asyncio.create_task(mapping())
+        browser_task = asyncio.create_task(browser())
+        try:
+            try:
+                fc, pg = await asyncio.gather(map_task, browser_task)
+            except BaseException:
+                # A failed browser phase must not lose the mapping: let it finish so
+                # `out` is still written, as in the sequential flow. A failed mapping
+                # (or our own cancellation) makes the browser pointless, so stop it.
+                browser_failed = (browser_task.done() and not browser_task.cancelled()
+                                  and browser_task.exception() is not None)
+                browser_task.cancel()
+                if browser_failed:
+                    await asyncio.gather(map_task, return_exceptions=True)
+                else:
+                    map_task.cancel()
+                await asyncio.gather(map_task, browser_task, return_exceptions=True)
+                raise
+            outcomes = None
+            try:
+                if fc.form_url != form_url:
+                    with span('goto', url=fc.form_url):
+                        await pg.goto(fc.form_url, wait_until='domcontentloaded')
+                t = time.perf_counter()
+                with span('fill'):
+                    outcomes, sections = await fill_form_sections(pg, fc.model_dump(), batch=batch)
+                timings['fill_ms'] = _ms(t)
+            finally:
+                path = await pw_trace_stop(c, trace_dir, outcomes is None or not all(o['ok'] for o in outcomes))
+                if path:
+                    print(f'🧵 Playwright trace saved: {path}')
+            print_section_report(sections)
+            timings['total_ms'] = _ms(t0)
+            timings['saved_ms'] = round(timings['map_ms'] + timings['browser_ms'] + timings['fill_ms'] - timings['total_ms'], 1)
+            n_ok = sum(1 for o in outcomes if o['ok'])
+            print(f"⏱️  map {timings['map_ms']} ms | launch+navigate {timings['browser_ms']} ms | fill {timings['fill_ms']} ms"
+                  f" | end-to-end {timings['total_ms']} ms (saved ~{timings['saved_ms']} ms vs sequential)")
+            print(f'✅ Prefill done ({n_ok}/{len(outcomes)} fields set).' + (' Browser left open. (No submit).' if keep_open else ''))
+            if keep_open:
+                await hold_open(pg)
+            return {'timings': timings, 'fields': outcomes, 'sections': sections}
+        finally:
+            for x in (c, b):
+                if x is not None:
+                    try:
+                        await x.close()
+                    except Exception:
+                        pass
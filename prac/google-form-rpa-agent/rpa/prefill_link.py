@@ -0,0 +1,111 @@
+"""FormConfig -> prefilled Google Forms link (`viewform?usp=pp_url&entry.X=...`), no browser.
+
+    python -m rpa.prefill_link --config config.json
+    python -m rpa.prefill_link --in configs.jsonl --out links.jsonl   # '-' = stdin/stdout
+
+Each JSONL input line is a FormConfig object (extra keys such as "id" are echoed
+back); each output line is {"form_url", "url", "length", "ok", "error", ...}.
+"""
+import argparse, json, re, sys
+from urllib.parse import urlsplit, urlunsplit, urlencode
+
+# Conservative default: links must survive mail clients, chat apps and older browsers
+MAX_URL_LEN = 2048
+
+
+class PrefillLinkError(ValueError):
+    pass
+
+
+def viewform_base(form_url):
+    """Normalize any form URL (…/viewform?usp=dialog, …/edit, …/formResponse) to …/viewform."""
+    sp = urlsplit(form_url)
+    path = re.sub(r'/(viewform|formResponse|edit)/?$', '', sp.path.rstrip('/')) + '/viewform'
+    return urlunsplit((sp.scheme or 'https', sp.netloc, path, '', ''))
+
+
+def prefill_params(config):
+    """Query parameters for every field that has a value, in config order."""
+    out = [('usp', 'pp_url')]
+    for f in config.get('fields', []):
+        t = f.get('type'); eid = f.get('entry_id'); val = f.get('value')
+        if not eid or val in (None, '', []):
+            continue
+        key = f'entry.{eid}'
+        if t == 'checkbox':
+            # One repeated parameter per ticked option
+            for o in (val if isinstance(val, list) else [val]):
+                if o not in (None, ''):
+                    out.append((key, str(o)))
+        elif t == 'date':
+            m = re.match(r"(\d{4})-(\d{2})-(\d{2})$", str(val))
+            if not m:
+                raise PrefillLinkError(f'entry {eid}: date must be YYYY-MM-DD, got {val!r}')
+            y, mo, d = m.groups()
+            out += [(key + '_year', y), (key + '_month', str(int(mo))), (key + '_day', str(int(d)))]
+        elif t == 'time':
+            m = re.match(r"(\d{2}):(\d{2})$", str(val))
+            if not m:
+                raise PrefillLinkError(f'entry {eid}: time must be HH:MM, got {val!r}')
+            hh, mm = m.groups()
+            out += [(key + '_hour', str(int(hh))), (key + '_minute', f'{int(mm):02d}')]
+        else:
+            # text / paragraph / choice / dropdown
+            out.append((key, str(val[0] if isinstance(val, list) and val else val)))
+    return out
+
+
+def prefill_url(config, max_len=MAX_URL_LEN):
+    """Build the prefilled link for one config. Raises PrefillLinkError if it exceeds `max_len`."""
+    url = viewform_base(config['form_url']) + '?' + urlencode(prefill_params(config))
+    if max_len and len(url) > max_len:
+        raise PrefillLinkError(f'prefilled URL is {len(url)} chars (limit {max_len})')
+    return url
+
+
+def iter_links(lines, max_len=MAX_URL_LEN):
+    """Stream JSONL config lines -> result dicts; bad lines become ok=False rows."""
+    for n, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line:
+            continue
+        row = {'line': n, 'form_url': None, 'url': None, 'length': 0, 'ok': False, 'error': None}
+        try:
+            cfg = json.loads(line)
+            row['form_url'] = cfg.get('form_url')
+            if 'id' in cfg:
+                row['id'] = cfg['id']
+            url = prefill_url(cfg, max_len=max_len)
+            row.update(url=url, length=len(url), ok=True)
+        except Exception as e:
+            row['error'] = f'{type(e).__name__}: {e}'
+        yield row
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description='Generate prefilled Google Forms links without a browser')
+    p.add_argument('--config', help='Single FormConfig JSON file; prints its link')
+    p.add_argument('--in', dest='inp', default='-', help='JSONL of FormConfigs (default: stdin)')
+    p.add_argument('--out', default='-', help='JSONL results (default: stdout)')
+    p.add_argument('--max-len', type=int, default=MAX_URL_LEN, help='Reject links longer than this (0 = no limit)')
+    a = p.parse_args(argv)
+
+    if a.config:
+        print(prefill_url(json.load(open(a.config, 'r', encoding='utf-8')), max_len=a.max_len))
+        return 0
+    src = sys.stdin if a.inp == '-' else open(a.inp, 'r', encoding='utf-8')
+    dst = sys.stdout if a.out == '-' else open(a.out, 'w', encoding='utf-8')
+    n = bad = 0
+    try:
+        for row in iter_links(src, max_len=a.max_len):
+            dst.write(json.dumps(row, ensure_ascii=False) + '\n')
+            n += 1; bad += 0 if row['ok'] else 1
+    finally:
+        if src is not sys.stdin: src.close()
+        if dst is not sys.stdout: dst.close()
+    print(f'🔗 {n - bad}/{n} links generated', file=sys.stderr)
+    return 1 if bad else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
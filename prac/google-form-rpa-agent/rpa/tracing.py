@@ -0,0 +1,104 @@
+"""Per-step spans exported as Chrome trace-event JSON (Perfetto / chrome://tracing).
+
+`span('fill')` is a no-op until `enable(path)` installs a tracer. Each concurrent
+form gets its own track via `set_track()`; spans are "complete" events, so nested
+steps (form > section > field) stack in the viewer. Playwright tracing is separate
+and heavier: `pw_trace_start`/`pw_trace_stop` keep the zip only for failed runs.
+"""
+import os, json, time, atexit, itertools, threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+_track = ContextVar('rpa_track', default=None)
+_tracer = None
+_n = itertools.count(1)
+
+
+class Tracer:
+    def __init__(self, path, process_name='rpa'):
+        self.path = path
+        self.pid = os.getpid()
+        self.t0 = time.perf_counter()
+        self.lock = threading.Lock()
+        self.events = [{'ph': 'M', 'name': 'process_name', 'pid': self.pid, 'tid': 0, 'args': {'name': process_name}}]
+        atexit.register(self.save)
+
+    def tid(self):
+        t = _track.get()
+        return t if t is not None else threading.get_ident()
+
+    def add(self, name, start, end, cat='step', args=None):
+        ev = {'ph': 'X', 'name': name, 'cat': cat, 'pid': self.pid, 'tid': self.tid(),
+              'ts': round((start-self.t0)*1e6, 1), 'dur': round((end-start)*1e6, 1)}
+        if args:
+            ev['args'] = args
+        with self.lock:
+            self.events.append(ev)
+
+    def meta(self, tid, name):
+        with self.lock:
+            self.events.append({'ph': 'M', 'name': 'thread_name', 'pid': self.pid, 'tid': tid, 'args': {'name': name}})
+
+    def save(self):
+        with self.lock:
+            data = {'traceEvents': list(self.events), 'displayTimeUnit': 'ms'}
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp = f'{self.path}.{os.getpid()}.tmp'
+        open(tmp, 'w', encoding='utf-8').write(json.dumps(data, default=str))
+        os.replace(tmp, self.path)
+
+
+def enable(path):
+    """Install a tracer writing to `path` (saved at exit and by save())."""
+    global _tracer
+    _tracer = Tracer(path)
+    return _tracer
+
+
+def save():
+    if _tracer is not None:
+        _tracer.save()
+        return _tracer.path
+
+
+def set_track(tid, name=None):
+    """Put this task's spans on track `tid` (one per concurrent form)."""
+    _track.set(tid)
+    if _tracer is not None and name:
+        _tracer.meta(tid, name)
+
+
+@contextmanager
+def span(name, cat='step', **args):
+    """Time the block; yields the args dict so the block can attach results."""
+    tr = _tracer
+    if tr is None:
+        yield args
+        return
+    t = time.perf_counter()
+    try:
+        yield args
+    except BaseException as e:
+        args['error'] = f'{type(e).__name__}: {e}'[:300]
+        raise
+    finally:
+        tr.add(name, t, time.perf_counter(), cat, args)
+
+
+async def pw_trace_start(c, trace_dir):
+    """Start Playwright tracing on context `c` when a failure trace dir is set."""
+    if trace_dir:
+        await c.tracing.start(screenshots=True, snapshots=True)
+
+
+async def pw_trace_stop(c, trace_dir, failed, tag='form'):
+    """Stop tracing; the zip is written only if the run failed. Returns its path or None."""
+    if not trace_dir:
+        return None
+    if not failed:
+        await c.tracing.stop()
+        return None
+    os.makedirs(trace_dir, exist_ok=True)
+    path = os.path.join(trace_dir, f"{time.strftime('%Y%m%d-%H%M%S')}_{os.getpid()}_{next(_n)}_{tag}.zip")
+    await c.tracing.stop(path=path)
+    return path
@@ -7,6 +7,7 @@ class FieldConfig(BaseModel):
     type: FieldType
     value: Union[str, List[str]]
     option_hints: Optional[List[str]]=None
+    section: Optional[int]=None
 class FormConfig(BaseModel):
     form_url: str
     fields: List[FieldConfig]
@@ -0,0 +1,8 @@
+from rpa.a11y_resolver import _exact
+
+
+def test_exact_name_ignores_case_spacing_and_required_marker():
+    r = _exact('Do you agree? *')
+    assert r.match('do you  agree?') and r.match('Do you agree? *')
+    assert not r.match('Do you agree?!') and not r.match('Why do you agree?')
+    assert _exact('Yes').match('YES') and not _exact('Yes').match('Yes, later')
@@ -0,0 +1,104 @@
+import asyncio, time
+import pytest
+import rpa.gemini_client as gc
+from rpa.gemini_client import CircuitBreaker, MappingClient, TokenBucket, is_retryable, percentile
+
+
+def _half_open(client):
+    b = client.breaker
+    b.state, b.opened_at = CircuitBreaker.OPEN, time.monotonic() - b.reset_timeout_s - 1
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(gc, '_api_key', lambda: 'test-key')
+    monkeypatch.setattr(gc, 'build_mapping_prompt', lambda *a, **k: 'prompt')
+    monkeypatch.setattr(gc, '_fallback_config', lambda url, summary, basic: {'fallback': True})
+    return MappingClient(rpm=6000, burst=10, max_retries=0, reset_timeout_s=30.0)
+
+
+def test_breaker_opens_then_probes_once_and_closes():
+    b = CircuitBreaker(failure_threshold=2, reset_timeout_s=0.0)
+    b.failure(); assert b.state == b.CLOSED
+    b.failure(); assert b.state == b.OPEN
+    assert b.allow() and b.state == b.HALF_OPEN
+    assert not b.allow()            # only one probe while half-open
+    b.success()
+    assert b.state == b.CLOSED and b.allow()
+
+
+def test_failed_probe_reopens():
+    b = CircuitBreaker(failure_threshold=5, reset_timeout_s=0.0)
+    b.state = b.OPEN
+    assert b.allow()
+    b.failure()
+    assert b.state == b.OPEN
+
+
+def test_cancelled_probe_frees_half_open_slot(client):
+    async def hang(prompt):
+        await asyncio.sleep(60)
+    client._generate = hang
+    _half_open(client)
+
+    async def go():
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(client.map('u', [], {}), 0.05)
+    asyncio.run(go())
+
+    assert client.breaker.state == CircuitBreaker.HALF_OPEN
+    assert client.breaker.allow()   # the next call gets to probe instead of falling back forever
+
+
+def test_cancelled_probe_then_healthy_backend_closes(client, monkeypatch):
+    calls = []
+
+    async def gen(prompt):
+        calls.append(prompt)
+        if len(calls) == 1:
+            await asyncio.sleep(60)
+        return 'resp'
+
+    async def finish(resp, *a):
+        return {'mapped': resp}
+    client._generate, client._finish = gen, finish
+    _half_open(client)
+
+    async def go():
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(client.map('u', [], {}), 0.05)
+        return await client.map('u', [], {})
+    assert asyncio.run(go()) == {'mapped': 'resp'}
+    assert client.breaker.state == CircuitBreaker.CLOSED
+
+
+def test_open_breaker_falls_back_without_calling(client):
+    client.breaker.state, client.breaker.opened_at = CircuitBreaker.OPEN, time.monotonic()
+    assert asyncio.run(client.map('u', [], {})) == {'fallback': True}
+    assert client.counts['fallback_breaker_open'] == 1 and client.counts['calls'] == 0
+
+
+def test_token_bucket_burst_then_rate():
+    async def go():
+        b = TokenBucket(rate_per_s=50, capacity=3)
+        waits = [await b.acquire() for _ in range(5)]
+        return waits
+    waits = asyncio.run(go())
+    assert waits[:3] == [0.0, 0.0, 0.0]          # the burst is free
+    assert all(0 < w <= 0.05 for w in waits[3:])  # then one token per 1/rate s
+
+
+def test_is_retryable_by_class_name():
+    class ServiceUnavailable(Exception):
+        pass
+    assert is_retryable(ServiceUnavailable()) and is_retryable(TimeoutError())
+    assert not is_retryable(ValueError('bad request'))
+
+
+def test_metrics_latency_is_nearest_rank():
+    assert percentile([], 0.5) is None
+    assert percentile([20.0, 10.0], 0.5) == 10.0
+    assert [percentile(list(range(1, 101)), q) for q in (0.29, 0.5, 0.95)] == [29, 50, 95]
+    c = MappingClient()
+    c.latencies_ms = [30.0, 10.0, 20.0, 40.0]
+    assert c.metrics()['latency_ms'] == {'p50': 20.0, 'p95': 40.0, 'n': 4}
@@ -0,0 +1,44 @@
+from urllib.parse import parse_qsl, urlsplit
+import pytest
+from rpa.prefill_link import PrefillLinkError, iter_links, prefill_params, prefill_url, viewform_base
+
+FORM = 'https://docs.google.com/forms/d/e/abc/viewform?usp=dialog'
+
+
+def test_viewform_base_normalizes_variants():
+    for u in (FORM, 'https://docs.google.com/forms/d/e/abc/formResponse', 'https://docs.google.com/forms/d/e/abc/edit/'):
+        assert viewform_base(u) == 'https://docs.google.com/forms/d/e/abc/viewform'
+
+
+def test_params_per_type():
+    cfg = {'form_url': FORM, 'fields': [
+        {'entry_id': '1', 'type': 'text', 'value': 'Ada Lovelace'},
+        {'entry_id': '2', 'type': 'checkbox', 'value': ['A', 'B']},
+        {'entry_id': '3', 'type': 'date', 'value': '2025-01-05'},
+        {'entry_id': '4', 'type': 'time', 'value': '09:05'},
+        {'entry_id': '5', 'type': 'dropdown', 'value': ['Only']},
+        {'entry_id': '6', 'type': 'text', 'value': ''},       # empty: skipped
+        {'type': 'text', 'value': 'no entry id'},              # no entry: skipped
+    ]}
+    assert prefill_params(cfg) == [
+        ('usp', 'pp_url'), ('entry.1', 'Ada Lovelace'), ('entry.2', 'A'), ('entry.2', 'B'),
+        ('entry.3_year', '2025'), ('entry.3_month', '1'), ('entry.3_day', '5'),
+        ('entry.4_hour', '9'), ('entry.4_minute', '05'), ('entry.5', 'Only'),
+    ]
+    q = dict(parse_qsl(urlsplit(prefill_url(cfg)).query))
+    assert q['entry.1'] == 'Ada Lovelace' and q['usp'] == 'pp_url'
+
+
+def test_bad_date_and_length_limit():
+    with pytest.raises(PrefillLinkError):
+        prefill_params({'fields': [{'entry_id': '1', 'type': 'date', 'value': '05/01/2025'}]})
+    cfg = {'form_url': FORM, 'fields': [{'entry_id': '1', 'type': 'text', 'value': 'x' * 3000}]}
+    with pytest.raises(PrefillLinkError):
+        prefill_url(cfg)
+    assert prefill_url(cfg, max_len=0)
+
+
+def test_iter_links_reports_bad_lines():
+    rows = list(iter_links(['{"form_url": "%s", "id": 7, "fields": []}' % FORM, '', 'not json']))
+    assert [r['ok'] for r in rows] == [True, False]
+    assert rows[0]['id'] == 7 and rows[1]['line'] == 3
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""Per-field latency: label-map resolution vs the old per-field XPath probes.
+
+Renders a synthetic Airtable-like form (labels followed by their controls) with
+page.set_content, then fills every field both ways and prints per-field timings.
+
+    python bench/field_latency.py --fields 40 --rounds 3
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from playwright.async_api import async_playwright
+
+from form_filler.engine import STRATEGIES, fill_value
+from form_filler.labelmap import label_map_async
+from form_filler.runlog import percentile
+from form_filler.selector_cache import set_cache
+
+
+def build_html(n: int) -> str:
+    rows = []
+    for i in range(n):
+        if i % 5 == 4:
+            rows.append(f'<div class="cell"><label>Agree {i}<input type="checkbox"></label></div>')
+        elif i % 5 == 3:
+            rows.append(f'<div class="cell"><label>Notes {i}</label><div><textarea></textarea></div></div>')
+        else:
+            rows.append(f'<div class="cell"><label>Field {i}</label><div><div><input type="text"></div></div></div>')
+    return "<form>" + "".join(rows) + "<button type='submit'>Submit</button></form>"
+
+
+def fields(n: int):
+    for i in range(n):
+        if i % 5 == 4:
+            yield f"Agree {i}", "checkbox", True
+        elif i % 5 == 3:
+            yield f"Notes {i}", "long_text", f"notes {i}"
+        else:
+            yield f"Field {i}", "text", f"value {i}"
+
+
+async def probe_text_field(page, label: str, value: str) -> None:
+    """The pre-label-map path: uncached XPath probes in default order."""
+    for _, find in STRATEGIES["text"][1:]:
+        try:
+            field = await find(page, label)
+        except Exception:
+            continue
+        if field is not None:
+            await field.fill(value)
+            return
+    raise RuntimeError(f"Could not find text field for label: {label}")
+
+
+async def run(page, n: int, mode: str):
+    await page.set_content(build_html(n))
+    times = []
+    t0 = time.perf_counter()
+    if mode == "map":
+        await label_map_async(page, refresh=True)
+    build_ms = (time.perf_counter() - t0) * 1000
+    for label, kind, value in fields(n):
+        t = time.perf_counter()
+        if mode == "probe" and kind != "checkbox":
+            await probe_text_field(page, label, value)
+        elif mode == "probe":
+            await page.get_by_label(label).check()
+        else:
+            await fill_value(page, kind, label, value)
+        times.append((time.perf_counter() - t) * 1000)
+    return build_ms, times
+
+
+async def bench(args):
+    # Measure resolution itself, not whatever output/selector_cache.json holds
+    set_cache(None)
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=args.headless)
+        page = await browser.new_page()
+        for mode in ("probe", "map"):
+            samples, builds = [], []
+            for _ in range(args.rounds):
+                build_ms, times = await run(page, args.fields, mode)
+                builds.append(build_ms)
+                samples.extend(times)
+            total = sum(samples) / args.rounds + statistics.mean(builds)
+            print(f"{mode:>5}: per-field p50 {percentile(samples, 0.5):.2f} ms | "
+                  f"p90 {percentile(samples, 0.9):.2f} ms | "
+                  f"map build {statistics.mean(builds):.2f} ms | "
+                  f"form total {total:.1f} ms ({args.fields} fields)")
+        await browser.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark per-field resolution latency")
+    parser.add_argument("--fields", type=int, default=40)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--headless", type=lambda x: x.lower() in ("true", "1", "yes", "on"), default=True)
+    args = parser.parse_args()
+
+    asyncio.run(bench(args))
+
+
+if __name__ == "__main__":
+    main()
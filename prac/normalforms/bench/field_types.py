@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""Per-field-type latency and whole-record throughput against the local fixture form.
+
+Starts bench/fixture_server.py on a free port, so it runs offline and gives the
+same numbers on every machine state that matters for review:
+
+  1. fill_value latency per field type (label map built once per load),
+     plus submit + success detection, over --rounds fresh form loads
+  2. records/second through the async engine (run_records) for each --concurrency
+     and fill mode (all-UI and prefill URL), checked against the submissions the
+     server actually received
+
+    python bench/field_types.py --rounds 5 --records 20 --concurrency 1 4
+    python bench/field_types.py --json output/bench.json                  # save results
+    python bench/field_types.py --baseline output/bench.json --tolerance 0.25   # exit 1 on regression
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from playwright.async_api import async_playwright
+
+from fixture_server import running
+from form_filler.capture import CapturePolicy
+from form_filler.engine import fill_value, run_records, snapshot_baseline, submit, wait_for_success
+from form_filler.labelmap import label_map_async
+from form_filler.runlog import percentile
+from form_filler.selector_cache import set_cache
+
+
+def make_record(files: List[str]) -> List[Dict[str, Any]]:
+    """One value for every field of the fixture form."""
+    return [
+        {"label": "First Name", "type": "text", "value": "Ada"},
+        {"label": "Notes", "type": "long_text", "value": "Benchmark record\nsecond line"},
+        {"label": "Email", "type": "email", "value": "ada@example.com"},
+        {"label": "Age", "type": "number", "value": "36"},
+        {"label": "Start date", "type": "date", "value": "2025-01-15"},
+        {"label": "Agree to terms", "type": "checkbox", "value": True},
+        {"label": "Favorite color", "type": "single_select", "value": "Rock 'n' roll"},
+        {"label": "Interests", "type": "multi_select", "value": ["Music", "Science"]},
+        {"label": "Resume", "type": "attachment", "value": files},
+    ]
+
+
+def fixture_config(url: str) -> Dict[str, Any]:
+    return {"page": {"url": url, "idle_spinner": None, "success_selector": "text=/thank you/i",
+                     "success_url_contains": ""}, "submit_selector": None}
+
+
+def _stats(samples: List[float]) -> Dict[str, float]:
+    return {"p50": round(percentile(samples, 0.5), 2), "p90": round(percentile(samples, 0.9), 2), "n": len(samples)}
+
+
+async def bench_fields(url: str, record, rounds: int, headless: bool) -> Dict[str, Dict[str, float]]:
+    """fill_value latency per field type; "submit" and "confirm" cover the end of the record."""
+    config = fixture_config(url)
+    samples: Dict[str, List[float]] = {}
+    # Time the full strategy list, not whatever output/selector_cache.json holds
+    set_cache(None)
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=headless)
+        page = await browser.new_page()
+        for _ in range(rounds):
+            await page.goto(url, wait_until="domcontentloaded")
+            t = time.perf_counter()
+            await label_map_async(page, refresh=True)
+            samples.setdefault("label_map", []).append((time.perf_counter() - t) * 1000)
+            for field in record:
+                t = time.perf_counter()
+                await fill_value(page, field["type"], field["label"], field["value"])
+                samples.setdefault(field["type"], []).append((time.perf_counter() - t) * 1000)
+            baseline = await snapshot_baseline(page, config)
+            t = time.perf_counter()
+            await submit(page, config)
+            samples.setdefault("submit", []).append((time.perf_counter() - t) * 1000)
+            samples.setdefault("confirm", []).append((await wait_for_success(page, config, baseline=baseline))["ms"])
+        await browser.close()
+    return {kind: _stats(v) for kind, v in samples.items()}
+
+
+def bench_throughput(server, url: str, record, n: int, concurrency: int, prefill: bool, headless: bool,
+                     log_path: str) -> Dict[str, Any]:
+    """records/second through run_records; `received` is what the server actually got."""
+    with server.lock:
+        server.submissions.clear()
+    t = time.perf_counter()
+    results = asyncio.run(run_records(
+        url, fixture_config(url), [record] * n, concurrency=concurrency, timeout=10000,
+        record_timeout_s=60, headless=headless, log_path=log_path, capture=CapturePolicy(mode="never"),
+        prefill=prefill,
+    ))
+    wall = time.perf_counter() - t
+    ok = sum(1 for r in results if r["status"] == "success")
+    with server.lock:
+        received = len(server.submissions)
+    return {"mode": "prefill" if prefill else "ui", "concurrency": concurrency, "records": n, "ok": ok,
+            "received": received, "wall_s": round(wall, 2), "records_per_s": round(ok / wall, 2)}
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Regressions beyond `tolerance`: slower field p50s and lower throughput."""
+    problems = []
+    for kind, s in current["field_ms"].items():
+        base = baseline.get("field_ms", {}).get(kind)
+        if base and s["p50"] > base["p50"] * (1 + tolerance):
+            problems.append(f"{kind}: p50 {s['p50']} ms vs baseline {base['p50']} ms")
+    base_tp = {(r["mode"], r["concurrency"]): r for r in baseline.get("throughput", [])}
+    for r in current["throughput"]:
+        base = base_tp.get((r["mode"], r["concurrency"]))
+        if base and r["records_per_s"] < base["records_per_s"] * (1 - tolerance):
+            problems.append(f"{r['mode']} x{r['concurrency']}: {r['records_per_s']} rec/s "
+                            f"vs baseline {base['records_per_s']} rec/s")
+        if r["received"] != r["ok"]:
+            problems.append(f"{r['mode']} x{r['concurrency']}: {r['ok']} records reported ok "
+                            f"but the server received {r['received']}")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark field types and throughput on the local fixture form")
+    parser.add_argument("--rounds", type=int, default=5, help="Form loads for the per-field benchmark")
+    parser.add_argument("--records", type=int, default=20, help="Records per throughput run")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4])
+    parser.add_argument("--upload-ms", type=int, default=150, help="Simulated upload time per file")
+    parser.add_argument("--submit-ms", type=int, default=50, help="Simulated submit round-trip")
+    parser.add_argument("--file-kb", type=int, default=256, help="Size of each attachment")
+    parser.add_argument("--json", help="Write results to this file")
+    parser.add_argument("--baseline", help="Compare against a previous --json file; exit 1 on regression")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown vs baseline (0.25 = 25%%)")
+    parser.add_argument("--headless", type=lambda x: x.lower() in ("true", "1", "yes", "on"), default=True)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp, running() as server:
+        files = []
+        for name in ("resume.pdf", "portfolio.png"):
+            path = os.path.join(tmp, name)
+            with open(path, "wb") as f:
+                f.write(os.urandom(args.file_kb * 1024))
+            files.append(path)
+        record = make_record(files)
+        url = f"{server.url}?upload_ms={args.upload_ms}&submit_ms={args.submit_ms}"
+
+        field_ms = asyncio.run(bench_fields(url, record, args.rounds, args.headless))
+        throughput = []
+        for prefill in (False, True):
+            for c in args.concurrency:
+                throughput.append(bench_throughput(server, url, record, args.records, c, prefill,
+                                                   args.headless, os.path.join(tmp, "run_log.jsonl")))
+
+    print(f"\nPer-field latency ({args.rounds} form loads)")
+    for kind, s in field_ms.items():
+        print(f"  {kind:>13}: p50 {s['p50']:8.2f} ms | p90 {s['p90']:8.2f} ms (n={s['n']})")
+    print(f"\nThroughput ({args.records} records per run)")
+    for r in throughput:
+        print(f"  {r['mode']:>7} x{r['concurrency']}: {r['records_per_s']:6.2f} rec/s | "
+              f"{r['ok']}/{r['records']} ok, {r['received']} received | {r['wall_s']} s")
+
+    results = {"field_ms": field_ms, "throughput": throughput,
+               "params": {k: getattr(args, k) for k in ("rounds", "records", "upload_ms", "submit_ms", "file_kb")}}
+    if args.json:
+        os.makedirs(os.path.dirname(os.path.abspath(args.json)), exist_ok=True)
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.json}")
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            problems = compare(results, json.load(f), args.tolerance)
+        if problems:
+            print("\nRegressions vs baseline:\n  " + "\n  ".join(problems))
+            sys.exit(1)
+        print("\nNo regressions vs baseline")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""Local Airtable-like form for offline runs and benchmarks.
+
+Serves bench/fixture/airtable_form.html at /form (prefill_<Field>=value and the
+upload_ms / submit_ms knobs go in the query string) and records every submission:
+
+    GET  /form            the form
+    POST /submit          called by the form; body {"fields": {label: value}}
+    GET  /submissions     JSON list of received submissions
+    POST /reset           forget them
+
+    python bench/fixture_server.py --port 8765
+    python -m form_filler --url http://127.0.0.1:8765/form --data bench/fixture/data.json --config bench/fixture/config.json
+"""
+
+import argparse
+import json
+import threading
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Iterator
+from urllib.parse import urlsplit
+
+
+FORM_HTML = Path(__file__).resolve().parent / "fixture" / "airtable_form.html"
+
+
+class FixtureServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, html: Path = FORM_HTML):
+        super().__init__(address, _Handler)
+        self.html = html.read_bytes()
+        self.submissions = []
+        self.lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/form"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: FixtureServer
+
+    def log_message(self, *args) -> None:
+        pass
+
+    def _send(self, status: int, body: bytes, ctype: str = "application/json") -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", ctype)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self) -> None:
+        path = urlsplit(self.path).path.rstrip("/")
+        if path in ("", "/form"):
+            self._send(200, self.server.html, "text/html; charset=utf-8")
+        elif path == "/submissions":
+            with self.server.lock:
+                self._send(200, json.dumps(self.server.submissions).encode("utf-8"))
+        else:
+            self._send(404, b'{"error": "not found"}')
+
+    def do_POST(self) -> None:
+        path = urlsplit(self.path).path.rstrip("/")
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+        if path == "/submit":
+            try:
+                data = json.loads(body or b"{}")
+            except json.JSONDecodeError:
+                self._send(400, b'{"error": "invalid json"}')
+                return
+            with self.server.lock:
+                self.server.submissions.append(data.get("fields", {}))
+                n = len(self.server.submissions)
+            self._send(200, json.dumps({"ok": True, "n": n}).encode("utf-8"))
+        elif path == "/reset":
+            with self.server.lock:
+                self.server.submissions.clear()
+            self._send(200, b'{"ok": true}')
+        else:
+            self._send(404, b'{"error": "not found"}')
+
+
+@contextmanager
+def running(host: str = "127.0.0.1", port: int = 0) -> Iterator[FixtureServer]:
+    """Serve the fixture on a background thread (port 0 = any free port)."""
+    server = FixtureServer((host, port))
+    thread = threading.Thread(target=server.serve_forever, name="fixture-server", daemon=True)
+    thread.start()
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the local Airtable-like fixture form")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    server = FixtureServer((args.host, args.port))
+    print(f"Fixture form at {server.url} (submissions at /submissions); Ctrl+C to stop")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
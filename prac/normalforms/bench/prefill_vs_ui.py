@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""Prefill-URL fast path vs the all-UI path, measured up to (not including) submit.
+
+Each round opens the form fresh and fills one record both ways; nothing is submitted.
+
+    python bench/prefill_vs_ui.py --url https://airtable.com/.../form --data data.json --rounds 5
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from playwright.async_api import async_playwright
+
+from form_filler.engine import prepare_record, fill_fields
+from form_filler.labelmap import label_map_async
+
+
+async def one(page, url, data, timeout, prefill):
+    t0 = time.perf_counter()
+    prefilled, ui = await prepare_record(page, url, {}, data, timeout, fresh=True, prefill=prefill)
+    await label_map_async(page, refresh=True)
+    t1 = time.perf_counter()
+    await fill_fields(page, ui, timeout)
+    t2 = time.perf_counter()
+    return {"open_ms": (t1 - t0) * 1000, "fill_ms": (t2 - t1) * 1000, "total_ms": (t2 - t0) * 1000,
+            "ui_fields": len(ui), "prefilled": len(prefilled)}
+
+
+async def main_async(args):
+    data = json.load(open(args.data, encoding="utf-8"))
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=args.headless)
+        page = await browser.new_page()
+        rows = {"ui": [], "prefill": []}
+        for _ in range(args.rounds):
+            # Alternate modes so network/cache drift hits both equally
+            for mode in ("ui", "prefill"):
+                rows[mode].append(await one(page, args.url, data, args.timeout, mode == "prefill"))
+        await browser.close()
+
+    for mode, rs in rows.items():
+        med = {k: statistics.median(r[k] for r in rs) for k in ("open_ms", "fill_ms", "total_ms")}
+        print(f"{mode:>8}: open {med['open_ms']:.0f} ms | fill {med['fill_ms']:.0f} ms | "
+              f"total {med['total_ms']:.0f} ms (median of {len(rs)}) | "
+              f"{rs[0]['prefilled']} prefilled, {rs[0]['ui_fields']} via UI")
+    ui_total = statistics.median(r["total_ms"] for r in rows["ui"])
+    pf_total = statistics.median(r["total_ms"] for r in rows["prefill"])
+    print(f"speedup: {ui_total / pf_total:.2f}x ({ui_total - pf_total:.0f} ms saved per record)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark prefill URL vs UI filling")
+    parser.add_argument("--url", required=True, help="Airtable form URL")
+    parser.add_argument("--data", default="data.json")
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--timeout", type=int, default=20000)
+    parser.add_argument("--headless", type=lambda x: x.lower() in ("true", "1", "yes", "on"), default=True)
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,8 @@
 """CLI entry point for the Airtable form filler."""
 
 import argparse
+import asyncio
+import csv
 import json
 import os
 import sys
@@ -8,10 +10,10 @@ from pathlib import Path
 from typing import Dict, Any, List
 
 from dotenv import load_dotenv
-from playwright.sync_api import sync_playwright, TimeoutError as PlaywrightTimeoutError
 
-from .filler import fill_value, submit, wait_for_success
-from .utils import ts, save_log, ensure_output_dir
+from .capture import CapturePolicy, MODES, SCOPES, FORMATS
+from .engine import run_records
+from .prefill import is_airtable
 
 
 def load_json_file(file_path: str) -> Dict[str, Any]:
@@ -27,11 +29,70 @@ def load_json_file(file_path: str) -> Dict[str, Any]:
         sys.exit(1)
 
 
+def validate_fields(data: Any, source: str = "data.json") -> List[Dict[str, Any]]:
+    """Ensure a record is a list of {label, type, value} objects."""
+    if not isinstance(data, list):
+        raise ValueError(f"{source} must contain a list of field objects")
+    for field_data in data:
+        if not isinstance(field_data, dict) or not all(key in field_data for key in ["label", "type", "value"]):
+            raise ValueError(f"Each field in {source} must have 'label', 'type', and 'value' keys")
+    return data
+
+
+def _record_from_mapping(row: Dict[str, Any], template: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Turn a {label: value} row into field objects, taking field types from the template."""
+    types = {f["label"]: f["type"] for f in template}
+    fields = []
+    for label, value in row.items():
+        if label is None or value is None or value == "":
+            continue
+        kind = types.get(label, "text")
+        if kind == "checkbox" and isinstance(value, str):
+            value = value.strip().lower() in ("true", "1", "yes", "y", "x", "on")
+        elif kind in ("multi_select", "attachment") and isinstance(value, str):
+            value = [v.strip() for v in value.split(";") if v.strip()]
+        fields.append({"label": label, "type": kind, "value": value})
+    return fields
+
+
+def load_records(file_path: str, template: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+    """
+    Load many records from a JSONL or CSV file.
+
+    JSONL lines are either a list of field objects (same shape as data.json) or a
+    {label: value} object. CSV headers are field labels. For {label: value} rows the
+    field types come from the template (data.json); unknown labels default to text,
+    and multi_select / attachment values are separated with ';'.
+    """
+    records = []
+    try:
+        if file_path.lower().endswith(".csv"):
+            with open(file_path, newline="", encoding="utf-8") as f:
+                for row in csv.DictReader(f):
+                    records.append(_record_from_mapping(row, template))
+        else:
+            with open(file_path, "r", encoding="utf-8") as f:
+                for n, line in enumerate(f, 1):
+                    if not line.strip():
+                        continue
+                    item = json.loads(line)
+                    if isinstance(item, dict):
+                        item = _record_from_mapping(item, template)
+                    records.append(validate_fields(item, f"{file_path}:{n}"))
+    except FileNotFoundError:
+        print(f"Error: File not found: {file_path}")
+        sys.exit(1)
+    except (json.JSONDecodeError, ValueError) as e:
+        print(f"Error: Invalid record in {file_path}: {e}")
+        sys.exit(1)
+    return records
+
+
 def main():
     """Main CLI entry point."""
     # Load environment variables
     load_dotenv()
-    
+
     parser = argparse.ArgumentParser(
         description="Airtable Form Filler - Automate form submissions using Playwright"
     )
@@ -44,6 +105,11 @@ def main():
         default="data.json",
         help="Path to JSON file containing form data (default: data.json)"
     )
+    parser.add_argument(
+        "--records",
+        help="Batch mode: JSONL or CSV file with one record per line/row; "
+             "--data then only supplies field types for {label: value} rows"
+    )
     parser.add_argument(
         "--config",
         default="config.json",
@@ -61,131 +127,127 @@ def main():
         default=20000,
         help="Timeout in milliseconds (default: 20000)"
     )
-    
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=1,
+        help="Batch mode: number of pages filling records in parallel (default: 1)"
+    )
+    parser.add_argument(
+        "--log",
+        default="output/run_log.jsonl",
+        help="Structured JSONL run log (default: output/run_log.jsonl)"
+    )
+    parser.add_argument(
+        "--prefill",
+        choices=("auto", "on", "off"),
+        default="auto",
+        help="Airtable prefill-URL fast path; auto = on for airtable.com forms (default: auto)"
+    )
+    parser.add_argument(
+        "--schema",
+        default="output/form_schema.json",
+        help="Cached form schema from inspect_form.py; re-inspected when the form changes, "
+             "'' to disable (default: output/form_schema.json)"
+    )
+    parser.add_argument(
+        "--selector-cache",
+        default="output/selector_cache.json",
+        help="Which locator strategy found each field, tried first on later runs; "
+             "'' to disable (default: output/selector_cache.json)"
+    )
+    parser.add_argument(
+        "--capture",
+        choices=MODES,
+        help="When to take screenshots (default: FORM_CAPTURE or on-failure)"
+    )
+    parser.add_argument(
+        "--capture-scope",
+        choices=SCOPES,
+        help="Screenshot the viewport, the full page, or one element (default: viewport)"
+    )
+    parser.add_argument(
+        "--capture-format",
+        choices=FORMATS,
+        help="Screenshot encoding (default: jpeg)"
+    )
+    parser.add_argument(
+        "--capture-quality",
+        type=int,
+        help="JPEG quality 1-100 (default: 70)"
+    )
+    parser.add_argument(
+        "--capture-selector",
+        help="Element captured with --capture-scope element (default: form)"
+    )
+    parser.add_argument(
+        "--trace",
+        default=os.getenv("FORM_TRACE") or None,
+        help="Write per-step spans as Chrome trace-event JSON to this file, viewable in Perfetto "
+             "(default: FORM_TRACE or off)"
+    )
+    parser.add_argument(
+        "--playwright-trace",
+        action="store_true",
+        help="Also record a Playwright trace and keep it (output/*_trace.zip) for failed records only"
+    )
+    parser.add_argument(
+        "--record-timeout",
+        type=float,
+        default=120,
+        help="Wall-clock limit per record in seconds, 0 to disable (default: 120)"
+    )
+
     args = parser.parse_args()
-    
+
     # Load configuration and data
     config = load_json_file(args.config)
-    data = load_json_file(args.data)
-    
+    data = load_json_file(args.data) if (not args.records or Path(args.data).exists()) else []
+
     # Determine the form URL
     url = args.url or config.get("page", {}).get("url")
     if not url:
         print("Error: No URL provided. Use --url or set config.page.url")
         sys.exit(1)
-    
-    # Ensure output directory exists
-    ensure_output_dir()
-    
-    # Initialize variables for logging
-    timestamp = ts()
-    status = "success"
-    error_message = ""
-    screenshot_path = f"output/{timestamp}.png"
-    
+
     try:
-        with sync_playwright() as p:
-            # Launch browser
-            browser = p.chromium.launch(headless=args.headless)
-            context = browser.new_context(accept_downloads=True)
-            page = context.new_page()
-            
-            print(f"Navigating to: {url}")
-            
-            # Navigate to the form
-            page.goto(url, wait_until="domcontentloaded", timeout=args.timeout)
-            page.wait_for_load_state("networkidle", timeout=args.timeout)
-            
-            # Wait for idle spinner if configured
-            page_config = config.get("page", {})
-            if page_config.get("idle_spinner"):
-                try:
-                    page.wait_for_selector(page_config["idle_spinner"], state="detached", timeout=args.timeout)
-                except PlaywrightTimeoutError:
-                    print("Warning: Idle spinner did not disappear within timeout")
-            
-            print("Form loaded, starting to fill fields...")
-            
-            # Fill form fields
-            if not isinstance(data, list):
-                print("Error: data.json must contain a list of field objects")
-                sys.exit(1)
-            
-            for field_data in data:
-                if not isinstance(field_data, dict) or not all(key in field_data for key in ["label", "type", "value"]):
-                    print("Error: Each field in data.json must have 'label', 'type', and 'value' keys")
-                    sys.exit(1)
-                
-                label = field_data["label"]
-                field_type = field_data["type"]
-                value = field_data["value"]
-                
-                print(f"Filling field: {label} ({field_type}) = {value}")
-                fill_value(page, field_type, label, value, args.timeout)
-            
-            print("All fields filled, submitting form...")
-            
-            # Submit the form
-            submit(page, config)
-            
-            print("Form submitted, waiting for success confirmation...")
-            
-            # Take screenshot immediately after submission
-            page.screenshot(path=screenshot_path, full_page=True)
-            print(f"Screenshot saved: {screenshot_path}")
-            
-            # Wait for success
-            wait_for_success(page, config, args.timeout)
-            
-            print("Success! Form submitted successfully.")
-            
-    except PlaywrightTimeoutError as e:
-        status = "timeout"
-        error_message = f"Timeout error: {str(e)}"
-        print(f"Error: {error_message}")
-        
-        # Take error screenshot
-        try:
-            page.screenshot(path=f"output/{timestamp}_error.png", full_page=True)
-            print(f"Error screenshot saved: output/{timestamp}_error.png")
-        except:
-            pass
-            
-    except Exception as e:
-        status = "error"
-        error_message = str(e)
-        print(f"Error: {error_message}")
-        
-        # Take error screenshot
-        try:
-            page.screenshot(path=f"output/{timestamp}_error.png", full_page=True)
-            print(f"Error screenshot saved: output/{timestamp}_error.png")
-        except:
-            pass
-    
-    finally:
-        # Log the result
-        log_row = {
-            "timestamp": timestamp,
-            "url": url,
-            "status": status,
-            "error": error_message
-        }
-        save_log(log_row)
-        
-        # Clean up
-        try:
-            context.close()
-            browser.close()
-        except:
-            pass
-    
+        validate_fields(data, args.data)
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    records = load_records(args.records, data) if args.records else [data]
+    if not records:
+        print("Error: No records to submit")
+        sys.exit(1)
+
+    results = asyncio.run(run_records(
+        url, config, records,
+        concurrency=args.concurrency,
+        timeout=args.timeout,
+        record_timeout_s=args.record_timeout or None,
+        headless=args.headless,
+        log_path=args.log,
+        prefill=args.prefill == "on" or (args.prefill == "auto" and is_airtable(url)),
+        schema_path=args.schema or None,
+        selector_cache_path=args.selector_cache or None,
+        trace_path=args.trace,
+        playwright_trace=args.playwright_trace,
+        capture=CapturePolicy.from_env(
+            mode=args.capture,
+            scope=args.capture_scope,
+            fmt=args.capture_format,
+            quality=args.capture_quality,
+            selector=args.capture_selector,
+        ),
+    ))
+    ok = sum(1 for r in results if r["status"] == "success")
+
     # Exit with appropriate code
-    if status == "success":
-        print("Form filling completed successfully!")
+    if ok == len(records):
+        print("Form filling completed successfully!" if len(records) == 1 else f"All {ok} records submitted successfully!")
         sys.exit(0)
     else:
-        print(f"Form filling failed: {error_message}")
+        print(f"Form filling failed for {len(records) - ok} of {len(records)} record(s)")
         sys.exit(1)
 
 
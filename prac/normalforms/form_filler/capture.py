@@ -0,0 +1,141 @@
+"""Screenshot capture policy: when to capture, what to capture, and off-thread writes.
+
+A full-page PNG after every submit is one of the slowest steps per record. The
+policy decides whether a capture happens at all (`never`, `on-failure`,
+`always`), limits it to the viewport or one element, encodes JPEG at a chosen
+quality, and hands the bytes to a small thread pool so the disk write never
+blocks the page. Artifact names carry microseconds, the pid and a counter, so
+concurrent workers and fast batches cannot overwrite each other.
+"""
+
+import itertools
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, Optional
+
+
+MODES = ("never", "on-failure", "always")
+SCOPES = ("viewport", "full", "element")
+FORMATS = ("jpeg", "png")
+
+_counter = itertools.count(1)
+
+
+def artifact_name(tag: str = "", ext: str = "jpg", out_dir: str = "output") -> str:
+    """
+    Collision-free artifact path, e.g. output/2025-09-21_14-30-13-123456_p4242_7_r3_error.jpg.
+
+    Args:
+        tag: Suffix describing the artifact (record tag, "error", ...)
+        ext: File extension
+        out_dir: Output directory
+    """
+    stamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S-%f")
+    tag = re.sub(r"[^\w.-]+", "_", tag).strip("_")
+    return os.path.join(out_dir, f"{stamp}_p{os.getpid()}_{next(_counter)}" + (f"_{tag}" if tag else "") + f".{ext}")
+
+
+class CapturePolicy:
+    """
+    Decide, take and write screenshots.
+
+    Args:
+        mode: "never", "on-failure" or "always"
+        scope: "viewport", "full" (full page) or "element" (first match of `selector`)
+        fmt: "jpeg" or "png"
+        quality: JPEG quality 1-100 (ignored for PNG)
+        selector: Element to capture when scope is "element" (falls back to the viewport)
+        out_dir: Output directory
+        writers: Threads writing files to disk
+    """
+
+    def __init__(self, mode: str = "on-failure", scope: str = "viewport", fmt: str = "jpeg",
+                 quality: int = 70, selector: str = "form", out_dir: str = "output", writers: int = 2):
+        if mode not in MODES:
+            raise ValueError(f"capture mode must be one of {MODES}, got {mode!r}")
+        if scope not in SCOPES:
+            raise ValueError(f"capture scope must be one of {SCOPES}, got {scope!r}")
+        if fmt not in FORMATS:
+            raise ValueError(f"capture format must be one of {FORMATS}, got {fmt!r}")
+        self.mode = mode
+        self.scope = scope
+        self.fmt = fmt
+        self.quality = max(1, min(100, int(quality)))
+        self.selector = selector
+        self.out_dir = out_dir
+        self._pool = ThreadPoolExecutor(max_workers=max(1, writers), thread_name_prefix="capture")
+
+    @classmethod
+    def from_env(cls, **overrides) -> "CapturePolicy":
+        """Policy from FORM_CAPTURE, FORM_CAPTURE_SCOPE, FORM_CAPTURE_FORMAT and FORM_CAPTURE_QUALITY."""
+        kwargs = {
+            "mode": os.getenv("FORM_CAPTURE", "on-failure"),
+            "scope": os.getenv("FORM_CAPTURE_SCOPE", "viewport"),
+            "fmt": os.getenv("FORM_CAPTURE_FORMAT", "jpeg"),
+            "quality": int(os.getenv("FORM_CAPTURE_QUALITY", "70")),
+        }
+        kwargs.update({k: v for k, v in overrides.items() if v is not None})
+        return cls(**kwargs)
+
+    def wants(self, ok: bool) -> bool:
+        """Whether a capture should happen for an outcome."""
+        return self.mode == "always" or (self.mode == "on-failure" and not ok)
+
+    def _options(self) -> Dict:
+        opts = {"type": self.fmt}
+        if self.fmt == "jpeg":
+            opts["quality"] = self.quality
+        return opts
+
+    def _path(self, tag: str) -> str:
+        return artifact_name(tag, "jpg" if self.fmt == "jpeg" else "png", self.out_dir)
+
+    def _write(self, path: str, data: bytes) -> None:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(data)
+
+    def _submit(self, path: str, data: bytes) -> None:
+        self._pool.submit(self._write, path, data)
+
+    def capture(self, page, tag: str = "", ok: bool = True) -> Optional[str]:
+        """
+        Capture a sync-API page if the policy wants it; returns the artifact path or None.
+
+        The image is encoded by the browser; the file write happens on a worker thread.
+        """
+        if not self.wants(ok):
+            return None
+        opts = self._options()
+        if self.scope == "element" and page.locator(self.selector).count() > 0:
+            data = page.locator(self.selector).first.screenshot(**opts)
+        else:
+            data = page.screenshot(full_page=self.scope == "full", **opts)
+        path = self._path(tag)
+        self._submit(path, data)
+        return path
+
+    async def capture_async(self, page, tag: str = "", ok: bool = True) -> Optional[str]:
+        """capture() for an async-API page; the event loop never waits on the disk write."""
+        if not self.wants(ok):
+            return None
+        opts = self._options()
+        if self.scope == "element" and await page.locator(self.selector).count() > 0:
+            data = await page.locator(self.selector).first.screenshot(**opts)
+        else:
+            data = await page.screenshot(full_page=self.scope == "full", **opts)
+        path = self._path(tag)
+        self._submit(path, data)
+        return path
+
+    def close(self) -> None:
+        """Wait for pending writes and stop the writer threads."""
+        self._pool.shutdown(wait=True)
+
+    def __enter__(self) -> "CapturePolicy":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
@@ -0,0 +1,662 @@
+"""Asyncio engine: the form filling implementation, and many records across N pages.
+
+fill_value / submit / wait_for_success / reset_form here are the only filling
+code; filler.py and airtable.py hold the in-page scripts, selectors and pure
+helpers they use. `run_records` drives a queue of records through `concurrency`
+workers; each worker owns one context + page and keeps it for every record it
+takes (the batch mode of the CLI), with a per-record timeout.
+"""
+
+import asyncio
+import re
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from playwright.async_api import async_playwright, Page, TimeoutError as PlaywrightTimeoutError
+
+from .airtable import (UPLOAD_IDLE_MS, _LISTBOX, _SELECTED_JS, _SELECTION_JS, _UPLOAD_SETTLED_JS, _UPLOAD_STATE_JS,
+                       _attachment_paths, _upload_stats)
+from .capture import CapturePolicy
+from .filler import (FOLLOWING_FOCUSABLE_XPATH, SUBMIT_ANOTHER, SUBMIT_SELECTORS, TEXT_KINDS,
+                     TEXT_XPATHS, _BASELINE_JS, _SUCCESS_JS, _success_args)
+from .labelmap import label_map_async, invalidate, xpath_literal
+from .prefill import VERIFY_PREFILL_JS, plan_prefill
+from .runlog import DEFAULT_PATH, RunLog, get_log
+from .schema import SchemaCache, check_record
+from .selector_cache import SelectorCache, get_cache, resolve_async, set_cache, take_probes_saved, use_async
+from .tracing import (Tracer, begin_record_trace, end_record_trace, get_tracer, set_tracer, set_track, span,
+                      start_playwright_trace)
+from .utils import ts, ensure_output_dir
+
+
+async def _first(locator):
+    return locator.first if await locator.count() > 0 else None
+
+
+def _label_xpath(label: str) -> str:
+    return f"//label[normalize-space()={xpath_literal(label)}]"
+
+
+def _mapped(slot: str):
+    async def find(page: Page, label: str):
+        return (await label_map_async(page)).control(label, slot)
+    return find
+
+
+def _xpath_text(template: str):
+    """Strategy: the first match of a label-relative XPath, if it is an input or textarea."""
+    async def find(page: Page, label: str):
+        field = page.locator("xpath=" + template.format(lit=xpath_literal(label))).first
+        if await field.count() > 0 and await field.evaluate("el => el.tagName.toLowerCase()") in ("input", "textarea"):
+            return field
+        return None
+    return find
+
+
+async def _filter_text(page: Page, label: str):
+    """Strategy: an input/textarea that contains the label."""
+    return await _first(page.locator("input, textarea").filter(has=page.locator("label", has_text=label)))
+
+
+async def _by_label(page: Page, label: str):
+    # .first avoids strict mode violations when several controls share a label
+    return await _first(page.get_by_label(label))
+
+
+async def _following_focusable(page: Page, label: str):
+    return await _first(page.locator("xpath=" + FOLLOWING_FOCUSABLE_XPATH.format(x=_label_xpath(label))))
+
+
+async def _label_itself(page: Page, label: str):
+    # No focusable control: click the label itself
+    return await _first(page.locator("xpath=" + _label_xpath(label)))
+
+
+def _nested(control: str):
+    async def find(page: Page, label: str):
+        return await _first(page.locator(f"xpath={_label_xpath(label)}//{control}"))
+    return find
+
+
+async def _labelled_file(page: Page, label: str):
+    return await _first(page.get_by_label(label).locator("input[type='file']"))
+
+
+# Strategies per slot in default order (see selector_cache.py). The label map is one
+# dict lookup; everything after it costs at least one round-trip.
+STRATEGIES = {
+    "text": [("labelmap", _mapped("text"))]
+            + [(name, _xpath_text(template)) for name, template in TEXT_XPATHS]
+            + [("filter:has-label", _filter_text)],
+    "focus": [("labelmap", _mapped("focus")), ("get_by_label", _by_label),
+              ("xpath:following-focusable", _following_focusable), ("xpath:label", _label_itself)],
+    "checkbox": [("labelmap", _mapped("checkbox")), ("get_by_label", _by_label),
+                 ("xpath:nested-checkbox", _nested("input[@type='checkbox']"))],
+    "file": [("labelmap", _mapped("file")), ("get_by_label", _labelled_file),
+             ("xpath:nested-file", _nested("input[@type='file']"))],
+}
+
+
+async def _use(page: Page, label: str, slot: str, action) -> None:
+    """Run `action` on the control found for `slot`; raise if no strategy finds one."""
+    if not await use_async(page, label, slot, STRATEGIES[slot], action):
+        raise PlaywrightTimeoutError(f"Could not find {slot} control for label: {label}")
+
+
+async def _open_listbox(page: Page, label: str, timeout: int):
+    """
+    Open a select field; return its listbox once visible, or None if it never shows.
+
+    Airtable opens the popover asynchronously after the click, so the listbox gets a
+    short wait first. Enter is pressed only if it never appeared: on an opening
+    listbox it would pick the highlighted option or close the popover.
+    """
+    await _use(page, label, "focus", lambda field: field.click(timeout=timeout))
+    listbox = page.locator(_LISTBOX).last
+    for attempt in range(2):
+        try:
+            await listbox.wait_for(state="visible", timeout=min(timeout, 1000 if attempt == 0 else 2000))
+            return listbox
+        except PlaywrightTimeoutError:
+            if attempt == 0:
+                await page.keyboard.press("Enter")
+    return None
+
+
+async def _choose(page: Page, listbox, choice: str, timeout: int) -> None:
+    """
+    Filter the listbox by typing and click the option named exactly `choice`.
+
+    Enter is pressed only when no listbox ever opened (a plain input). With a
+    listbox, Enter would commit whatever is highlighted, e.g. a fuzzy match, so a
+    missing option (unknown, or hidden because it is already selected) raises.
+    """
+    await page.keyboard.insert_text(choice)
+    if listbox is None:
+        await page.keyboard.press("Enter")
+        return
+    option = listbox.get_by_role("option", name=choice, exact=True).first
+    try:
+        await option.wait_for(state="visible", timeout=min(timeout, 2000))
+    except PlaywrightTimeoutError:
+        await page.keyboard.press("Escape")
+        raise PlaywrightTimeoutError(f"No option named {choice!r} in the listbox")
+    await option.click()
+
+
+async def _clear_filter(page: Page) -> None:
+    """
+    Clear the listbox search text before typing the next choice.
+
+    Only a focused text input is cleared; Backspace is never sent because an
+    empty multi-select input treats it as "remove the last chip".
+    """
+    search = page.locator("input:focus, textarea:focus").first
+    if await search.count() > 0 and await search.input_value():
+        await search.fill("")
+
+
+async def _fill_select(page: Page, label: str, choices: List[str], timeout: int, multi: bool) -> None:
+    """
+    Pick every choice in one open of the select's listbox, then confirm the chips.
+
+    The listbox is reopened only if the widget closes it after a pick; waits are on
+    the listbox and the rendered chips rather than fixed sleeps.
+    """
+    if not choices:
+        return
+    listbox = await _open_listbox(page, label, timeout)
+    for i, choice in enumerate(choices):
+        if i > 0:
+            if listbox is None or not await listbox.is_visible():
+                listbox = await _open_listbox(page, label, timeout)
+            else:
+                await _clear_filter(page)
+        await _choose(page, listbox, choice, timeout)
+    if listbox is not None:
+        try:
+            if multi:
+                await page.keyboard.press("Escape")
+            await listbox.wait_for(state="hidden", timeout=min(timeout, 2000))
+        except PlaywrightTimeoutError:
+            await page.keyboard.press("Escape")
+    elif multi:
+        await page.keyboard.press("Escape")
+    try:
+        await page.wait_for_function(_SELECTED_JS, arg=[label, list(choices)], timeout=timeout)
+    except PlaywrightTimeoutError:
+        shown = await page.evaluate(_SELECTION_JS, label) or {"chips": []}
+        extra = [c for c in shown["chips"] if c not in {str(x).strip().lower() for x in choices}]
+        detail = f" (other choices still selected: {extra})" if extra else ""
+        raise PlaywrightTimeoutError(f"Selection {choices} not confirmed for field: {label}{detail}")
+
+
+async def _wait_uploaded(page: Page, label: str, names: List[str], timeout: int) -> bool:
+    """
+    Wait until the field is no longer uploading.
+
+    Returns True once nothing is busy and every name is shown, or False once nothing
+    has been busy for UPLOAD_IDLE_MS without every name showing (names truncated,
+    thumbnails only). Raises if progress is still shown after `timeout`.
+    """
+    key = f"{label}:{time.perf_counter()}"
+    try:
+        handle = await page.wait_for_function(_UPLOAD_SETTLED_JS, arg=[label, names, UPLOAD_IDLE_MS, key],
+                                              timeout=timeout)
+        settled = await handle.json_value()
+    except PlaywrightTimeoutError:
+        raise PlaywrightTimeoutError(f"Upload still in progress after {timeout} ms for field: {label}")
+    if settled == "names":
+        return True
+    state = await page.evaluate(_UPLOAD_STATE_JS, [label, names])
+    print(f"Warning: upload for '{label}' shows no progress but only {state['seen']}/{len(names)} file names")
+    return False
+
+
+async def set_attachment(page: Page, label: str, file_paths: Any, timeout: int = 60000) -> Dict[str, Any]:
+    """
+    Upload one or more files to an attachment field and wait until the upload finishes.
+
+    Files are handed to the browser as paths (never read into Python memory), in a
+    single set_input_files call when the input accepts multiple files. The call then
+    waits until the field shows no progress: at once if every file name is visible,
+    otherwise after UPLOAD_IDLE_MS without progress, so submit cannot race an
+    in-flight upload and truncated names do not stall the record.
+
+    Args:
+        page: Playwright async page object
+        label: Field label
+        file_paths: Path or list of paths to upload
+        timeout: Upload timeout in milliseconds
+
+    Returns:
+        {"files", "bytes", "set_ms", "upload_ms", "mb_per_s", "confirmed"}
+    """
+    paths = _attachment_paths(file_paths)
+    found = await resolve_async(page, label, "file", STRATEGIES["file"])
+    if found is None:
+        raise PlaywrightTimeoutError(f"Could not find file input for label: {label}")
+    file_input = found[1]
+    t0 = time.perf_counter()
+    if len(paths) == 1 or await file_input.evaluate("el => el.multiple"):
+        await file_input.set_input_files([str(p) for p in paths], timeout=timeout)
+    else:
+        # Single-file input: one file per call, each upload finishing before the next
+        for i, path in enumerate(paths):
+            await file_input.set_input_files(str(path), timeout=timeout)
+            if i < len(paths) - 1:
+                await _wait_uploaded(page, label, [p.name for p in paths[:i + 1]], timeout)
+    set_ms = (time.perf_counter() - t0) * 1000
+    confirmed = await _wait_uploaded(page, label, [p.name for p in paths], timeout)
+    return _upload_stats(paths, t0, set_ms, confirmed)
+
+
+async def fill_value(page: Page, kind: str, label: str, value: Any,
+                     timeout: int = 10000) -> Optional[Dict[str, Any]]:
+    """
+    Fill a form field based on its type and label.
+
+    Args:
+        page: Playwright async page object
+        kind: Field type (text, email, checkbox, etc.)
+        label: Field label
+        value: Value to fill (a list of paths for multi-file attachments)
+        timeout: Timeout in milliseconds
+
+    Returns:
+        Upload stats for attachment fields, otherwise None
+    """
+    try:
+        if kind in TEXT_KINDS:
+            await _use(page, label, "text", lambda field: field.fill(str(value), timeout=timeout))
+        elif kind == "checkbox":
+            await _use(page, label, "checkbox", lambda box: box.set_checked(bool(value), timeout=timeout))
+        elif kind == "single_select":
+            await _fill_select(page, label, [str(value)], timeout, multi=False)
+        elif kind == "multi_select":
+            await _fill_select(page, label, value if isinstance(value, list) else [str(value)], timeout, multi=True)
+        elif kind == "attachment":
+            return await set_attachment(page, label, value, max(timeout, 60000))
+        else:
+            raise ValueError(f"Unsupported field type: {kind}")
+    except Exception as e:
+        raise Exception(f"Failed to fill field '{label}' (type: {kind}): {str(e)}") from e
+
+
+async def submit(page: Page, config: Dict[str, Any]) -> None:
+    """Click the submit button: accessible name "submit", then SUBMIT_SELECTORS, then config.submit_selector."""
+    candidates = [page.get_by_role("button", name=re.compile(r"submit", re.IGNORECASE))]
+    candidates += [page.locator(sel) for sel in SUBMIT_SELECTORS]
+    if config.get("submit_selector"):
+        candidates.append(page.locator(config["submit_selector"]))
+    for button in candidates:
+        if await button.count() > 0:
+            await button.first.click()
+            return
+    raise PlaywrightTimeoutError("Could not find submit button")
+
+
+async def snapshot_baseline(page: Page, config: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Record what the page shows before the submit click, for wait_for_success().
+
+    Call it right before submit(): a thank-you screen that renders before a baseline
+    taken afterwards would already be counted in it, and no signal could fire.
+    """
+    args = _success_args(page.url, config)
+    args.update(await page.evaluate(_BASELINE_JS, args))
+    return args
+
+
+async def wait_for_success(page: Page, config: Dict[str, Any], timeout: int = 10000,
+                           baseline: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Wait for success confirmation after form submission.
+
+    Races every confirmation signal in a single in-page wait and returns on the
+    first one: the configured success selector, the URL changing (or containing
+    config.page.success_url_contains), success text appearing, or the form's
+    inputs/submit button being detached. A navigation that destroys the page's
+    execution context also counts as confirmation.
+
+    Args:
+        page: Playwright async page object
+        config: Configuration dictionary
+        timeout: Timeout in milliseconds
+        baseline: snapshot_baseline() taken before submit; without it the baseline is
+                  taken now, which misses a confirmation that already rendered
+
+    Returns:
+        {"signal": name of the signal that fired (or "none"), "ms": time to confirmation}
+    """
+    args = dict(baseline) if baseline else _success_args(page.url, config)
+    t0 = time.perf_counter()
+    signal = None
+    try:
+        if not baseline:
+            args.update(await page.evaluate(_BASELINE_JS, args))
+        signal = await (await page.wait_for_function(_SUCCESS_JS, arg=args, timeout=timeout)).json_value()
+    except PlaywrightTimeoutError:
+        pass
+    except Exception as e:
+        if "context was destroyed" in str(e) or "navigat" in str(e).lower():
+            signal = "navigation"
+        else:
+            raise
+    ms = round((time.perf_counter() - t0) * 1000, 1)
+    if not signal and args["urlContains"]:
+        raise PlaywrightTimeoutError(f"Expected URL to contain '{args['urlContains']}', got: {page.url}")
+    return {"signal": signal or "none", "ms": ms}
+
+
+async def open_form(page: Page, url: str, config: Dict[str, Any], timeout: int) -> None:
+    """Navigate to the form and wait for the idle spinner (if configured) to go away."""
+    invalidate(page)
+    with span("goto", url=url):
+        await page.goto(url, wait_until="domcontentloaded", timeout=timeout)
+    with span("networkidle"):
+        await page.wait_for_load_state("networkidle", timeout=timeout)
+    spinner = config.get("page", {}).get("idle_spinner")
+    if spinner:
+        with span("idle_spinner") as sp:
+            try:
+                await page.wait_for_selector(spinner, state="detached", timeout=timeout)
+            except PlaywrightTimeoutError:
+                sp["timed_out"] = True
+                print("Warning: Idle spinner did not disappear within timeout")
+
+
+async def reset_form(page: Page, url: str, config: Dict[str, Any], timeout: int) -> None:
+    """Use Airtable's "Submit another response" when shown (no reload), otherwise navigate again."""
+    invalidate(page)
+    for role in ("button", "link"):
+        control = page.get_by_role(role, name=SUBMIT_ANOTHER).first
+        if await control.count() > 0:
+            with span("submit_another"):
+                await control.click()
+                await page.locator("label").first.wait_for(state="visible", timeout=timeout)
+            return
+    await open_form(page, url, config, timeout)
+
+
+_capture: Optional[CapturePolicy] = None
+
+
+def _default_capture() -> CapturePolicy:
+    global _capture
+    if _capture is None:
+        _capture = CapturePolicy.from_env()
+    return _capture
+
+
+def _ms(t: float) -> float:
+    return round((time.perf_counter() - t) * 1000, 1)
+
+
+async def prepare_record(page: Page, url: str, config: Dict[str, Any], data: List[Dict[str, Any]],
+                         timeout: int, fresh: bool, prefill: bool = False,
+                         prefix: str = "") -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Bring the page to an empty form, or to a prefilled one when `prefill` is set.
+
+    With prefill, every supported field goes into the URL (see prefill.plan_prefill);
+    fields whose value does not render on the page fall back to UI filling.
+
+    Returns:
+        (prefilled fields, fields still to fill through the UI), both in data order
+    """
+    if prefill:
+        plan = plan_prefill(url, data)
+        if plan.prefilled:
+            print(f"{prefix}Navigating to prefilled form ({len(plan.prefilled)}/{len(data)} fields in URL)")
+            await open_form(page, plan.url, config, timeout)
+            with span("verify_prefill", fields=len(plan.prefilled)) as sp:
+                try:
+                    await page.wait_for_function(f"(fields) => ({VERIFY_PREFILL_JS})(fields).length === 0",
+                                                 arg=plan.prefilled, timeout=min(timeout, 2000))
+                    missing = set()
+                except PlaywrightTimeoutError:
+                    missing = set(await page.evaluate(VERIFY_PREFILL_JS, plan.prefilled))
+                    sp["missing"] = sorted(missing)
+                    print(f"{prefix}Prefill not applied for: {sorted(missing)}; filling them through the UI")
+            prefilled = [f for f in plan.prefilled if f["label"] not in missing]
+            return prefilled, [f for f in data if f not in prefilled]
+    if fresh:
+        print(f"{prefix}Navigating to: {url}")
+        await open_form(page, url, config, timeout)
+    else:
+        await reset_form(page, url, config, timeout)
+    return [], list(data)
+
+
+async def fill_fields(page: Page, fields: List[Dict[str, Any]], timeout: int,
+                      outcomes: Optional[List[Dict[str, Any]]] = None, prefix: str = "") -> None:
+    """fill_value() each field in order, appending {label, type, ok, ms, error, via} to `outcomes`."""
+    outcomes = outcomes if outcomes is not None else []
+    for field_data in fields:
+        label, kind = field_data["label"], field_data["type"]
+        print(f"{prefix}Filling field: {label} ({kind}) = {field_data['value']}")
+        tf = time.perf_counter()
+        outcome = {"label": label, "type": kind, "ok": True, "ms": None, "error": None, "via": "ui"}
+        outcomes.append(outcome)
+        try:
+            with span("field", label=label, type=kind):
+                upload = await fill_value(page, kind, label, field_data["value"], timeout)
+            if upload:
+                outcome["upload"] = upload
+        except Exception as e:
+            outcome.update(ok=False, error=str(e))
+            raise
+        finally:
+            outcome["ms"] = _ms(tf)
+
+
+async def run_record(page: Page, url: str, config: Dict[str, Any], data: List[Dict[str, Any]],
+                     timeout: int, fresh: bool, record_timeout_s: Optional[float] = None,
+                     tag: str = "", prefix: str = "", log: Optional[RunLog] = None,
+                     meta: Optional[Dict[str, Any]] = None,
+                     capture: Optional[CapturePolicy] = None, prefill: bool = False,
+                     schema: Optional[SchemaCache] = None, playwright_trace: bool = False) -> Dict[str, Any]:
+    """
+    Load, fill and submit one record on `page`, writing one run-log row.
+
+    Args:
+        page: Playwright async page object
+        url: Form URL
+        config: Configuration dictionary
+        data: List of {label, type, value} field objects
+        timeout: Per-action timeout in milliseconds
+        fresh: Navigate to the form instead of resetting the previous submission
+        record_timeout_s: Wall-clock budget for the whole record (None = no limit)
+        tag: Suffix for artifact names
+        prefix: Prefix for console lines (e.g. "[3] ")
+        log: RunLog to write to (default: the process-wide output/run_log.jsonl)
+        meta: Extra keys for the row (e.g. record number and worker)
+        capture: Screenshot policy (default: on-failure viewport JPEG)
+        prefill: Put supported fields in an Airtable prefill URL, UI-fill only the rest
+        schema: Cached form schema; skips the page walk on reset pages
+        playwright_trace: Record a Playwright trace chunk, kept only if the record fails
+                          (the context must have start_playwright_trace() applied)
+
+    Returns:
+        The run-log row: status, error, error_class, signal, phases, fields, artifacts, probes_saved
+    """
+    timestamp = ts()
+    capture = capture or _default_capture()
+    result = {"timestamp": timestamp, "url": url, "status": "success", "error": "", "error_class": None,
+              "signal": None, "phases": {}, "fields": [], "artifacts": [], **(meta or {})}
+    phases = result["phases"]
+    t0 = time.perf_counter()
+
+    async def body():
+        t = time.perf_counter()
+        with span("open", fresh=fresh, prefill=prefill):
+            prefilled, ui = await prepare_record(page, url, config, data, timeout, fresh, prefill, prefix)
+            if schema is not None:
+                # Cached locators on a reset page; fingerprint check (and re-inspect) on a fresh one
+                with span("schema") as sp:
+                    result["schema"] = sp["result"] = await schema.attach_async(page, verify=fresh)
+                problems = check_record(schema.schema, data) if schema.schema else []
+                if problems:
+                    result["schema_warnings"] = problems
+                    print(f"{prefix}Warning: " + "; ".join(problems))
+            else:
+                with span("label_map"):
+                    await label_map_async(page, refresh=True)
+        phases["open_ms"] = _ms(t)
+        result["prefilled"] = len(prefilled)
+        result["fields"].extend({"label": f["label"], "type": f["type"], "ok": True, "ms": 0.0,
+                                 "error": None, "via": "prefill"} for f in prefilled)
+
+        t = time.perf_counter()
+        with span("fill", fields=len(ui)):
+            await fill_fields(page, ui, timeout, result["fields"], prefix)
+        phases["fill_ms"] = _ms(t)
+
+        t = time.perf_counter()
+        with span("submit"):
+            baseline = await snapshot_baseline(page, config)
+            await submit(page, config)
+        phases["submit_ms"] = _ms(t)
+
+        with span("confirm") as sp:
+            confirmation = await wait_for_success(page, config, timeout, baseline)
+            sp["signal"] = confirmation["signal"]
+        phases["confirm_ms"] = confirmation["ms"]
+        result["signal"] = confirmation["signal"]
+        if confirmation["signal"] == "none":
+            print(f"{prefix}Warning: Could not detect clear success confirmation, but form was filled and submitted")
+        else:
+            print(f"{prefix}Success confirmed by {confirmation['signal']} after {confirmation['ms']} ms")
+        path = await capture.capture_async(page, tag, ok=True)
+        if path:
+            result["artifacts"].append(path)
+
+    if playwright_trace:
+        await begin_record_trace(page.context, tag)
+    try:
+        with span("record", cat="record", **(meta or {})):
+            await asyncio.wait_for(body(), timeout=record_timeout_s)
+    except asyncio.TimeoutError:
+        result.update(status="timeout", error=f"Record timed out after {record_timeout_s}s",
+                      error_class="RecordTimeout")
+    except PlaywrightTimeoutError as e:
+        result.update(status="timeout", error=f"Timeout error: {str(e)}", error_class=type(e).__name__)
+    except Exception as e:
+        result.update(status="error", error=str(e), error_class=type(e.__cause__ or e).__name__)
+
+    if result["status"] != "success":
+        print(f"{prefix}Error: {result['error']}")
+        try:
+            path = await capture.capture_async(page, f"{tag}_error", ok=False)
+            if path:
+                result["artifacts"].append(path)
+                print(f"{prefix}Error screenshot saved: {path}")
+        except Exception:
+            pass
+    if playwright_trace:
+        try:
+            path = await end_record_trace(page.context, result["status"] == "success", tag)
+            if path:
+                result["artifacts"].append(path)
+                print(f"{prefix}Playwright trace saved: {path}")
+        except Exception:
+            pass
+
+    phases["total_ms"] = _ms(t0)
+    result["probes_saved"] = take_probes_saved(page)
+    (log or get_log()).write(result)
+    return result
+
+
+async def run_records(url: str, config: Dict[str, Any], records: List[List[Dict[str, Any]]],
+                      concurrency: int = 1, timeout: int = 20000,
+                      record_timeout_s: Optional[float] = 120, headless: bool = True,
+                      log_path: str = DEFAULT_PATH,
+                      capture: Optional[CapturePolicy] = None, prefill: bool = False,
+                      schema_path: Optional[str] = None,
+                      selector_cache_path: Optional[str] = None, trace_path: Optional[str] = None,
+                      playwright_trace: bool = False) -> List[Dict[str, Any]]:
+    """
+    Submit every record using `concurrency` pages of one Chromium.
+
+    Each worker owns one context + page and reuses it across the records it takes
+    from the queue ("Submit another response" between records, a fresh navigation
+    after a failure). `concurrency` is also the cap on requests in flight against
+    the form's host, since every record targets that one form.
+
+    Args:
+        url: Form URL
+        config: Configuration dictionary
+        records: List of records (each a list of field objects)
+        concurrency: Number of pages working in parallel
+        timeout: Per-action timeout in milliseconds
+        record_timeout_s: Wall-clock budget per record in seconds (None = no limit)
+        headless: Run the browser headless
+        log_path: JSONL run log; rows are buffered and flushed once the run ends
+        capture: Screenshot policy (default: CapturePolicy.from_env()); closed when the run ends
+        prefill: Use the Airtable prefill-URL fast path (every record navigates to its own URL)
+        schema_path: Form schema file (see schema.py); None disables the schema cache
+        selector_cache_path: Winning-strategy cache (see selector_cache.py); None disables it
+        trace_path: Write per-step spans as Chrome trace-event JSON here (see tracing.py); None disables it
+        playwright_trace: Keep a Playwright trace zip for every failed record
+
+    Returns:
+        One run-log row per record, in input order, with "record" (1-based) and "worker"
+    """
+    ensure_output_dir()
+    queue: asyncio.Queue = asyncio.Queue()
+    for n, record in enumerate(records, 1):
+        queue.put_nowait((n, record))
+    many = len(records) > 1
+    results: List[Dict[str, Any]] = []
+    log = RunLog(log_path)
+    capture = capture or CapturePolicy.from_env()
+    schema = SchemaCache(url, schema_path) if schema_path else None
+    set_cache(SelectorCache(selector_cache_path) if selector_cache_path else None)
+    set_tracer(Tracer(trace_path) if trace_path else None)
+
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=headless)
+
+        async def worker(w: int) -> None:
+            set_track(w, f"worker {w}")
+            context = await browser.new_context(accept_downloads=True)
+            if playwright_trace:
+                await start_playwright_trace(context)
+            page = await context.new_page()
+            fresh = True
+            try:
+                while True:
+                    try:
+                        n, record = queue.get_nowait()
+                    except asyncio.QueueEmpty:
+                        return
+                    res = await run_record(page, url, config, record, timeout, fresh, record_timeout_s,
+                                           tag=f"_r{n}" if many else "",
+                                           prefix=f"[{n}] " if many else "",
+                                           log=log, meta={"record": n, "worker": w}, capture=capture,
+                                           prefill=prefill, schema=schema,
+                                           playwright_trace=playwright_trace)
+                    results.append(res)
+                    # After a failure the page state is unknown: start the next record from scratch
+                    fresh = res["status"] != "success"
+            finally:
+                await context.close()
+
+        try:
+            await asyncio.gather(*(worker(w) for w in range(max(1, min(concurrency, len(records))))))
+        finally:
+            await browser.close()
+            capture.close()
+            log.close()
+            cache = get_cache()
+            if cache is not None:
+                cache.save()
+                print(f"Selector cache: {cache.summary()}")
+            tracer = get_tracer()
+            if tracer is not None:
+                tracer.save()
+                print(f"Trace written to {tracer.path} (open in https://ui.perfetto.dev)")
+
+    return sorted(results, key=lambda r: r["record"])
@@ -0,0 +1,183 @@
+"""Per-form memory of which locator strategy found each field.
+
+Fields the label map cannot resolve fall back to a list of probes (get_by_label,
+label-relative XPath, ...), each costing at least one round-trip. The cache
+records the strategy that won for every (form, label, slot) in
+`output/selector_cache.json` and later runs try that strategy first:
+
+    {"<form url>": {"<label>": {"<slot>": "<strategy name>"}}}
+
+An entry whose strategy no longer finds the control, or whose control then fails
+the action, is dropped and the default order applies again. `probes_saved`
+counts the probes the default order would have made minus the probes actually
+made, so stale entries count against it.
+
+The cache is opt-in: the CLI enables it (--selector-cache) and run_records does
+when given `selector_cache_path`; otherwise lookups keep no state.
+"""
+
+import atexit
+import json
+import os
+import threading
+import weakref
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+from .schema import form_key
+
+
+DEFAULT_PATH = "output/selector_cache.json"
+
+# (name, find) pairs in default order; `await find(page, label)` returns a locator or None
+Strategy = Tuple[str, Callable[[Any, str], Awaitable[Any]]]
+
+# Probes saved per page since the last take_probes_saved(page)
+_tally: "weakref.WeakKeyDictionary[Any, int]" = weakref.WeakKeyDictionary()
+
+
+class SelectorCache:
+    """Winning strategy per (form, label, slot), loaded from and saved to `path`."""
+
+    def __init__(self, path: str = DEFAULT_PATH):
+        self.path = path
+        try:
+            with open(path, encoding="utf-8") as f:
+                self._data: Dict[str, Dict[str, Dict[str, str]]] = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self._data = {}
+        self.hits = 0
+        self.stale = 0
+        self.probes_saved = 0
+        self._dirty = False
+        self._lock = threading.Lock()
+        atexit.register(self.save)
+
+    def winner(self, form: str, label: str, slot: str) -> Optional[str]:
+        return self._data.get(form, {}).get(label, {}).get(slot)
+
+    def order(self, form: str, label: str, slot: str, strategies: Sequence[Strategy]) -> List[Strategy]:
+        """Strategies with the cached winner (if still one of them) moved to the front."""
+        name = self.winner(form, label, slot)
+        first = [s for s in strategies if s[0] == name]
+        return first + [s for s in strategies if s[0] != name]
+
+    def record(self, page, form: str, label: str, slot: str, name: str, probes: int, default_probes: int) -> None:
+        """Remember the winner and count the probes saved against the default order."""
+        saved = default_probes - probes
+        with self._lock:
+            if self.winner(form, label, slot) == name:
+                self.hits += 1
+            else:
+                self._data.setdefault(form, {}).setdefault(label, {})[slot] = name
+                self._dirty = True
+            self.probes_saved += saved
+        _tally[page] = _tally.get(page, 0) + saved
+
+    def forget(self, form: str, label: str, slot: str) -> None:
+        """Drop a stale entry."""
+        with self._lock:
+            labels = self._data.get(form, {})
+            if labels.get(label, {}).pop(slot, None) is not None:
+                if not labels[label]:
+                    del labels[label]
+                self.stale += 1
+                self._dirty = True
+
+    def save(self) -> None:
+        """Write the cache if it changed (atomic replace)."""
+        with self._lock:
+            if not self._dirty:
+                return
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            tmp = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(self._data, f, indent=2, ensure_ascii=False)
+            os.replace(tmp, self.path)
+            self._dirty = False
+
+    def summary(self) -> str:
+        return f"{self.probes_saved} probes saved ({self.hits} cache hits, {self.stale} stale entries dropped)"
+
+
+_active: Optional[SelectorCache] = None
+
+
+def get_cache() -> Optional[SelectorCache]:
+    """The active cache, or None (the default) when strategies run in their default order."""
+    return _active
+
+
+def set_cache(cache: Optional[SelectorCache]) -> None:
+    """
+    Use `cache` for every lookup in this process; None disables the cache.
+
+    Nothing is cached (or written to disk) until this is called: the CLI and
+    run_records(selector_cache_path=...) opt in, library callers stay stateless.
+    """
+    global _active
+    _active = cache
+
+
+def take_probes_saved(page) -> int:
+    """Probes saved on `page` since the last call (per record in the engine)."""
+    return _tally.pop(page, 0)
+
+
+async def resolve_async(page, label: str, slot: str, strategies: Sequence[Strategy]) -> Optional[Tuple[str, Any]]:
+    """
+    Find a control by trying strategies, the cached winner first.
+
+    Args:
+        page: Playwright async page object
+        label: Field label
+        slot: Kind of control ("text", "focus", "checkbox", "file")
+        strategies: (name, find) pairs in default order
+
+    Returns:
+        (strategy name, locator), or None if no strategy found the control
+    """
+    cache = get_cache()
+    if cache is None:
+        order, form = list(strategies), None
+    else:
+        form = form_key(page.url)
+        order = cache.order(form, label, slot, strategies)
+    names = [s[0] for s in strategies]
+    for probes, (name, find) in enumerate(order, 1):
+        try:
+            found = await find(page, label)
+        except Exception:
+            found = None
+        if found is not None:
+            if cache is not None:
+                cache.record(page, form, label, slot, name, probes, names.index(name) + 1)
+            return name, found
+        if cache is not None and probes == 1:
+            cache.forget(form, label, slot)
+    return None
+
+
+async def use_async(page, label: str, slot: str, strategies, action: Callable[[Any], Awaitable[Any]]) -> bool:
+    """
+    resolve_async() the control and await `action` on it; a failing action drops the cache entry.
+
+    Returns:
+        False if no strategy found the control
+    """
+    found = await resolve_async(page, label, slot, strategies)
+    if found is None:
+        return False
+    try:
+        await action(found[1])
+    except Exception:
+        _drop(page, label, slot, found[0])
+        raise
+    return True
+
+
+def _drop(page, label: str, slot: str, name: str) -> None:
+    cache = get_cache()
+    if cache is not None:
+        form = form_key(page.url)
+        if cache.winner(form, label, slot) == name:
+            cache.forget(form, label, slot)
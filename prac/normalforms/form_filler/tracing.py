@@ -0,0 +1,154 @@
+"""Per-step spans exported as Chrome trace-event JSON (open in Perfetto or chrome://tracing).
+
+    with span("submit"):
+        await submit(page, config)
+
+Every span is a "complete" event (`"ph": "X"`) with microsecond timestamps, so
+nested spans (record > fill > field) stack up in the viewer. Each engine worker
+gets its own track via `set_track()`, so concurrent records show as parallel
+rows. Tracing is off unless a Tracer is installed (`--trace`, `run_records(trace_path=...)`
+or `FORM_TRACE=<path>`); `span()` then only yields an empty dict.
+
+Playwright's own tracing (screenshots, DOM snapshots, network) is much heavier.
+`start_playwright_trace` / `end_record_trace` record it per record as a chunk and
+keep the zip only when the record failed; open it with `playwright show-trace`.
+"""
+
+import atexit
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional
+
+from .capture import artifact_name
+
+
+DEFAULT_PATH = "output/trace.json"
+
+_track: ContextVar[Optional[int]] = ContextVar("form_filler_track", default=None)
+
+
+class Tracer:
+    """Collects spans in memory and writes them as one trace-event file."""
+
+    def __init__(self, path: str = DEFAULT_PATH, process_name: str = "form_filler"):
+        self.path = path
+        self._pid = os.getpid()
+        self._t0 = time.perf_counter()
+        self._lock = threading.Lock()
+        self._events: List[Dict[str, Any]] = [
+            {"ph": "M", "name": "process_name", "pid": self._pid, "tid": 0, "args": {"name": process_name}},
+        ]
+        self._tracks = set()
+        atexit.register(self.save)
+
+    def _us(self, t: float) -> float:
+        return round((t - self._t0) * 1e6, 1)
+
+    def tid(self) -> int:
+        track = _track.get()
+        return track if track is not None else threading.get_ident()
+
+    def name_track(self, tid: int, name: str) -> None:
+        """Label a track (e.g. "worker 2") in the viewer."""
+        with self._lock:
+            if tid in self._tracks:
+                return
+            self._tracks.add(tid)
+            self._events.append({"ph": "M", "name": "thread_name", "pid": self._pid, "tid": tid,
+                                 "args": {"name": name}})
+
+    def add(self, name: str, start: float, end: float, cat: str = "step",
+            args: Optional[Dict[str, Any]] = None) -> None:
+        """Record a finished span; `start` and `end` are time.perf_counter() values."""
+        event = {"ph": "X", "name": name, "cat": cat, "pid": self._pid, "tid": self.tid(),
+                 "ts": self._us(start), "dur": round((end - start) * 1e6, 1)}
+        if args:
+            event["args"] = args
+        with self._lock:
+            self._events.append(event)
+
+    def save(self) -> None:
+        """Write every span recorded so far (atomic replace)."""
+        with self._lock:
+            data = {"traceEvents": list(self._events), "displayTimeUnit": "ms"}
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, default=str)
+        os.replace(tmp, self.path)
+
+    def close(self) -> None:
+        self.save()
+        atexit.unregister(self.save)
+
+
+_UNSET = object()
+_tracer: Any = _UNSET
+
+
+def get_tracer() -> Optional[Tracer]:
+    """The installed tracer; on first use one is created if FORM_TRACE names an output file."""
+    global _tracer
+    if _tracer is _UNSET:
+        path = os.getenv("FORM_TRACE")
+        _tracer = Tracer(path) if path else None
+    return _tracer
+
+
+def set_tracer(tracer: Optional[Tracer]) -> None:
+    """Install `tracer` for this process; None turns tracing off."""
+    global _tracer
+    _tracer = tracer
+
+
+def set_track(tid: int, name: Optional[str] = None) -> None:
+    """Put spans of the current thread/task on track `tid` (call once per worker)."""
+    _track.set(tid)
+    tracer = get_tracer()
+    if tracer is not None and name:
+        tracer.name_track(tid, name)
+
+
+@contextmanager
+def span(name: str, cat: str = "step", **args) -> Iterator[Dict[str, Any]]:
+    """
+    Time the enclosed block as one span.
+
+    Yields the span's args dict, so the block can attach results (e.g. the
+    confirmation signal). An exception is recorded under "error" and re-raised.
+    """
+    tracer = get_tracer()
+    if tracer is None:
+        yield args
+        return
+    start = time.perf_counter()
+    try:
+        yield args
+    except BaseException as e:
+        args["error"] = f"{type(e).__name__}: {e}"[:300]
+        raise
+    finally:
+        tracer.add(name, start, time.perf_counter(), cat, args)
+
+
+async def start_playwright_trace(context) -> None:
+    """Enable Playwright tracing on a context; records are then traced chunk by chunk."""
+    await context.tracing.start(screenshots=True, snapshots=True)
+
+
+async def begin_record_trace(context, title: str = "") -> None:
+    await context.tracing.start_chunk(title=title or None)
+
+
+async def end_record_trace(context, ok: bool, tag: str = "", out_dir: str = "output") -> Optional[str]:
+    """Close the record's chunk; the zip is written only for a failed record. Returns its path."""
+    if ok:
+        await context.tracing.stop_chunk()
+        return None
+    path = artifact_name(f"{tag}_trace", "zip", out_dir)
+    await context.tracing.stop_chunk(path=path)
+    return path
@@ -1,11 +1,11 @@
-"""Utility functions for timestamp generation, CSV logging, and directory management."""
+"""Utility functions for timestamp generation, run logging, and directory management."""
 
-import csv
-import os
 from datetime import datetime
 from pathlib import Path
 from typing import Dict, Any
 
+from .runlog import DEFAULT_PATH, get_log
+
 
 def ts() -> str:
     """Generate a timestamp string in YYYY-MM-DD_HH-MM-SS format."""
@@ -18,32 +18,17 @@ def ensure_output_dir() -> None:
     output_dir.mkdir(exist_ok=True)
 
 
-def save_log(row: Dict[str, Any], path: str = "output/run_log.csv") -> None:
+def save_log(row: Dict[str, Any], path: str = DEFAULT_PATH) -> None:
     """
-    Append a CSV row to the log file, creating the file with headers if it doesn't exist.
+    Append one row to the structured run log and flush it.
+    
+    Thin wrapper over runlog.RunLog for one-off callers; batch runs should hold a
+    RunLog and let it buffer.
     
     Args:
-        row: Dictionary containing log data
-        path: Path to the CSV file
+        row: Dictionary containing log data (timestamp, url, status, error, ...)
+        path: Path to the JSONL run log
     """
-    ensure_output_dir()
-    
-    file_exists = Path(path).exists()
-    
-    with open(path, "a", newline="", encoding="utf-8") as csvfile:
-        fieldnames = ["timestamp", "url", "status", "error"]
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-        
-        # Write header if file is new
-        if not file_exists:
-            writer.writeheader()
-        
-        # Ensure all required fields are present
-        log_row = {
-            "timestamp": row.get("timestamp", ts()),
-            "url": row.get("url", ""),
-            "status": row.get("status", "unknown"),
-            "error": row.get("error", "")
-        }
-        
-        writer.writerow(log_row)
+    log = get_log(path)
+    log.write({"timestamp": row.get("timestamp") or ts(), **{k: v for k, v in row.items() if k != "timestamp"}})
+    log.flush()
@@ -1,62 +1,97 @@
 #!/usr/bin/env python3
-"""Script to inspect the Airtable form and find available field labels."""
+"""Inspect an Airtable form and write a reusable schema for form_filler.
 
-import time
-from playwright.sync_api import sync_playwright
+Writes label, control type, stable locators, options and required flags, keyed by
+form URL with a structure fingerprint, to output/form_schema.json. The filler
+loads it to skip discovery and re-inspects by itself when the fingerprint changes.
 
-def inspect_form():
+    python inspect_form.py                       # URL from config.json
+    python inspect_form.py --url https://airtable.com/.../form --options
+"""
+
+import argparse
+import json
+import sys
+
+from playwright.sync_api import sync_playwright, TimeoutError as PlaywrightTimeoutError
+
+from form_filler.schema import DEFAULT_PATH, inspect, load_schemas, merge_options, save_schema
+
+
+def read_select_options(page, field, timeout=2000):
+    """Open a custom select popover and read its [role=option] texts."""
+    locator = field["locators"].get("focus")
+    if not locator:
+        return []
+    try:
+        page.locator(locator).first.click(timeout=timeout)
+        listbox = page.locator("[role='listbox']").last
+        listbox.wait_for(state="visible", timeout=timeout)
+        options = [t.strip() for t in listbox.get_by_role("option").all_inner_texts() if t.strip()]
+    except PlaywrightTimeoutError:
+        options = []
+    page.keyboard.press("Escape")
+    return options
+
+
+def inspect_form(url, out=DEFAULT_PATH, headless=True, options=False, timeout=20000):
     with sync_playwright() as p:
-        browser = p.chromium.launch(headless=False)
+        browser = p.chromium.launch(headless=headless)
         context = browser.new_context()
         page = context.new_page()
         
-        print("Navigating to Airtable form...")
-        page.goto("https://airtable.com/appNwbrMq410FQjiI/pagh1dLAVxJJf5mQz/form")
-        page.wait_for_load_state("networkidle")
-        
-        print("Form loaded. Inspecting available fields...")
+        print(f"Navigating to {url} ...")
+        page.goto(url, wait_until="domcontentloaded", timeout=timeout)
+        page.wait_for_load_state("networkidle", timeout=timeout)
+        page.locator("label").first.wait_for(state="visible", timeout=timeout)
         
-        # Wait a bit for the form to fully load
-        time.sleep(3)
-        
-        # Find all labels
-        labels = page.locator("label").all()
-        print(f"\nFound {len(labels)} labels:")
-        for i, label in enumerate(labels):
-            try:
-                text = label.text_content().strip()
-                if text:
-                    print(f"{i+1}. '{text}'")
-            except:
-                pass
-        
-        # Find all input fields
-        inputs = page.locator("input, textarea, select").all()
-        print(f"\nFound {len(inputs)} input fields:")
-        for i, input_field in enumerate(inputs):
-            try:
-                input_type = input_field.get_attribute("type") or "text"
-                placeholder = input_field.get_attribute("placeholder") or ""
-                name = input_field.get_attribute("name") or ""
-                print(f"{i+1}. Type: {input_type}, Name: '{name}', Placeholder: '{placeholder}'")
-            except:
-                pass
-        
-        # Find all buttons
-        buttons = page.locator("button").all()
-        print(f"\nFound {len(buttons)} buttons:")
-        for i, button in enumerate(buttons):
-            try:
-                text = button.text_content().strip()
-                button_type = button.get_attribute("type") or ""
-                print(f"{i+1}. '{text}' (type: {button_type})")
-            except:
-                pass
-        
-        print("\nForm inspection complete. Browser will stay open for 30 seconds for manual inspection...")
-        time.sleep(30)
+        schema = inspect(page, url)
+        if options:
+            for field in schema["fields"]:
+                if field["type"] == "select" and not field["options"]:
+                    field["options"] = read_select_options(page, field)
+        else:
+            # Keep choices an earlier --options run collected
+            merge_options(schema, load_schemas(out).get(schema["url"]))
         
         browser.close()
+    
+    save_schema(schema, out)
+    
+    print(f"\nFound {len(schema['fields'])} fields (fingerprint {schema['fingerprint']}):")
+    for i, field in enumerate(schema["fields"], 1):
+        flags = " required" if field["required"] else ""
+        opts = f" options={field['options']}" if field["options"] else ""
+        print(f"{i}. '{field['label']}' [{field['type']}{flags}]{opts}")
+        for slot, locator in field["locators"].items():
+            print(f"     {slot}: {locator}")
+    print(f"\nSchema saved: {out}")
+    return schema
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect an Airtable form and save its schema")
+    parser.add_argument("--url", help="Form URL (default: config.page.url)")
+    parser.add_argument("--config", default="config.json")
+    parser.add_argument("--out", default=DEFAULT_PATH, help=f"Schema file (default: {DEFAULT_PATH})")
+    parser.add_argument("--options", action="store_true", help="Open custom selects to record their options")
+    parser.add_argument("--headless", type=lambda x: x.lower() in ("true", "1", "yes", "on"), default=True)
+    parser.add_argument("--timeout", type=int, default=20000)
+    args = parser.parse_args()
+    
+    url = args.url
+    if not url:
+        try:
+            with open(args.config, encoding="utf-8") as f:
+                url = json.load(f).get("page", {}).get("url")
+        except FileNotFoundError:
+            pass
+    if not url:
+        print("Error: No URL provided. Use --url or set config.page.url")
+        sys.exit(1)
+    
+    inspect_form(url, args.out, args.headless, args.options, args.timeout)
+
 
 if __name__ == "__main__":
-    inspect_form()
+    main()
@@ -0,0 +1,51 @@
+"""End-to-end smoke test: run_records against bench/fixture_server.py (needs Chromium)."""
+
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "bench"))
+
+from fixture_server import running
+from form_filler.capture import CapturePolicy
+from form_filler.engine import run_records
+
+
+@pytest.fixture(scope="module")
+def chromium():
+    from playwright.sync_api import Error, sync_playwright
+    try:
+        with sync_playwright() as p:
+            p.chromium.launch().close()
+    except Error as e:
+        pytest.skip(f"Chromium not available: {str(e).splitlines()[0]}")
+
+
+@pytest.mark.parametrize("prefill", [False, True])
+def test_run_records_on_fixture(chromium, tmp_path, prefill):
+    resume = tmp_path / "resume.txt"
+    resume.write_text("fixture resume\n")
+    record = [
+        {"label": "First Name", "type": "text", "value": "Ada"},
+        {"label": "Email", "type": "email", "value": "ada@example.com"},
+        {"label": "Agree to terms", "type": "checkbox", "value": True},
+        {"label": "Favorite color", "type": "single_select", "value": "Rock 'n' roll"},
+        {"label": "Interests", "type": "multi_select", "value": ["Music", "Science"]},
+        {"label": "Resume", "type": "attachment", "value": str(resume)},
+    ]
+    with running() as server:
+        url = server.url + "?upload_ms=50&submit_ms=20"
+        config = {"page": {"url": url, "success_selector": "text=/thank you/i"}}
+        results = asyncio.run(run_records(url, config, [record, record], concurrency=2, timeout=10000,
+                                          record_timeout_s=60, log_path=str(tmp_path / "run_log.jsonl"),
+                                          capture=CapturePolicy(mode="never"), prefill=prefill))
+        submissions = list(server.submissions)
+    assert [r["status"] for r in results] == ["success", "success"], [r["error"] for r in results]
+    assert all(r["signal"] == "selector" for r in results)
+    assert len(submissions) == 2
+    for got in submissions:
+        assert got["First Name"] == "Ada" and got["Agree to terms"] is True
+        assert got["Favorite color"] == "Rock 'n' roll" and got["Interests"] == ["Music", "Science"]
+        assert got["Resume"] == ["resume.txt"]
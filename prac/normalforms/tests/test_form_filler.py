@@ -0,0 +1,120 @@
+"""Offline tests for the pure parts of form_filler (no browser needed)."""
+
+from types import SimpleNamespace
+from urllib.parse import parse_qsl, urlsplit
+
+from form_filler.filler import _selector_probe, _success_args
+from form_filler.labelmap import LabelMap, xpath_literal
+from form_filler.prefill import MAX_URL_LEN, is_airtable, plan_prefill
+from form_filler.runlog import percentile, summarize
+from form_filler.schema import check_record, form_key, merge_options
+from form_filler.selector_cache import SelectorCache
+
+FORM = "https://airtable.com/appX/shrY/form"
+
+
+def _labels(*names):
+    return LabelMap(SimpleNamespace(url=FORM), {n: {"text": f'[data-ff-id="{i}"]'} for i, n in enumerate(names)})
+
+
+def test_plan_prefill_splits_fields():
+    data = [
+        {"label": "First Name", "type": "text", "value": "Ada"},
+        {"label": "Agree", "type": "checkbox", "value": True},
+        {"label": "Newsletter", "type": "checkbox", "value": False},
+        {"label": "Tags", "type": "multi_select", "value": ["a", "b"]},
+        {"label": "Odd", "type": "multi_select", "value": ["x, y"]},
+        {"label": "Renamed", "type": "text", "value": "1", "prefill": "Field 7"},
+        {"label": "Manual", "type": "text", "value": "2", "prefill": False},
+        {"label": "CV", "type": "attachment", "value": "cv.pdf"},
+    ]
+    plan = plan_prefill(FORM + "?hide_x=true", data)
+    query = parse_qsl(urlsplit(plan.url).query)
+    assert query == [("hide_x", "true"), ("prefill_First Name", "Ada"), ("prefill_Agree", "true"),
+                     ("prefill_Tags", "a,b"), ("prefill_Field 7", "1")]
+    assert "prefill_First+Name=Ada" in plan.url
+    assert [f["label"] for f in plan.prefilled] == ["First Name", "Agree", "Newsletter", "Tags", "Renamed"]
+    assert [f["label"] for f in plan.ui] == ["Odd", "Manual", "CV"]
+
+
+def test_plan_prefill_respects_max_len():
+    data = [{"label": "Long", "type": "long_text", "value": "x" * MAX_URL_LEN},
+            {"label": "Short", "type": "text", "value": "ok"}]
+    plan = plan_prefill(FORM, data)
+    assert [f["label"] for f in plan.ui] == ["Long"] and len(plan.url) < MAX_URL_LEN
+    assert is_airtable(FORM) and is_airtable("https://eu.airtable.com/x") and not is_airtable("https://example.com")
+
+
+def test_percentile_is_nearest_rank():
+    v = list(range(10, 0, -1))
+    assert (percentile(v, 0.5), percentile(v, 0.9), percentile(v, 0.99)) == (5, 9, 10)
+    assert percentile([], 0.5) is None and percentile([3.0], 0.9) == 3.0
+
+
+def test_summarize_rows():
+    rows = [
+        {"status": "success", "signal": "text", "phases": {"total_ms": 100}, "probes_saved": 2,
+         "fields": [{"label": "A", "ok": True}]},
+        {"status": "timeout", "error_class": "TimeoutError", "phases": {"total_ms": 300, "bad": "x"},
+         "fields": [{"label": "B", "ok": False}]},
+        {"status": "success", "signal": "selector", "phases": {"total_ms": 200}, "probes_saved": 1},
+    ]
+    s = summarize(rows)
+    assert (s["records"], s["success"], s["success_rate"]) == (3, 2, 0.6667)
+    assert s["status"] == {"success": 2, "timeout": 1} and s["error_class"] == {"TimeoutError": 1}
+    assert s["latency_ms"] == {"total_ms": {"p50": 200, "p90": 300, "p99": 300, "n": 3}}
+    assert s["failing_fields"] == {"B": 1} and s["probes_saved"] == 3
+    assert summarize([])["success_rate"] is None
+
+
+def test_check_record():
+    schema = {"fields": [
+        {"label": "Name *", "required": True, "options": []},
+        {"label": "Color", "required": False, "options": ["Red", "Blue"]},
+        {"label": "Email", "required": True, "options": []},
+    ]}
+    data = [{"label": "name", "type": "text", "value": "Ada"},
+            {"label": "Color", "type": "multi_select", "value": ["Red", "Green"]}]
+    assert check_record(schema, data) == ["required field missing: Email", "Color: 'Green' is not an option"]
+
+
+def test_merge_options_keeps_collected_choices():
+    previous = {"fields": [{"label": "Color *", "options": ["Red", "Blue"]}]}
+    schema = {"fields": [{"label": "color", "options": []}, {"label": "Size", "options": ["S"]}]}
+    merge_options(schema, previous)
+    assert schema["fields"][0]["options"] == ["Red", "Blue"] and schema["fields"][1]["options"] == ["S"]
+    assert form_key(FORM + "/?prefill_A=1") == FORM
+
+
+def test_selector_probe():
+    assert _selector_probe("") == {}
+    assert _selector_probe("text=/thank you/gi") == {"selText": "thank you", "selFlags": "i"}
+    assert _selector_probe('text="Done!"') == {"selText": "Done!", "selFlags": "i"}
+    assert _selector_probe("xpath=//h1") == {"xpath": "//h1"}
+    assert _selector_probe("(//div)[2]") == {"xpath": "(//div)[2]"}
+    assert _selector_probe("css=.ok") == {"css": ".ok"}
+    args = _success_args("https://x/form", {"page": {"success_selector": ".ok", "success_url_contains": "/done"}})
+    assert args["startUrl"] == "https://x/form" and args["urlContains"] == "/done" and args["css"] == ".ok"
+
+
+def test_label_map_find_rejects_ambiguous_contains():
+    lm = _labels("First Name", "Last Name", "Parent's Email", "Notes")
+    assert lm.find("first  name") is lm.entries["First Name"]
+    assert lm.find("Name") is None                      # two labels contain it
+    assert lm.find("Email") is lm.entries["Parent's Email"]
+    assert _labels("Name *").find("name") is not None   # required marker ignored
+    assert xpath_literal("Parent's") == '"Parent\'s"'
+
+
+def test_selector_cache_order_record_forget(tmp_path):
+    path = tmp_path / "cache.json"
+    strategies = [("labelmap", None), ("get_by_label", None), ("xpath:label", None)]
+    page = type("Page", (), {})()   # probes are tallied per page in a WeakKeyDictionary
+    cache = SelectorCache(str(path))
+    cache.record(page, FORM, "Color", "focus", "xpath:label", probes=3, default_probes=3)
+    assert [n for n, _ in cache.order(FORM, "Color", "focus", strategies)] == ["xpath:label", "labelmap", "get_by_label"]
+    cache.save()
+    again = SelectorCache(str(path))
+    assert again.winner(FORM, "Color", "focus") == "xpath:label"
+    again.forget(FORM, "Color", "focus")
+    assert again.winner(FORM, "Color", "focus") is None and again.stale == 1
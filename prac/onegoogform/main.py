@@ -10,6 +10,9 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
 
+import tracing
+from tracing import span
+
 try:
     # webdriver-manager simplifies driver setup; falls back to local driver if unavailable
     from webdriver_manager.chrome import ChromeDriverManager
@@ -249,33 +252,41 @@ def parse_row_types(row: Dict[str, str]):
 
 
 def fill_and_submit_once(driver: webdriver.Chrome, form_url: str, row: Dict[str, str]) -> None:
-    driver.get(form_url)
-    wait_for_form_ready(driver)
-    accept_cookies_if_present(driver)
+    with span("navigate", url=form_url):
+        driver.get(form_url)
+    with span("form_ready"):
+        wait_for_form_ready(driver)
+    with span("cookies"):
+        accept_cookies_if_present(driver)
 
     text_fields, radio_fields, checkbox_fields = parse_row_types(row)
 
     # Fill text/textarea
     for label, value in text_fields.items():
-        ok = fill_text_field(driver, label, value)
+        with span("field", label=label, type="text") as sp:
+            ok = sp["ok"] = fill_text_field(driver, label, value)
         print(f"[text] {label} -> {'OK' if ok else 'NOT FOUND'}")
 
     # Radios
     for label, option in radio_fields.items():
-        ok = select_radio(driver, label, option)
+        with span("field", label=label, type="choice") as sp:
+            ok = sp["ok"] = select_radio(driver, label, option)
         print(f"[radio] {label} = {option} -> {'OK' if ok else 'NOT FOUND'}")
 
     # Checkboxes
     for label, options in checkbox_fields.items():
-        ok = select_checkboxes(driver, label, options)
+        with span("field", label=label, type="multi") as sp:
+            ok = sp["ok"] = select_checkboxes(driver, label, options)
         opts = "; ".join(options)
         print(f"[check] {label} = {opts} -> {'OK' if ok else 'PARTIAL/NOT FOUND'}")
 
     # Submit
-    submit_form(driver)
+    with span("submit"):
+        submit_form(driver)
 
     # Small wait so the submission page loads
-    time.sleep(1.5)
+    with span("confirm_wait"):
+        time.sleep(1.5)
 
 
 def read_csv_rows(csv_path: str) -> List[Dict[str, str]]:
@@ -431,9 +442,13 @@ def main():
     parser.add_argument("--limit", type=int, default=0, help="Limit number of rows to submit (0 = all)")
     parser.add_argument("--inspect", action="store_true", help="Inspect the form and print detected questions")
     parser.add_argument("--write-template", default="", help="Write a CSV template with detected headers")
+    parser.add_argument("--trace", default="", help="Write per-step spans as Chrome trace-event JSON (open in Perfetto)")
     args = parser.parse_args()
 
-    driver = setup_driver(headless=args.headless or os.getenv("HEADLESS") == "1")
+    if args.trace:
+        tracing.enable(args.trace)
+    with span("driver_setup"):
+        driver = setup_driver(headless=args.headless or os.getenv("HEADLESS") == "1")
     try:
         if args.inspect:
             run_inspector(driver, args.url, args.write_template)
@@ -448,15 +463,19 @@ def main():
 
         for i, row in enumerate(rows, start=1):
             print(f"\n--- Submitting row {i}/{len(rows)} ---")
-            fill_and_submit_once(driver, args.url, row)
+            with span("row", row=i):
+                fill_and_submit_once(driver, args.url, row)
             if i < len(rows):
-                driver.get(args.url)
-                time.sleep(0.8)
+                with span("reload"):
+                    driver.get(args.url)
+                    time.sleep(0.8)
         print("\nDone.")
     finally:
         # Keep browser open if not headless for quick inspection
         if args.headless or os.getenv("KEEP_OPEN") != "1":
             driver.quit()
+        if args.trace:
+            print(f"Trace written to {tracing.save()}")
 
 
 if __name__ == "__main__":
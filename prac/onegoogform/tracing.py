@@ -0,0 +1,76 @@
+"""Per-step spans exported as Chrome trace-event JSON (open in Perfetto or chrome://tracing).
+
+span() does nothing until enable() installs a tracer. Spans are "complete"
+events, so nested steps (row > field) stack in the viewer.
+"""
+
+import atexit
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+
+class Tracer:
+    def __init__(self, path: str, process_name: str = "onegoogform"):
+        self.path = path
+        self.pid = os.getpid()
+        self.t0 = time.perf_counter()
+        self.lock = threading.Lock()
+        self.events: List[Dict[str, Any]] = [
+            {"ph": "M", "name": "process_name", "pid": self.pid, "tid": 0, "args": {"name": process_name}},
+        ]
+        atexit.register(self.save)
+
+    def add(self, name: str, start: float, end: float, args: Dict[str, Any]) -> None:
+        event = {"ph": "X", "name": name, "cat": "step", "pid": self.pid, "tid": threading.get_ident(),
+                 "ts": round((start - self.t0) * 1e6, 1), "dur": round((end - start) * 1e6, 1)}
+        if args:
+            event["args"] = args
+        with self.lock:
+            self.events.append(event)
+
+    def save(self) -> None:
+        with self.lock:
+            data = {"traceEvents": list(self.events), "displayTimeUnit": "ms"}
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, default=str)
+        os.replace(tmp, self.path)
+
+
+_tracer: Optional[Tracer] = None
+
+
+def enable(path: str) -> Tracer:
+    """Record spans from now on; the file is written at exit (or by save())."""
+    global _tracer
+    _tracer = Tracer(path)
+    return _tracer
+
+
+def save() -> Optional[str]:
+    if _tracer is None:
+        return None
+    _tracer.save()
+    return _tracer.path
+
+
+@contextmanager
+def span(name: str, **args) -> Iterator[Dict[str, Any]]:
+    """Time the enclosed block; yields the args dict so the block can attach results."""
+    tracer = _tracer
+    if tracer is None:
+        yield args
+        return
+    start = time.perf_counter()
+    try:
+        yield args
+    except BaseException as e:
+        args["error"] = f"{type(e).__name__}: {e}"[:300]
+        raise
+    finally:
+        tracer.add(name, start, time.perf_counter(), args)
@@ -4,7 +4,11 @@
 import time
 from playwright.sync_api import sync_playwright
 
+from form_filler.capture import CapturePolicy
+
 def final_form_fill():
+    # FORM_CAPTURE=never|on-failure|always (plus FORM_CAPTURE_SCOPE/FORMAT/QUALITY)
+    capture = CapturePolicy.from_env()
     with sync_playwright() as p:
         browser = p.chromium.launch(headless=False)
         context = browser.new_context()
@@ -150,9 +154,10 @@ def final_form_fill():
             print("✅ Checked consent checkbox")
             time.sleep(1)
             
-            # Take screenshot before submission
-            page.screenshot(path="output/form_filled_before_submit.png", full_page=True)
-            print("📸 Screenshot before submission saved")
+            # Screenshot before submission (only with FORM_CAPTURE=always)
+            shot = capture.capture(page, "form_filled_before_submit", ok=True)
+            if shot:
+                print(f"📸 Screenshot before submission saved: {shot}")
             
             # Submit the form
             print("🎯 Submitting form...")
@@ -177,10 +182,6 @@ def final_form_fill():
             # Wait for submission to process
             time.sleep(5)
             
-            # Take screenshot after submission
-            page.screenshot(path="output/form_submitted_success.png", full_page=True)
-            print("📸 Screenshot after submission saved")
-            
             # Check for success indicators
             print("🔍 Checking for success indicators...")
             try:
@@ -210,19 +211,26 @@ def final_form_fill():
                     print("🎉 SUCCESS! Form submission appears to be successful!")
                 else:
                     print("⚠️ Warning: No clear success indicators found, but form was submitted")
+                
+                # Screenshot after submission (always, or on-failure when unconfirmed)
+                shot = capture.capture(page, "form_submitted", ok=bool(success_info['foundIndicators']))
+                if shot:
+                    print(f"📸 Screenshot after submission saved: {shot}")
             except Exception as e:
                 print(f"Could not check success indicators: {e}")
                 print("⚠️ Form was submitted but could not verify success")
         
         except Exception as e:
             print(f"❌ Error: {e}")
-            page.screenshot(path="output/form_error.png", full_page=True)
-            print("📸 Error screenshot saved")
+            shot = capture.capture(page, "form_error", ok=False)
+            if shot:
+                print(f"📸 Error screenshot saved: {shot}")
         
         print("⏳ Waiting 10 seconds before closing...")
         time.sleep(10)
         
         browser.close()
+        capture.close()
         
         print("✅ Form filling process completed!")
 
@@ -1,175 +1,131 @@
-"""Airtable-specific helpers for handling custom widgets like selects and attachments."""
+"""Airtable widget knowledge: in-page scripts and pure helpers for selects and attachments.
 
+The engine (engine.py) drives the widgets; this module holds what is independent
+of the Playwright API: the listbox selector, the scripts that read a field's cell
+(chosen chips, upload progress) and the attachment path/stat helpers.
+"""
+
+import time
 from pathlib import Path
-from playwright.sync_api import Page, TimeoutError as PlaywrightTimeoutError
+from typing import Any, Dict, List
+
 
+# Airtable renders select choices in a popover listbox
+_LISTBOX = "[role='listbox']"
 
-def open_field(page: Page, label: str) -> None:
-    """
-    Focus a field by clicking the control next to the label text.
-    
-    Args:
-        page: Playwright page object
-        label: Exact field label text
-    """
-    try:
-        # Try the standard get_by_label approach first, but use .first to avoid strict mode violations
-        field = page.get_by_label(label).first
-        if field.count() > 0:
-            field.click()
-            return
-    except PlaywrightTimeoutError:
-        pass
-    
-    # XPath fallback: find label and click the nearest focusable element
-    try:
-        xpath = f"//label[normalize-space()='{label}']"
-        label_element = page.locator(xpath).first
-        
-        if label_element.count() > 0:
-            # Try to find a focusable element after the label
-            focusable_xpath = f"{xpath}/following::input[1] | {xpath}/following::textarea[1] | {xpath}/following::select[1] | {xpath}/following::button[1]"
-            focusable = page.locator(focusable_xpath).first
-            
-            if focusable.count() > 0:
-                focusable.click()
-                return
-            
-            # If no focusable element found, try clicking the label itself
-            label_element.click()
-    except PlaywrightTimeoutError:
-        raise PlaywrightTimeoutError(f"Could not find field with label: {label}")
+# Find a field's label (exact, then the one label containing the text) and widen it
+# to the largest ancestor that holds no other label: the field's cell
+_CELL_JS = r"""
+(label) => {
+  const norm = s => (s || '').replace(/\s+/g, ' ').trim().toLowerCase();
+  const want = norm(label);
+  const labels = [...document.querySelectorAll('label')];
+  const lab = labels.find(l => norm(l.textContent) === want)
+    || (hits => hits.length === 1 ? hits[0] : undefined)(labels.filter(l => norm(l.textContent).includes(want)));
+  if (!lab) return null;
+  let cell = lab;
+  while (cell.parentElement && cell.parentElement !== document.body
+         && cell.parentElement.querySelectorAll('label').length <= 1) cell = cell.parentElement;
+  return [lab, cell];
+}
+"""
 
+# What a select field's cell shows (outside the listbox): every leaf text, and the
+# texts of its choice chips (token/chip/pill elements, title first) when it has any
+_SELECTION_JS = f"""
+(label) => {{
+  const norm = s => (s || '').replace(/\\s+/g, ' ').trim().toLowerCase();
+  const found = ({_CELL_JS})(label);
+  if (!found) return null;
+  const [lab, cell] = found;
+  const outside = el => !(el === lab || lab.contains(el) || el.closest("[role='listbox'], [role='option']"));
+  const shown = [];
+  for (const el of cell.querySelectorAll('*')) {{
+    if (!outside(el)) continue;
+    if (el.tagName === 'SELECT') {{ for (const o of el.selectedOptions) shown.push(norm(o.textContent)); continue; }}
+    if (el.children.length === 0) shown.push(norm(el.textContent));
+  }}
+  // Innermost matches only, so a "choiceTokens" container does not count as a chip
+  const CHIP = "[class*=choiceToken], [class*=token], [class*=chip], [class*=pill]";
+  const chips = [...cell.querySelectorAll(CHIP)]
+    .filter(el => outside(el) && !el.querySelector(CHIP))
+    .map(el => norm(el.getAttribute('title') || (el.innerText || '').split('\\n')[0]))
+    .filter(Boolean);
+  return {{shown, chips}};
+}}
+"""
 
-def fill_select_single(page: Page, label: str, choice: str) -> None:
-    """
-    Fill a single select field by opening it and selecting the choice.
-    
-    Args:
-        page: Playwright page object
-        label: Field label
-        choice: Option to select
-    """
-    open_field(page, label)
-    
-    # Open the dropdown (try Enter or Space)
-    page.keyboard.press("Enter")
-    page.wait_for_timeout(500)  # Brief wait for dropdown to open
-    
-    # Type the choice and press Enter to select
-    page.keyboard.insert_text(choice)
-    page.keyboard.press("Enter")
-    page.wait_for_timeout(300)  # Brief wait for selection to register
+# True once every choice shows up in the field's cell and no chip shows a choice that
+# was not asked for (left over from an earlier pick or a partial prefill)
+_SELECTED_JS = f"""
+([label, choices]) => {{
+  const norm = s => (s || '').replace(/\\s+/g, ' ').trim().toLowerCase();
+  const s = ({_SELECTION_JS})(label);
+  if (!s) return false;
+  const want = choices.map(norm);
+  if (!want.every(c => s.shown.includes(c))) return false;
+  return s.chips.every(c => want.includes(c));
+}}
+"""
 
 
-def fill_select_multi(page: Page, label: str, choices: list) -> None:
-    """
-    Fill a multi-select field by selecting multiple options.
-    
-    Args:
-        page: Playwright page object
-        label: Field label
-        choices: List of options to select
-    """
-    for choice in choices:
-        open_field(page, label)
-        
-        # Open the dropdown
-        page.keyboard.press("Enter")
-        page.wait_for_timeout(500)
-        
-        # Type the choice and press Enter to select
-        page.keyboard.insert_text(choice)
-        page.keyboard.press("Enter")
-        page.wait_for_timeout(300)
-        
-        # For multi-select, we might need to click elsewhere to deselect
-        # or press Escape to close the dropdown before selecting the next option
-        page.keyboard.press("Escape")
-        page.wait_for_timeout(200)
+# Upload state of one attachment field: progress indicators still busy, and how many
+# of the expected file names already show up (text, title, alt, aria-label) in its cell.
+# Only explicit progress markup counts as busy; class names such as "progress" also
+# appear on static containers and would turn a finished upload into a failure.
+_UPLOAD_STATE_JS = f"""
+([label, names]) => {{
+  const found = ({_CELL_JS})(label);
+  if (!found) return {{busy: false, seen: 0, found: false}};
+  const cell = found[1];
+  const busy = !!cell.querySelector("progress, [role=progressbar], [aria-busy=true]");
+  const haystack = [cell.innerText, ...[...cell.querySelectorAll('[title], [alt], [aria-label]')].map(
+    el => [el.getAttribute('title'), el.getAttribute('alt'), el.getAttribute('aria-label')].join(' '))].join(' ').toLowerCase();
+  const seen = names.filter(n => haystack.includes(n.toLowerCase())).length;
+  return {{busy, seen, found: true}};
+}}
+"""
 
+# Nothing busy for this long after set_input_files counts as finished even if not every
+# name shows: Airtable truncates long names and shows images as thumbnails
+UPLOAD_IDLE_MS = 1500
 
-def set_attachment(page: Page, label: str, file_path: str) -> None:
-    """
-    Upload a file to an attachment field.
-    
-    Args:
-        page: Playwright page object
-        label: Field label
-        file_path: Path to the file to upload
-    """
-    file_path = Path(file_path).resolve()
-    
-    if not file_path.exists():
-        raise FileNotFoundError(f"File not found: {file_path}")
-    
-    try:
-        # Try to find file input by label first
-        file_input = page.get_by_label(label).locator("input[type='file']")
-        if file_input.count() > 0:
-            file_input.set_input_files(str(file_path))
-            return
-    except PlaywrightTimeoutError:
-        pass
-    
-    # XPath fallback: find file input near the label
-    try:
-        xpath = f"//label[normalize-space()='{label}']//input[@type='file']"
-        file_input = page.locator(xpath).first
-        
-        if file_input.count() > 0:
-            file_input.set_input_files(str(file_path))
-        else:
-            raise PlaywrightTimeoutError(f"Could not find file input for label: {label}")
-    except PlaywrightTimeoutError:
-        raise PlaywrightTimeoutError(f"Could not find file input for label: {label}")
+# "names" once nothing is busy and every name is shown, "idle" once nothing has been busy
+# for idleMs (without all names), otherwise false. `key` scopes the idle timer to one wait.
+_UPLOAD_SETTLED_JS = f"""
+([label, names, idleMs, key]) => {{
+  const s = ({_UPLOAD_STATE_JS})([label, names]);
+  const since = (window.__ffUploadIdle = window.__ffUploadIdle || {{}});
+  if (s.busy) {{ delete since[key]; return false; }}
+  if (s.seen >= names.length) {{ delete since[key]; return 'names'; }}
+  if (since[key] === undefined) since[key] = performance.now();
+  if (performance.now() - since[key] < idleMs) return false;
+  delete since[key];
+  return 'idle';
+}}
+"""
 
 
-def check_by_label(page: Page, label: str) -> None:
-    """
-    Check a checkbox by its label.
-    
-    Args:
-        page: Playwright page object
-        label: Checkbox label
-    """
-    try:
-        checkbox = page.get_by_label(label)
-        if checkbox.count() > 0:
-            checkbox.check()
-            return
-    except PlaywrightTimeoutError:
-        pass
-    
-    # XPath fallback
-    xpath = f"//label[normalize-space()='{label}']//input[@type='checkbox']"
-    checkbox = page.locator(xpath).first
-    if checkbox.count() > 0:
-        checkbox.check()
-    else:
-        raise PlaywrightTimeoutError(f"Could not find checkbox for label: {label}")
+def _attachment_paths(file_paths) -> List[Path]:
+    """Resolve one path or a list of paths; raise if any is missing."""
+    paths = [Path(p).resolve() for p in (file_paths if isinstance(file_paths, (list, tuple)) else [file_paths])]
+    for path in paths:
+        if not path.exists():
+            raise FileNotFoundError(f"File not found: {path}")
+    return paths
 
 
-def uncheck_by_label(page: Page, label: str) -> None:
-    """
-    Uncheck a checkbox by its label.
-    
-    Args:
-        page: Playwright page object
-        label: Checkbox label
-    """
-    try:
-        checkbox = page.get_by_label(label)
-        if checkbox.count() > 0:
-            checkbox.uncheck()
-            return
-    except PlaywrightTimeoutError:
-        pass
-    
-    # XPath fallback
-    xpath = f"//label[normalize-space()='{label}']//input[@type='checkbox']"
-    checkbox = page.locator(xpath).first
-    if checkbox.count() > 0:
-        checkbox.uncheck()
-    else:
-        raise PlaywrightTimeoutError(f"Could not find checkbox for label: {label}")
+def _upload_stats(paths: List[Path], t0: float, set_ms: float, confirmed: bool) -> Dict[str, Any]:
+    total = sum(p.stat().st_size for p in paths)
+    upload_ms = (time.perf_counter() - t0) * 1000
+    stats = {
+        "files": len(paths),
+        "bytes": total,
+        "set_ms": round(set_ms, 1),
+        "upload_ms": round(upload_ms, 1),
+        "mb_per_s": round(total / 1e6 / (upload_ms / 1000), 2) if upload_ms > 0 else None,
+        "confirmed": confirmed,
+    }
+    print(f"Uploaded {stats['files']} file(s), {total / 1e6:.2f} MB in {stats['upload_ms']} ms "
+          f"({stats['mb_per_s']} MB/s)")
+    return stats
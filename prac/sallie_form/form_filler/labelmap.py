@@ -0,0 +1,199 @@
+"""Label-to-control map built with a single page.evaluate per page.
+
+Resolving each field with its own XPath/get_by_label probes costs several
+round-trips per field. Instead, one script walks every <label> and form control
+in document order, tags the control that belongs to each label with a
+`data-ff-id` attribute and returns {label text: {slot: id}}. Every later lookup
+is an in-memory dict hit that yields a stable `[data-ff-id="..."]` locator.
+A map can also be seeded from a cached form schema (see schema.py), whose
+selectors survive reloads, so no walk is needed at all.
+
+Slots:
+    text      first input/textarea/contenteditable after the label
+              (same as the old `following::input[1]` probe)
+    focus     first focusable control after the label (selects, comboboxes, buttons)
+    checkbox  checkbox owned by the label (label.control, nested, or before the next label)
+    file      file input owned by the label (label.control, nested, or before the next label)
+"""
+
+import re
+import weakref
+from typing import Dict, Optional
+
+from playwright.sync_api import Page, Locator
+
+
+_BUILD_JS = r"""
+() => {
+  const norm = s => (s || '').replace(/\s+/g, ' ').trim();
+  const gen = (window.__ffGen = (window.__ffGen || 0) + 1);
+  let n = 0;
+  const tag = el => {
+    if (!el.dataset.ffId || !el.dataset.ffId.startsWith('g' + gen + '-')) el.dataset.ffId = 'g' + gen + '-' + (n++);
+    return el.dataset.ffId;
+  };
+  const slotOf = el => {
+    const t = el.tagName.toLowerCase();
+    const type = (el.getAttribute('type') || '').toLowerCase();
+    const role = el.getAttribute('role');
+    if (t === 'input' && type === 'file') return 'file';
+    if ((t === 'input' && type === 'checkbox') || role === 'checkbox') return 'checkbox';
+    if (t === 'input' && ['hidden', 'submit', 'button', 'reset', 'image', 'radio'].includes(type)) return null;
+    if (t === 'input' || t === 'textarea' || el.isContentEditable) return 'text';
+    return 'focus';
+  };
+  const CONTROLS = 'input, textarea, select, button, [role=combobox], [role=checkbox], [contenteditable=true]';
+  const nodes = document.querySelectorAll('label, ' + CONTROLS);
+  const map = {};
+  const pending = [];   // labels still looking for a following text/focus control
+  let owner = null;     // most recent label: owns checkbox/file controls until the next label
+  const put = (entry, slot, el) => { if (!entry[slot]) entry[slot] = tag(el); };
+  for (const el of nodes) {
+    if (el.tagName.toLowerCase() === 'label') {
+      const text = norm(el.textContent);
+      if (!text || map[text]) { owner = null; continue; }
+      const entry = map[text] = {};
+      const c = el.control;
+      if (c) {
+        const s = slotOf(c);
+        if (s) put(entry, s, c);
+        if (s === 'text' || s === 'focus') put(entry, 'focus', c);
+      }
+      pending.push(entry);
+      owner = entry;
+      continue;
+    }
+    const slot = slotOf(el);
+    if (!slot) continue;
+    if (slot === 'file' || slot === 'checkbox') {
+      if (owner) put(owner, slot, el);
+      continue;
+    }
+    for (let i = pending.length - 1; i >= 0; i--) {
+      const e = pending[i];
+      if (slot === 'text') put(e, 'text', el);
+      put(e, 'focus', el);
+      if (e.text && e.focus) pending.splice(i, 1);
+    }
+  }
+  return map;
+}
+"""
+
+
+def _norm(text: str) -> str:
+    return re.sub(r"\s+", " ", text or "").strip()
+
+
+def xpath_literal(text: str) -> str:
+    """
+    Quote a string for use inside an XPath expression.
+
+    Labels such as "Parent's Email" break naive '{label}' interpolation; strings
+    containing both quote kinds are emitted as concat(...).
+
+    Args:
+        text: Raw string
+    """
+    if "'" not in text:
+        return f"'{text}'"
+    if '"' not in text:
+        return f'"{text}"'
+    parts = text.split("'")
+    return "concat(" + ", \"'\", ".join(f"'{p}'" for p in parts) + ")"
+
+
+class LabelMap:
+    """In-memory index from label text to tagged controls on one page."""
+
+    def __init__(self, page: Page, entries: Dict[str, Dict[str, str]]):
+        """
+        Args:
+            page: Playwright page object
+            entries: {label text: {slot: selector}}
+        """
+        self.page = page
+        self.entries = entries
+        self.url = page.url
+
+    @staticmethod
+    def _selectors(ids: Dict[str, Dict[str, str]]) -> Dict[str, Dict[str, str]]:
+        return {label: {slot: f'[data-ff-id="{i}"]' for slot, i in slots.items()} for label, slots in ids.items()}
+
+    @classmethod
+    def build(cls, page: Page) -> "LabelMap":
+        """Walk the page once and return the map."""
+        return cls(page, cls._selectors(page.evaluate(_BUILD_JS) or {}))
+
+    @classmethod
+    async def build_async(cls, page) -> "LabelMap":
+        """Same as build() for a playwright.async_api page."""
+        return cls(page, cls._selectors(await page.evaluate(_BUILD_JS) or {}))
+
+    def find(self, label: str) -> Optional[Dict[str, str]]:
+        """
+        Return the slot dict for a label: exact (whitespace-normalized) match first,
+        then a case-insensitive match, then the one label containing the text.
+
+        A "contains" match is accepted only when exactly one label matches, so
+        "Name" never silently resolves to "First Name"; otherwise None is returned
+        and the next locator strategy runs.
+        """
+        key = _norm(label)
+        if key in self.entries:
+            return self.entries[key]
+        low = key.lower()
+        for text, entry in self.entries.items():
+            if text.lower() == low or text.lower().rstrip(" *") == low:
+                return entry
+        hits = [entry for text, entry in self.entries.items() if low and low in text.lower()]
+        return hits[0] if len(hits) == 1 else None
+
+    def control(self, label: str, slot: str) -> Optional[Locator]:
+        """
+        Locator for the control in `slot` of `label`, or None if the map has none.
+
+        Args:
+            label: Field label
+            slot: One of "text", "focus", "checkbox", "file"
+        """
+        entry = self.find(label)
+        if not entry or not entry.get(slot):
+            return None
+        return self.page.locator(entry[slot])
+
+
+_maps: "weakref.WeakKeyDictionary[Page, LabelMap]" = weakref.WeakKeyDictionary()
+
+
+def label_map(page: Page, refresh: bool = False) -> LabelMap:
+    """
+    Return the page's label map, building it on first use, after navigation, or
+    when `refresh` is set.
+
+    Args:
+        page: Playwright page object
+        refresh: Force a rebuild (e.g. after the form was re-rendered)
+    """
+    cached = _maps.get(page)
+    if refresh or cached is None or cached.url != page.url:
+        cached = _maps[page] = LabelMap.build(page)
+    return cached
+
+
+async def label_map_async(page, refresh: bool = False) -> LabelMap:
+    """label_map() for a playwright.async_api page (shares the same cache)."""
+    cached = _maps.get(page)
+    if refresh or cached is None or cached.url != page.url:
+        cached = _maps[page] = await LabelMap.build_async(page)
+    return cached
+
+
+def set_label_map(page: Page, lm: LabelMap) -> None:
+    """Install a prebuilt map (e.g. from a cached form schema) so no page walk is needed."""
+    _maps[page] = lm
+
+
+def invalidate(page: Page) -> None:
+    """Drop the cached map so the next lookup rebuilds it."""
+    _maps.pop(page, None)
@@ -0,0 +1,116 @@
+"""Airtable prefill-URL planner: put every supported field in the form URL, UI-fill the rest.
+
+Airtable forms read `prefill_<Field Name>=value` query parameters (spaces as `+`),
+including single and multiple selects (comma-separated choices). Fields that
+cannot be prefilled (attachments, multi-select choices containing commas, values
+that would push the URL past `max_len`) stay on the UI path.
+
+The parameter name is the underlying Airtable field name. It usually equals the
+form label; when a form renames a field, set `"prefill": "<Field Name>"` on that
+data.json entry (or `"prefill": false` to always fill it through the UI).
+"""
+
+from typing import Any, Dict, List, NamedTuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from .airtable import _CELL_JS, _SELECTION_JS
+
+
+# Airtable's own limit is far higher; this keeps links usable in logs and chat tools
+MAX_URL_LEN = 8000
+
+PREFILL_KINDS = {"text", "long_text", "email", "url", "tel", "number", "date",
+                 "checkbox", "single_select", "multi_select"}
+
+
+class PrefillPlan(NamedTuple):
+    url: str
+    prefilled: List[Dict[str, Any]]
+    ui: List[Dict[str, Any]]
+
+
+def is_airtable(url: str) -> bool:
+    host = urlsplit(url).netloc.lower()
+    return host == "airtable.com" or host.endswith(".airtable.com")
+
+
+def _param(field: Dict[str, Any]):
+    """Return (name, value) for a prefillable field, or None if it must go through the UI."""
+    kind = field["type"]
+    value = field["value"]
+    name = field.get("prefill", field["label"])
+    if name is False or kind not in PREFILL_KINDS or value is None:
+        return None
+    if kind == "checkbox":
+        return name, "true"
+    if kind == "multi_select":
+        choices = value if isinstance(value, list) else [value]
+        if any("," in str(c) for c in choices):
+            return None
+        return name, ",".join(str(c) for c in choices)
+    return name, str(value)
+
+
+def plan_prefill(url: str, data: List[Dict[str, Any]], max_len: int = MAX_URL_LEN) -> PrefillPlan:
+    """
+    Split a record into a prefilled form URL and the fields left for UI filling.
+
+    Args:
+        url: Form URL (existing query parameters are kept)
+        data: List of {label, type, value} field objects
+        max_len: Fields that would push the URL past this length go to the UI path
+
+    Returns:
+        PrefillPlan(url, prefilled fields, ui fields) in data order
+    """
+    parts = urlsplit(url)
+    params = parse_qsl(parts.query, keep_blank_values=True)
+    prefilled, ui = [], []
+    for field in data:
+        if field["type"] == "checkbox" and not field["value"] and field.get("prefill") is not False:
+            # An unchecked box is the form's default, so nothing needs to be sent
+            prefilled.append(field)
+            continue
+        p = _param(field)
+        if p is None:
+            ui.append(field)
+            continue
+        trial = params + [(f"prefill_{p[0]}", p[1])]
+        if len(urlunsplit(parts._replace(query=urlencode(trial)))) > max_len:
+            ui.append(field)
+            continue
+        params = trial
+        prefilled.append(field)
+    return PrefillPlan(urlunsplit(parts._replace(query=urlencode(params))), prefilled, ui)
+
+
+# Returns the labels of prefilled fields whose value did not show up on the page.
+# The cell lookup and the shown values come from the select scripts in airtable.py.
+VERIFY_PREFILL_JS = f"""
+(fields) => {{
+  const norm = s => (s || '').replace(/\\s+/g, ' ').trim().toLowerCase();
+  const cellOf = ({_CELL_JS});
+  const selectionOf = ({_SELECTION_JS});
+  const missing = [];
+  for (const f of fields) {{
+    const found = cellOf(f.label);
+    if (!found) {{ missing.push(f.label); continue; }}
+    const cell = found[1];
+    let ok;
+    if (f.type === 'checkbox') {{
+      const box = cell.querySelector("input[type=checkbox], [role=checkbox]");
+      ok = !f.value || !!(box && (box.checked || box.getAttribute('aria-checked') === 'true'));
+    }} else if (f.type === 'single_select' || f.type === 'multi_select') {{
+      const shown = selectionOf(f.label).shown;
+      const want = Array.isArray(f.value) ? f.value : [f.value];
+      ok = want.every(v => shown.includes(norm(String(v))));
+    }} else {{
+      // Display formats differ (dates, phone numbers), so any non-empty value counts
+      ok = [...cell.querySelectorAll('input, textarea')].some(el => (el.value || '').trim() !== '')
+           || [...cell.querySelectorAll('[contenteditable=true]')].some(el => norm(el.textContent) !== '');
+    }}
+    if (!ok) missing.push(f.label);
+  }}
+  return missing;
+}}
+"""
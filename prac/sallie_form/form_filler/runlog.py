@@ -0,0 +1,184 @@
+"""Buffered, structured run log (JSONL) and a summary command.
+
+One JSON object per record, so multi-line Playwright errors stay inside a single
+line. Rows are buffered in memory and flushed with a single O_APPEND write, so
+concurrent workers (threads via the lock, processes via O_APPEND) never
+interleave partial rows.
+
+Row fields:
+    timestamp, url, status, error, error_class, signal, record, worker, probes_saved,
+    phases     {"open_ms", "fill_ms", "submit_ms", "confirm_ms", "total_ms"}
+    fields     [{"label", "type", "ok", "ms", "error"}]
+    artifacts  [paths of screenshots etc.]
+
+Summary:
+    python -m form_filler.runlog summary [output/run_log.jsonl] [--url URL] [--json]
+"""
+
+import argparse
+import atexit
+import csv
+import json
+import math
+import os
+import sys
+import threading
+from collections import Counter
+from typing import Any, Dict, Iterator, List, Optional
+
+
+DEFAULT_PATH = "output/run_log.jsonl"
+
+
+class RunLog:
+    """Buffered JSONL writer; safe to share between workers."""
+
+    def __init__(self, path: str = DEFAULT_PATH, flush_every: int = 20):
+        self.path = path
+        self.flush_every = max(1, flush_every)
+        self._buf: List[str] = []
+        self._lock = threading.Lock()
+        atexit.register(self.flush)
+
+    def write(self, row: Dict[str, Any]) -> None:
+        """Queue one row; flushes when the buffer reaches `flush_every`."""
+        line = json.dumps(row, ensure_ascii=False, default=str) + "\n"
+        with self._lock:
+            self._buf.append(line)
+            if len(self._buf) >= self.flush_every:
+                self._flush_locked()
+
+    def flush(self) -> None:
+        """Append every buffered row with one write."""
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self) -> None:
+        if not self._buf:
+            return
+        data = "".join(self._buf).encode("utf-8")
+        self._buf.clear()
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, data)
+        finally:
+            os.close(fd)
+
+    def close(self) -> None:
+        self.flush()
+        atexit.unregister(self.flush)
+
+    def __enter__(self) -> "RunLog":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+_logs: Dict[str, RunLog] = {}
+
+
+def get_log(path: str = DEFAULT_PATH) -> RunLog:
+    """Process-wide RunLog for `path` (flushed at exit)."""
+    if path not in _logs:
+        _logs[path] = RunLog(path)
+    return _logs[path]
+
+
+def read_rows(path: str = DEFAULT_PATH) -> Iterator[Dict[str, Any]]:
+    """Yield rows from a JSONL run log, or from the legacy run_log.csv."""
+    with open(path, newline="", encoding="utf-8") as f:
+        if path.lower().endswith(".csv"):
+            yield from csv.DictReader(f)
+            return
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                continue
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    """
+    Nearest-rank percentile: the smallest value with at least q of the samples at or below it.
+
+    Args:
+        values: Samples (any order)
+        q: Quantile in (0, 1], e.g. 0.9 for p90
+    """
+    if not values:
+        return None
+    values = sorted(values)
+    # round() first so 0.29 * 100 does not become rank 29.000000000000004 -> 30
+    return values[max(0, math.ceil(round(q * len(values), 9)) - 1)]
+
+
+def summarize(rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Success rate, status/error-class counts, latency percentiles and failing fields."""
+    total = len(rows)
+    ok = sum(1 for r in rows if r.get("status") == "success")
+    phases: Dict[str, List[float]] = {}
+    for r in rows:
+        for name, ms in (r.get("phases") or {}).items():
+            if isinstance(ms, (int, float)):
+                phases.setdefault(name, []).append(ms)
+    failing = Counter(f.get("label") for r in rows for f in (r.get("fields") or []) if not f.get("ok"))
+    return {
+        "records": total,
+        "success": ok,
+        "success_rate": round(ok / total, 4) if total else None,
+        "status": dict(Counter(r.get("status") or "unknown" for r in rows)),
+        "error_class": dict(Counter(r["error_class"] for r in rows if r.get("error_class"))),
+        "signal": dict(Counter(r["signal"] for r in rows if r.get("signal"))),
+        "latency_ms": {
+            name: {"p50": percentile(v, 0.5), "p90": percentile(v, 0.9), "p99": percentile(v, 0.99), "n": len(v)}
+            for name, v in phases.items()
+        },
+        "failing_fields": dict(failing.most_common(10)),
+        "probes_saved": sum(r["probes_saved"] for r in rows if isinstance(r.get("probes_saved"), int)),
+    }
+
+
+def print_summary(s: Dict[str, Any]) -> None:
+    rate = f"{s['success_rate'] * 100:.1f}%" if s["success_rate"] is not None else "n/a"
+    print(f"Records: {s['records']}  success: {s['success']} ({rate})")
+    print("Status: " + ", ".join(f"{k}={v}" for k, v in s["status"].items()))
+    if s["error_class"]:
+        print("Errors: " + ", ".join(f"{k}={v}" for k, v in s["error_class"].items()))
+    if s["signal"]:
+        print("Confirmed by: " + ", ".join(f"{k}={v}" for k, v in s["signal"].items()))
+    for name, p in s["latency_ms"].items():
+        print(f"{name:>11}: p50 {p['p50']} ms | p90 {p['p90']} ms | p99 {p['p99']} ms (n={p['n']})")
+    if s["probes_saved"]:
+        print(f"Selector probes saved by the cache: {s['probes_saved']}")
+    if s["failing_fields"]:
+        print("Failing fields: " + ", ".join(f"{k} ({v})" for k, v in s["failing_fields"].items()))
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Query the form_filler run log")
+    sub = parser.add_subparsers(dest="command", required=True)
+    summary = sub.add_parser("summary", help="Success rate and latency percentiles")
+    summary.add_argument("path", nargs="?", default=DEFAULT_PATH, help=f"Run log (default: {DEFAULT_PATH})")
+    summary.add_argument("--url", help="Only rows for this form URL")
+    summary.add_argument("--json", action="store_true", help="Print the summary as JSON")
+    args = parser.parse_args(argv)
+
+    try:
+        rows = [r for r in read_rows(args.path) if not args.url or r.get("url") == args.url]
+    except FileNotFoundError:
+        print(f"Error: File not found: {args.path}")
+        sys.exit(1)
+    s = summarize(rows)
+    if args.json:
+        print(json.dumps(s, indent=2))
+    else:
+        print_summary(s)
+
+
+if __name__ == "__main__":
+    main()
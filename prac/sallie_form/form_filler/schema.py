@@ -0,0 +1,224 @@
+"""Cached form schema: labels, control types, stable locators, options and required flags.
+
+`inspect_form.py` (or the engine on first contact) writes one schema per form URL
+to `output/form_schema.json`:
+
+    {"<form url>": {"url", "fingerprint", "inspected_at",
+                    "fields": [{"label", "type", "required", "options",
+                                "locators": {"text"|"focus"|"checkbox"|"file": selector}}]}}
+
+Locators are label-relative XPath (or a unique `name`), so they survive reloads.
+With a schema loaded, records resolve fields without walking the page. The
+fingerprint is a hash of the label -> slot structure that the label map sees; when
+a fresh page no longer matches it, the form is re-inspected and the file updated.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlsplit, urlunsplit
+
+from .labelmap import LabelMap, label_map, label_map_async, set_label_map
+
+
+DEFAULT_PATH = "output/form_schema.json"
+
+# Describe every label-map entry: type, stable locators, options, required.
+# Takes {label: {slot: selector}} from a freshly built LabelMap.
+SCHEMA_JS = r"""
+(entries) => {
+  const lit = s => !s.includes("'") ? `'${s}'` : (!s.includes('"') ? `"${s}"`
+    : "concat('" + s.split("'").join(`', "'", '`) + "')");
+  const labelOf = text => [...document.querySelectorAll('label')]
+    .find(l => l.textContent.replace(/\s+/g, ' ').trim() === text);
+  const test = el => {
+    const t = el.tagName.toLowerCase();
+    const type = el.getAttribute('type');
+    if (t === 'input') return type ? `input[@type='${type}']` : 'input';
+    if (['textarea', 'select', 'button'].includes(t)) return t;
+    if (el.getAttribute('role')) return `*[@role='${el.getAttribute('role')}']`;
+    if (el.isContentEditable) return "*[@contenteditable='true']";
+    return t;
+  };
+  const stable = (el, text) => {
+    const name = el.getAttribute('name');
+    if (name && !name.includes('"') && document.querySelectorAll(`[name="${name}"]`).length === 1)
+      return `${el.tagName.toLowerCase()}[name="${name}"]`;
+    const lab = labelOf(text);
+    if (!lab) return null;
+    const base = `(//label[normalize-space()=${lit(text)}])[1]`;
+    const axes = lab.contains(el) ? ['//'] : ['/following::'];
+    for (const axis of axes) {
+      for (let j = 1; j <= 50; j++) {
+        const xp = `(${base}${axis}${test(el)})[${j}]`;
+        let hit;
+        try { hit = document.evaluate(xp, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue; }
+        catch (e) { return null; }
+        if (!hit) break;
+        if (hit === el) return 'xpath=' + xp;
+      }
+    }
+    return null;
+  };
+  const kind = el => {
+    const t = el.tagName.toLowerCase();
+    const type = (el.getAttribute('type') || 'text').toLowerCase();
+    if (t === 'textarea' || (el.isContentEditable && t !== 'input')) return 'long_text';
+    if (t === 'select') return el.multiple ? 'multi_select' : 'single_select';
+    if (t === 'input') return ({email: 'email', tel: 'tel', number: 'number', date: 'date', url: 'url'})[type] || 'text';
+    return 'select';   // custom popover (Airtable single/multi select)
+  };
+  const optionsOf = el => {
+    if (el.tagName === 'SELECT') return [...el.options].map(o => o.textContent.trim()).filter(Boolean);
+    const lb = el.getAttribute('aria-controls') && document.getElementById(el.getAttribute('aria-controls'));
+    return lb ? [...lb.querySelectorAll("[role='option']")].map(o => o.textContent.trim()).filter(Boolean) : [];
+  };
+  return Object.entries(entries).map(([text, slots]) => {
+    const els = {};
+    for (const [slot, sel] of Object.entries(slots)) els[slot] = document.querySelector(sel);
+    const primary = els.file || els.checkbox || els.focus || els.text;
+    const type = els.file ? 'attachment' : els.checkbox ? 'checkbox' : primary ? kind(primary) : 'unknown';
+    const locators = {};
+    for (const [slot, el] of Object.entries(els)) {
+      const s = el && stable(el, text);
+      if (s) locators[slot] = s;
+    }
+    return {
+      label: text,
+      type,
+      required: /\*\s*$/.test(text) || !!(primary && (primary.required || primary.getAttribute('aria-required') === 'true')),
+      options: primary ? optionsOf(primary) : [],
+      locators,
+    };
+  });
+}
+"""
+
+
+def form_key(url: str) -> str:
+    """Schema key for a form URL: scheme, host and path (prefill query parameters ignored)."""
+    sp = urlsplit(url)
+    return urlunsplit((sp.scheme, sp.netloc, sp.path.rstrip("/"), "", ""))
+
+
+def fingerprint(lm: LabelMap) -> str:
+    """Hash of the label -> slot structure a LabelMap found on the page."""
+    shape = sorted([label, sorted(slots)] for label, slots in lm.entries.items())
+    return hashlib.sha256(json.dumps(shape, ensure_ascii=False).encode("utf-8")).hexdigest()[:16]
+
+
+def _schema(url: str, lm: LabelMap, fields: List[Dict[str, Any]]) -> Dict[str, Any]:
+    return {
+        "url": form_key(url),
+        "fingerprint": fingerprint(lm),
+        "inspected_at": datetime.now().isoformat(timespec="seconds"),
+        "fields": fields,
+    }
+
+
+def inspect(page, url: Optional[str] = None) -> Dict[str, Any]:
+    """Build the schema for the form open on a sync-API page (two evaluates)."""
+    lm = label_map(page, refresh=True)
+    return _schema(url or page.url, lm, page.evaluate(SCHEMA_JS, lm.entries))
+
+
+async def inspect_async(page, url: Optional[str] = None) -> Dict[str, Any]:
+    """inspect() for an async-API page."""
+    lm = await label_map_async(page, refresh=True)
+    return _schema(url or page.url, lm, await page.evaluate(SCHEMA_JS, lm.entries))
+
+
+def load_schemas(path: str = DEFAULT_PATH) -> Dict[str, Dict[str, Any]]:
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def save_schema(schema: Dict[str, Any], path: str = DEFAULT_PATH) -> None:
+    """Insert/replace one form's schema in the file (atomic replace)."""
+    schemas = load_schemas(path)
+    schemas[schema["url"]] = schema
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(schemas, f, indent=2, ensure_ascii=False)
+    os.replace(tmp, path)
+
+
+def check_record(schema: Dict[str, Any], data: List[Dict[str, Any]]) -> List[str]:
+    """Problems a record has against the schema: missing required fields, unknown choices."""
+    fields = {f["label"].rstrip(" *").lower(): f for f in schema.get("fields", [])}
+    given = {d["label"].rstrip(" *").lower(): d for d in data}
+    problems = [f"required field missing: {f['label']}" for key, f in fields.items()
+                if f.get("required") and key not in given]
+    for key, d in given.items():
+        f = fields.get(key)
+        if not f or not f.get("options") or d["type"] not in ("single_select", "multi_select"):
+            continue
+        values = d["value"] if isinstance(d["value"], list) else [d["value"]]
+        problems += [f"{d['label']}: '{v}' is not an option" for v in values if str(v) not in f["options"]]
+    return problems
+
+
+def merge_options(schema: Dict[str, Any], previous: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Carry choice lists over from `previous` into a re-inspected `schema`.
+
+    SCHEMA_JS only reads options that are in the DOM (native selects, already-open
+    listboxes); the ones `inspect_form.py --options` collected by opening custom
+    selects would otherwise be lost on every automatic re-inspect. Fields are
+    matched by label (case and a trailing "*" ignored) and keep their new options
+    if the page exposed any.
+    """
+    old = {f["label"].rstrip(" *").lower(): f.get("options") for f in (previous or {}).get("fields", [])}
+    for f in schema.get("fields", []):
+        carried = old.get(f["label"].rstrip(" *").lower())
+        if carried and not f.get("options"):
+            f["options"] = list(carried)
+    return schema
+
+
+class SchemaCache:
+    """
+    One form's schema shared by the engine's workers.
+
+    `attach_async` resolves the page's fields: on a fresh page it builds the label
+    map once, compares its fingerprint and re-inspects if the form changed; on a
+    reset page it installs the cached locators without walking the page.
+    """
+
+    def __init__(self, url: str, path: str = DEFAULT_PATH):
+        self.url = url
+        self.path = path
+        self.schema = load_schemas(path).get(form_key(url))
+        self.reinspections = 0
+        self._lock = threading.Lock()
+
+    def entries(self) -> Dict[str, Dict[str, str]]:
+        return {f["label"]: f["locators"] for f in (self.schema or {}).get("fields", []) if f.get("locators")}
+
+    async def attach_async(self, page, verify: bool) -> str:
+        """
+        Prepare the page's label map. Returns "cached", "verified" or "inspected".
+
+        Args:
+            page: Playwright async page with the form loaded
+            verify: Check the fingerprint (first record on a page, or after a failure)
+        """
+        if self.schema and not verify:
+            set_label_map(page, LabelMap(page, self.entries()))
+            return "cached"
+        lm = await label_map_async(page, refresh=True)
+        if self.schema and self.schema.get("fingerprint") == fingerprint(lm):
+            return "verified"
+        schema = merge_options(_schema(self.url, lm, await page.evaluate(SCHEMA_JS, lm.entries)), self.schema)
+        with self._lock:
+            self.schema = schema
+            self.reinspections += 1
+            save_schema(schema, self.path)
+        return "inspected"